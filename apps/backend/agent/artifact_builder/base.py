@@ -11,6 +11,7 @@ specific language governing permissions and limitations under the License.
 
 import abc
 import logging
+import multiprocessing
 import os
 import shutil
 import tarfile
@@ -26,11 +27,28 @@ from apps.core.files.storage import get_storage
 from apps.core.tag.constants import AGENT_NAME_TARGET_ID_MAP, TargetType
 from apps.core.tag.handlers import TagHandler
 from apps.node_man import constants, models
-from apps.utils import cache, files
+from apps.utils import cache, concurrent, files
 
 logger = logging.getLogger("app")
 
 
+def pack_package(pkg_absolute_path: str, arcname: str, package_tmp_path: str) -> typing.Dict[str, typing.Any]:
+    """
+    将安装包目录打包为 tgz，写入时同步计算 MD5 及大小
+    可在子进程中执行，参数及返回值均需可序列化
+    :param pkg_absolute_path: 安装包目录
+    :param arcname: 包内根目录名
+    :param package_tmp_path: 打包文件路径
+    :return:
+    """
+    os.makedirs(os.path.dirname(package_tmp_path), exist_ok=True)
+    with open(package_tmp_path, mode="wb") as fs:
+        digest_writer = files.DigestWriter(fs)
+        with tarfile.open(fileobj=digest_writer, mode="w:gz") as tf:
+            tf.add(pkg_absolute_path, arcname=arcname)
+    return {"package_tmp_path": package_tmp_path, "md5": digest_writer.md5, "pkg_size": digest_writer.size}
+
+
 class BaseArtifactBuilder(abc.ABC):
 
     # 最终的制品名称
@@ -333,23 +351,59 @@ class BaseArtifactBuilder(abc.ABC):
         :param artifact_meta_info: 基础信息
         :return:
         """
+        pack_result: typing.Dict[str, typing.Any] = pack_package(
+            **self.get_pack_params(package_dir_info, artifact_meta_info)
+        )
+        return self.upload_package(package_dir_info, artifact_meta_info, pack_result)
+
+    def get_pack_params(
+        self, package_dir_info: typing.Dict[str, typing.Any], artifact_meta_info: typing.Dict[str, typing.Any]
+    ) -> typing.Dict[str, str]:
+        """
+        获取安装包打包参数
+        :param package_dir_info: 安装包信息
+        :param artifact_meta_info: 基础信息
+        :return: pack_package 参数
+        """
+        pkg_name: str = f"{artifact_meta_info['name']}-{artifact_meta_info['version']}.tgz"
+        return {
+            "pkg_absolute_path": package_dir_info["pkg_absolute_path"],
+            "arcname": f"{self.PKG_DIR}/",
+            "package_tmp_path": os.path.join(
+                self.apply_tmp_dir(),
+                self.BASE_STORAGE_DIR,
+                package_dir_info["os"],
+                package_dir_info["cpu_arch"],
+                pkg_name,
+            ),
+        }
+
+    def upload_package(
+        self,
+        package_dir_info: typing.Dict[str, typing.Any],
+        artifact_meta_info: typing.Dict[str, typing.Any],
+        pack_result: typing.Dict[str, typing.Any],
+    ) -> typing.Dict[str, typing.Any]:
+        """
+        上传已打包的安装包
+        :param package_dir_info: 安装包信息
+        :param artifact_meta_info: 基础信息
+        :param pack_result: pack_package 打包结果
+        :return:
+        """
         name: str = artifact_meta_info["name"]
         os_str: str = package_dir_info["os"]
         cpu_arch: str = package_dir_info["cpu_arch"]
         version_str: str = artifact_meta_info["version"]
         pkg_name: str = f"{name}-{version_str}.tgz"
+        package_tmp_path: str = pack_result["package_tmp_path"]
 
-        package_tmp_path = os.path.join(self.apply_tmp_dir(), self.BASE_STORAGE_DIR, os_str, cpu_arch, pkg_name)
-        os.makedirs(os.path.dirname(package_tmp_path), exist_ok=True)
-
-        with tarfile.open(package_tmp_path, "w:gz") as tf:
-            tf.add(package_dir_info["pkg_absolute_path"], arcname=f"{self.PKG_DIR}/")
-            logger.info(
-                "project -> {project} version -> {version} "
-                "now is pack to package_tmp_path -> {package_tmp_path}".format(
-                    project=name, version=version_str, package_tmp_path=package_tmp_path
-                )
+        logger.info(
+            "project -> {project} version -> {version} "
+            "now is pack to package_tmp_path -> {package_tmp_path}".format(
+                project=name, version=version_str, package_tmp_path=package_tmp_path
             )
+        )
 
         # 将 Agent 包上传到存储系统
         package_target_path = os.path.join(self.download_path, self.BASE_STORAGE_DIR, os_str, cpu_arch, pkg_name)
@@ -384,11 +438,57 @@ class BaseArtifactBuilder(abc.ABC):
 
         return {
             "pkg_name": pkg_name,
-            "md5": files.md5sum(name=package_tmp_path),
-            "pkg_size": os.path.getsize(package_tmp_path),
+            # 摘要及大小在打包时已同步计算，无需重新读取文件
+            "md5": pack_result["md5"],
+            "pkg_size": pack_result["pkg_size"],
             "pkg_path": os.path.dirname(package_target_path),
         }
 
+    def make_and_upload_packages(
+        self,
+        package_dir_infos: typing.List[typing.Dict[str, typing.Any]],
+        artifact_meta_info: typing.Dict[str, typing.Any],
+    ) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+        并行制作并上传多个安装包
+        打包（压缩）为 CPU 密集型，在多进程中执行；上传为 IO 密集型，在多线程中执行
+        :param package_dir_infos: 安装包信息列表
+        :param artifact_meta_info: 基础信息
+        :return: 与 package_dir_infos 顺序一致的上传结果列表
+        """
+        pack_params_list: typing.List[typing.Dict[str, str]] = [
+            self.get_pack_params(package_dir_info, artifact_meta_info) for package_dir_info in package_dir_infos
+        ]
+        if len(pack_params_list) > 1 and not multiprocessing.current_process().daemon:
+            pack_results = concurrent.batch_call_multi_proc(pack_package, pack_params_list)
+        else:
+            # 守护进程（如 Celery worker）不允许创建子进程，退化为多线程，压缩时会释放 GIL，仍可并行
+            pack_results = concurrent.batch_call(pack_package, pack_params_list)
+
+        package_tmp_path__pack_result_map: typing.Dict[str, typing.Dict[str, typing.Any]] = {
+            pack_result["package_tmp_path"]: pack_result for pack_result in pack_results
+        }
+        upload_params_list: typing.List[typing.Dict[str, typing.Any]] = [
+            {
+                "package_dir_info": package_dir_info,
+                "artifact_meta_info": artifact_meta_info,
+                "pack_result": package_tmp_path__pack_result_map[pack_params["package_tmp_path"]],
+            }
+            for package_dir_info, pack_params in zip(package_dir_infos, pack_params_list)
+        ]
+        upload_results = concurrent.batch_call(
+            self.upload_package, upload_params_list, get_data=lambda result: (result["pkg_path"], result)
+        )
+        pkg_path__upload_result_map: typing.Dict[str, typing.Dict[str, typing.Any]] = dict(upload_results)
+        return [
+            pkg_path__upload_result_map[
+                os.path.join(
+                    self.download_path, self.BASE_STORAGE_DIR, package_dir_info["os"], package_dir_info["cpu_arch"]
+                )
+            ]
+            for package_dir_info in package_dir_infos
+        ]
+
     def apply_tmp_dir(self) -> str:
         """
         创建临时目录并返回路径
@@ -564,16 +664,20 @@ class BaseArtifactBuilder(abc.ABC):
         extract_dir, package_dir_infos = self.list_package_dir_infos()
         artifact_meta_info: typing.Dict[str, typing.Any] = self.get_artifact_meta_info(extract_dir)
 
+        selected_package_dir_infos: typing.List[typing.Dict] = []
         for package_dir_info in package_dir_infos:
             if not (
                 select_pkg_relative_paths is None or package_dir_info["pkg_relative_path"] in select_pkg_relative_paths
             ):
                 logger.info("path -> {path} not selected, jump it".format(path=package_dir_info["pkg_relative_path"]))
                 continue
+            selected_package_dir_infos.append(package_dir_info)
 
-            package_upload_info: typing.Dict[str, typing.Any] = self.make_and_upload_package(
-                package_dir_info, artifact_meta_info
-            )
+        # 各架构的安装包相互独立，并行打包及上传
+        package_upload_infos: typing.List[typing.Dict[str, typing.Any]] = self.make_and_upload_packages(
+            selected_package_dir_infos, artifact_meta_info
+        )
+        for package_dir_info, package_upload_info in zip(selected_package_dir_infos, package_upload_infos):
             package_infos.append(
                 {
                     "artifact_meta_info": artifact_meta_info,
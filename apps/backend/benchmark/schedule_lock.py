@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+Pipeline 调度锁争用基准测试：多个 worker 争用同一调度锁，对比加锁失败后轮询重试与 Redis 租约锁释放唤醒的等待耗时
+用法：python manage.py shell -c "from apps.backend.benchmark import schedule_lock; schedule_lock.main()"
+"""
+import threading
+import time
+import typing
+
+from pipeline.engine.core.data.lock import RedisLeaseScheduleLock
+
+SCHEDULE_ID = "benchmark"
+
+
+def get_redis_inst(redis_inst=None):
+    if redis_inst is not None:
+        return redis_inst
+    import fakeredis
+
+    return fakeredis.FakeStrictRedis()
+
+
+def bench(
+    lock: RedisLeaseScheduleLock,
+    acquire_func: typing.Callable[[], typing.Optional[int]],
+    worker_num: int,
+    rounds: int,
+    hold_ms: float,
+) -> typing.Dict[str, float]:
+    wait_costs: typing.List[float] = []
+    wait_costs_lock = threading.Lock()
+
+    def work():
+        for __ in range(rounds):
+            begin = time.time()
+            token = acquire_func()
+            while token is None:
+                token = acquire_func()
+            with wait_costs_lock:
+                wait_costs.append(time.time() - begin)
+            # 模拟调度耗时
+            time.sleep(hold_ms / 1000)
+            lock.release(SCHEDULE_ID, token)
+
+    begin = time.time()
+    workers = [threading.Thread(target=work) for __ in range(worker_num)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wait_costs.sort()
+    return {
+        "total_s": time.time() - begin,
+        "p50_ms": wait_costs[len(wait_costs) // 2] * 1000,
+        "p99_ms": wait_costs[int(len(wait_costs) * 0.99)] * 1000,
+    }
+
+
+def main(worker_num: int = 8, rounds: int = 10, hold_ms: float = 20, retry_interval: float = 0.2, redis_inst=None):
+    """
+    :param worker_num: 争用同一调度锁的 worker 数
+    :param rounds: 每个 worker 加锁次数
+    :param hold_ms: 每次持有锁的毫秒数
+    :param retry_interval: 轮询模式下加锁失败后的重试间隔（秒），对应调度加锁失败后延迟重新投递
+    :param redis_inst: Redis 客户端，为空时使用 fakeredis
+    """
+    redis_inst = get_redis_inst(redis_inst)
+    lock = RedisLeaseScheduleLock(redis_inst=redis_inst, lease=60, wait_timeout=5)
+    redis_inst.delete(*[key.format(SCHEDULE_ID) for key in [lock.LOCK_KEY, lock.FENCE_KEY, lock.WAKE_KEY]])
+
+    def poll_acquire() -> typing.Optional[int]:
+        token = lock.try_acquire(SCHEDULE_ID)
+        if token is None:
+            time.sleep(retry_interval)
+        return token
+
+    for name, acquire_func in [("poll", poll_acquire), ("wake", lambda: lock.acquire(SCHEDULE_ID))]:
+        result = bench(lock, acquire_func, worker_num, rounds, hold_ms)
+        print(
+            f"{name}: total -> {result['total_s']:.2f}s, "
+            f"wait p50 -> {result['p50_ms']:.1f}ms, wait p99 -> {result['p99_ms']:.1f}ms"
+        )
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+Pipeline 调度状态持久化基准测试：对比每轮调度全量序列化与增量序列化的写入字节数及 CPU 耗时
+用法：python manage.py shell -c "from apps.backend.benchmark import schedule_state; schedule_state.main()"
+"""
+import pickle
+import time
+import typing
+import zlib
+
+from pipeline.core.data.base import DataObject
+from pipeline.core.flow.activity import ServiceActivity
+from pipeline.engine.models.delta import StateDelta
+from pipeline.utils.uniqid import uniqid
+
+POLLING_INTERVAL = 5
+COMPRESS_LEVEL = 6
+
+
+class MockInstallService:
+    """模拟安装类原子，调度过程中记录失败原因"""
+
+    def __init__(self, subscription_instance_ids: typing.List[int]):
+        self.failed_subscription_instance_id_reason_map: typing.Dict[int, str] = {}
+        self.sub_inst_id__host_info_map: typing.Dict[int, typing.Dict[str, typing.Any]] = {
+            sub_inst_id: {"bk_host_id": sub_inst_id, "inner_ip": f"127.0.{sub_inst_id // 256}.{sub_inst_id % 256}"}
+            for sub_inst_id in subscription_instance_ids
+        }
+
+
+def make_service_act(host_num: int) -> ServiceActivity:
+    subscription_instance_ids = list(range(host_num))
+    data = DataObject(
+        inputs={
+            "subscription_instance_ids": subscription_instance_ids,
+            "succeeded_subscription_instance_ids": subscription_instance_ids,
+            "act_name": "安装",
+            "subscription_step_id": 1,
+            "meta": {"GSE_VERSION": "V2"},
+        },
+        outputs={"polling_time": 0, "scheduling_sub_inst_ids": subscription_instance_ids},
+    )
+    return ServiceActivity(id=uniqid(), service=MockInstallService(subscription_instance_ids), data=data).shell()
+
+
+def schedule(service_act: ServiceActivity, round_num: int):
+    """模拟一轮调度：更新轮询时间，部分实例完成或失败"""
+    outputs = service_act.data.outputs
+    outputs.polling_time += POLLING_INTERVAL
+    finished_num = len(outputs.scheduling_sub_inst_ids) // 10
+    outputs.scheduling_sub_inst_ids = outputs.scheduling_sub_inst_ids[finished_num:]
+    if round_num % 3 == 0:
+        service_act.service.failed_subscription_instance_id_reason_map[round_num] = "timeout"
+
+
+def dumps(value: typing.Any) -> bytes:
+    # 与 IOField 的序列化方式保持一致
+    return zlib.compress(pickle.dumps(value), COMPRESS_LEVEL)
+
+
+def bench_full(host_num: int, rounds: int) -> typing.Dict[str, float]:
+    service_act = make_service_act(host_num)
+    written_bytes = len(dumps(service_act))
+    begin = time.process_time()
+    for round_num in range(rounds):
+        schedule(service_act, round_num)
+        written_bytes += len(dumps(service_act))
+    return {"cpu_ms": (time.process_time() - begin) * 1000 / rounds, "bytes": written_bytes / (rounds + 1)}
+
+
+def bench_delta(host_num: int, rounds: int) -> typing.Dict[str, float]:
+    service_act = make_service_act(host_num)
+    delta = StateDelta.make_base(service_act)
+    written_bytes = len(dumps(service_act)) + len(dumps(delta))
+    begin = time.process_time()
+    for round_num in range(rounds):
+        schedule(service_act, round_num)
+        new_delta = delta.diff(service_act)
+        if new_delta is None:
+            delta = StateDelta.make_base(service_act)
+            written_bytes += len(dumps(service_act)) + len(dumps(delta))
+        else:
+            written_bytes += len(dumps(new_delta))
+    return {"cpu_ms": (time.process_time() - begin) * 1000 / rounds, "bytes": written_bytes / (rounds + 1)}
+
+
+def main(host_num: int = 5000, rounds: int = 20):
+    """
+    :param host_num: 流程主机数
+    :param rounds: 调度轮数
+    """
+    for name, bench_func in [("full", bench_full), ("delta", bench_delta)]:
+        result = bench_func(host_num, rounds)
+        print(
+            f"{name}: avg bytes written per round -> {int(result['bytes'])}, cpu per round -> {result['cpu_ms']:.2f}ms"
+        )
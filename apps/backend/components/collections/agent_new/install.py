@@ -16,7 +16,7 @@ import random
 import socket
 import time
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from django.conf import settings
 from django.utils import timezone, translation
@@ -27,19 +27,24 @@ from apps.backend.agent import solution_maker
 from apps.backend.agent.tools import InstallationTools
 from apps.backend.api.constants import POLLING_INTERVAL, POLLING_TIMEOUT
 from apps.backend.constants import (
+    INSTALL_CALLBACK_DRAIN_BATCH_SIZE,
+    INSTALL_CALLBACK_FULL_DRAIN_POLLS,
     REDIS_AGENT_CONF_KEY_TPL,
     REDIS_INSTALL_CALLBACK_KEY_TPL,
+    REDIS_INSTALL_CALLBACK_NOTIFY_KEY_TPL,
     SSH_RUN_TIMEOUT,
 )
 from apps.backend.subscription.steps.agent_adapter.adapter import AgentStepAdapter
 from apps.backend.utils.redis import REDIS_INST
 from apps.backend.utils.wmi import execute_cmd, put_file
 from apps.core.concurrent import controller
-from apps.core.remote import conns
+from apps.core.remote import conns, core_remote_exceptions
+from apps.core.remote.clients import file as remote_file
 from apps.exceptions import AuthOverdueException
 from apps.node_man import constants, models
 from apps.utils import concurrent, exc, sync
 from common.api import JobApi
+from common.log import logger
 from pipeline.core.flow import Service, StaticIntervalGenerator
 
 from .. import core
@@ -47,13 +52,45 @@ from ..base import LogLevel
 from ..common import remote
 from . import base
 
+# 仅连接层异常视为接入点 / 管控区域链路异常并退避，认证失败、命令执行失败等单机异常不影响分组并发
+SSH_BACKOFF_EXC_TYPES = (
+    core_remote_exceptions.ConnectTimeoutError,
+    core_remote_exceptions.DisconnectError,
+    core_remote_exceptions.ConnectionLostError,
+    OSError,
+)
+
+
+def shell_solution_exc_handler(
+    wrapped: Callable, instance: base.AgentBaseService, args: Tuple[Any], kwargs: Dict[str, Any], exc: Exception
+) -> Exception:
+    """
+    Shell 方案执行异常处理：将订阅实例置为失败，并返回异常，供有界并发协程执行器判断是否需要退避
+    :return: 捕获到的异常
+    """
+    core.default_sub_inst_task_exc_handler(wrapped, instance, args, kwargs, exc)
+    return exc
+
 
 class InstallSubInstObj(remote.RemoteConnHelper):
     installation_tool: InstallationTools = None
 
-    def __init__(self, sub_inst_id: int, host: models.Host, installation_tool: InstallationTools):
+    def __init__(
+        self,
+        sub_inst_id: int,
+        host: models.Host,
+        installation_tool: InstallationTools,
+        conn_pool: Optional[conns.AsyncsshConnPool] = None,
+    ):
         self.installation_tool = installation_tool
-        super().__init__(sub_inst_id=sub_inst_id, host=host, identity_data=installation_tool.identity_data)
+        super().__init__(
+            sub_inst_id=sub_inst_id, host=host, identity_data=installation_tool.identity_data, conn_pool=conn_pool
+        )
+
+    @property
+    def conn_pool_group(self) -> Optional[int]:
+        # 优先使用注入的接入点
+        return self.installation_tool.ap.id
 
 
 class InstallService(base.AgentBaseService, remote.RemoteServiceMixin):
@@ -186,7 +223,30 @@ class InstallService(base.AgentBaseService, remote.RemoteServiceMixin):
             }
             for install_sub_inst_obj in install_sub_inst_objs
         ]
-        return concurrent.batch_call_coroutine(func=self.execute_shell_solution_async, params_list=params_list)
+        executor: Optional[concurrent.CoroutineExecutor] = None
+        if settings.SSH_COROUTINE_EXECUTOR_ENABLED:
+            executor = concurrent.CoroutineExecutor(
+                limit=settings.SSH_CONCURRENT_LIMIT,
+                key_limits=[
+                    concurrent.KeyLimit(
+                        get_key=lambda params: params["install_sub_inst_obj"].installation_tool.ap.id,
+                        limit=settings.SSH_CONCURRENT_LIMIT_PER_AP,
+                    ),
+                    concurrent.KeyLimit(
+                        get_key=lambda params: params["install_sub_inst_obj"].host.bk_cloud_id,
+                        limit=settings.SSH_CONCURRENT_LIMIT_PER_CLOUD,
+                    ),
+                ],
+                should_backoff=lambda result: isinstance(result, SSH_BACKOFF_EXC_TYPES),
+            )
+        results = concurrent.batch_call_coroutine(
+            func=self.execute_shell_solution_async,
+            params_list=params_list,
+            executor=executor,
+            loop=remote.get_conn_pool_loop(install_sub_inst_objs),
+        )
+        # 执行异常的订阅实例已由异常处理器置为失败，仅返回执行成功的订阅实例ID
+        return [result for result in results if not isinstance(result, Exception)]
 
     def _execute(self, data, parent_data, common_data: base.AgentCommonData):
         host_id__sub_inst_id = {
@@ -269,18 +329,33 @@ class InstallService(base.AgentBaseService, remote.RemoteServiceMixin):
                 pipeline.expire(cache_key, POLLING_TIMEOUT + random.randint(POLLING_TIMEOUT, 2 * POLLING_TIMEOUT))
             pipeline.execute()
 
-        remote_conn_helpers_gby_result_type = self.bulk_check_ssh(remote_conn_helpers=lan_windows_sub_inst)
+        # Windows 主机先检测 SSH 通道再通过 SSH 安装，连接池使两次连接复用同一已认证的连接
+        # 连接池仅在本次执行内有效，且依赖协程执行器单批次执行（连接绑定在连接池的事件循环上）
+        conn_pool: Optional[conns.AsyncsshConnPool] = None
+        if settings.SSH_CONN_POOL_ENABLED and settings.SSH_COROUTINE_EXECUTOR_ENABLED and lan_windows_sub_inst:
+            conn_pool = conns.AsyncsshConnPool(
+                limit_per_group=settings.SSH_CONN_POOL_LIMIT_PER_AP,
+                max_idle_time=settings.SSH_CONN_POOL_MAX_IDLE_TIME,
+            )
+            for install_sub_inst_obj in lan_windows_sub_inst:
+                install_sub_inst_obj.conn_pool = conn_pool
+
+        try:
+            remote_conn_helpers_gby_result_type = self.bulk_check_ssh(remote_conn_helpers=lan_windows_sub_inst)
 
-        succeed_non_lan_inst_ids = self.handle_non_lan_inst(install_sub_inst_objs=non_lan_sub_inst)
-        succeed_lan_windows_sub_inst_ids = self.handle_lan_windows_sub_inst(
-            install_sub_inst_objs=remote_conn_helpers_gby_result_type.get(
-                remote.SshCheckResultType.UNAVAILABLE.value, []
+            succeed_non_lan_inst_ids = self.handle_non_lan_inst(install_sub_inst_objs=non_lan_sub_inst)
+            succeed_lan_windows_sub_inst_ids = self.handle_lan_windows_sub_inst(
+                install_sub_inst_objs=remote_conn_helpers_gby_result_type.get(
+                    remote.SshCheckResultType.UNAVAILABLE.value, []
+                )
             )
-        )
-        succeed_lan_shell_sub_inst_ids = self.handle_lan_shell_sub_inst(
-            install_sub_inst_objs=lan_linux_sub_inst
-            + remote_conn_helpers_gby_result_type.get(remote.SshCheckResultType.AVAILABLE.value, [])
-        )
+            succeed_lan_shell_sub_inst_ids = self.handle_lan_shell_sub_inst(
+                install_sub_inst_objs=lan_linux_sub_inst
+                + remote_conn_helpers_gby_result_type.get(remote.SshCheckResultType.AVAILABLE.value, [])
+            )
+        finally:
+            if conn_pool is not None:
+                conn_pool.close()
         # 使用 filter 移除并发过程中抛出异常的实例
         data.outputs.scheduling_sub_inst_ids = list(
             filter(
@@ -481,7 +556,7 @@ class InstallService(base.AgentBaseService, remote.RemoteServiceMixin):
         host.save(update_fields=["upstream_nodes"])
         return sub_inst_id
 
-    @exc.ExceptionHandler(exc_handler=core.default_sub_inst_task_exc_handler)
+    @exc.ExceptionHandler(exc_handler=shell_solution_exc_handler)
     async def execute_shell_solution_async(
         self, meta: Dict[str, Any], sub_inst_id: int, install_sub_inst_obj: InstallSubInstObj
     ) -> int:
@@ -527,7 +602,18 @@ class InstallService(base.AgentBaseService, remote.RemoteServiceMixin):
                                 dest_dir=dest_dir, filenames_str="\n".join(localpaths)
                             ),
                         )
-                        await file_client.put(localpaths=localpaths, remotepath=installation_tool.dest_dir)
+                        if settings.SSH_DEPENDENCY_CHECKSUM_ENABLED:
+                            await self.push_dependencies_async(
+                                sub_inst_id=sub_inst_id,
+                                conn=conn,
+                                file_client=file_client,
+                                contents=execution_solution_step.contents,
+                                localpaths=localpaths,
+                                dest_dir=dest_dir,
+                                remotepath=installation_tool.dest_dir,
+                            )
+                        else:
+                            await file_client.put(localpaths=localpaths, remotepath=installation_tool.dest_dir)
 
                 elif execution_solution_step.type == constants.CommonExecutionSolutionStepType.COMMANDS.value:
                     for content in execution_solution_step.contents:
@@ -537,16 +623,123 @@ class InstallService(base.AgentBaseService, remote.RemoteServiceMixin):
 
         return sub_inst_id
 
-    def handle_report_data(self, sub_inst_id: int, success_callback_step: str) -> Dict:
+    async def push_dependencies_async(
+        self,
+        sub_inst_id: int,
+        conn: conns.AsyncsshConn,
+        file_client: remote_file.AsyncSFTPClient,
+        contents: List[solution_maker.ExecutionSolutionStepContent],
+        localpaths: List[str],
+        dest_dir: str,
+        remotepath: str,
+    ):
+        """
+        推送依赖文件，推送前批量比对远程文件的大小及 md5：已一致的文件跳过，中断的部分上传从断点续传
+        :param sub_inst_id: 订阅实例ID
+        :param conn: SSH 连接
+        :param file_client: 文件客户端
+        :param contents: 依赖文件步骤内容
+        :param localpaths: 本地文件路径列表，与 contents 一一对应
+        :param dest_dir: 远程目录（shell 路径）
+        :param remotepath: 远程目录（SFTP 路径）
+        :return:
+        """
+        filenames: List[str] = [content.name for content in contents]
+        try:
+            run_output: conns.RunOutput = await conn.run(
+                command=remote_file.build_remote_checksum_cmd(dest_dir, filenames), timeout=SSH_RUN_TIMEOUT
+            )
+            filename__checksum_map: Dict[str, Tuple[int, str]] = remote_file.parse_remote_checksums(run_output.stdout)
+        except Exception as e:
+            # 比对失败不影响安装，全量推送
+            logger.info(f"[push_dependencies_async] sub_inst_id -> {sub_inst_id}, get remote checksums failed: {e}")
+            filename__checksum_map = {}
+
+        full_push_localpaths: List[str] = []
+        skipped_bytes: int = 0
+        skipped_filenames: List[str] = []
+        for content, localpath in zip(contents, localpaths):
+            offset: int = 0
+            if not content.always_download:
+                offset = remote_file.get_push_offset(localpath, filename__checksum_map.get(content.name))
+            if offset == 0:
+                full_push_localpaths.append(localpath)
+                continue
+            skipped_bytes += offset
+            if offset == os.path.getsize(localpath):
+                skipped_filenames.append(content.name)
+            else:
+                await file_client.resume_put(localpath=localpath, remotepath=f"{dest_dir}{content.name}", offset=offset)
+
+        if full_push_localpaths:
+            await file_client.put(localpaths=full_push_localpaths, remotepath=remotepath)
+        await sync.sync_to_async(self.log_info)(
+            sub_inst_ids=sub_inst_id,
+            log_content=_("远程已存在且校验一致的文件：{filenames_str}，跳过推送 {skipped_bytes} 字节").format(
+                filenames_str=", ".join(skipped_filenames) or "-", skipped_bytes=skipped_bytes
+            ),
+        )
+
+    @staticmethod
+    def bulk_drain_report_data(sub_inst_ids: List[int]) -> Dict[int, List[bytes]]:
+        """
+        批量取出订阅实例的上报数据
+        :param sub_inst_ids: 订阅实例ID列表
+        :return: 订阅实例ID - 上报数据（按上报顺序） 映射
+        """
+        sub_inst_id__report_data_map: Dict[int, List[bytes]] = {}
+        # 各列表键不在同一 slot，使用非事务 pipeline 逐键读取，集群模式下 pipeline 按 slot 将命令分发到对应节点
+        for begin in range(0, len(sub_inst_ids), INSTALL_CALLBACK_DRAIN_BATCH_SIZE):
+            batch_sub_inst_ids: List[int] = sub_inst_ids[begin : begin + INSTALL_CALLBACK_DRAIN_BATCH_SIZE]
+            names: List[str] = [
+                REDIS_INSTALL_CALLBACK_KEY_TPL.format(sub_inst_id=sub_inst_id) for sub_inst_id in batch_sub_inst_ids
+            ]
+            # 先计算出要从redis取数据的长度
+            with REDIS_INST.pipeline(transaction=False) as pipeline:
+                for name in names:
+                    pipeline.llen(name)
+                report_data_lens: List[int] = pipeline.execute()
+
+            # 从redis中取出对应长度的数据，后使用ltrim保留剩下的，可以保证report_log中新push的值不会丢失
+            draining_sub_inst_ids: List[int] = []
+            with REDIS_INST.pipeline(transaction=False) as pipeline:
+                for sub_inst_id, name, report_data_len in zip(batch_sub_inst_ids, names, report_data_lens):
+                    sub_inst_id__report_data_map[sub_inst_id] = []
+                    if not report_data_len:
+                        continue
+                    draining_sub_inst_ids.append(sub_inst_id)
+                    pipeline.lrange(name, -report_data_len, -1)
+                    pipeline.ltrim(name, 0, -report_data_len - 1)
+                results: List[Any] = pipeline.execute() if draining_sub_inst_ids else []
+
+            for sub_inst_id, report_data in zip(draining_sub_inst_ids, results[::2]):
+                # 日志通过 lpush 写入，倒序后即为上报顺序
+                report_data.reverse()
+                sub_inst_id__report_data_map[sub_inst_id] = report_data
+        return sub_inst_id__report_data_map
+
+    def pop_notified_sub_inst_ids(self, scheduling_sub_inst_ids: Set[int], polling_time: int) -> Optional[Set[int]]:
+        """
+        取出有新上报日志的订阅实例
+        :param scheduling_sub_inst_ids: 调度中的订阅实例ID
+        :param polling_time: 已轮询时间
+        :return: 有新上报日志的订阅实例ID，None 表示需全量检查
+        """
+        if not models.GlobalSettings.get_config(
+            key=models.GlobalSettings.KeyEnum.ENABLE_INSTALL_CALLBACK_NOTIFY.value, default=False
+        ):
+            return None
+
+        notified_sub_inst_ids: List[bytes] = REDIS_INST.spop(
+            REDIS_INSTALL_CALLBACK_NOTIFY_KEY_TPL.format(node_id=self.id), count=max(len(scheduling_sub_inst_ids), 1)
+        )
+        # 周期性全量检查，兜底未经 report_log 写入的日志（例如执行阶段写入的作业提示）
+        if (polling_time // POLLING_INTERVAL) % INSTALL_CALLBACK_FULL_DRAIN_POLLS == 0:
+            return None
+        return {int(sub_inst_id) for sub_inst_id in notified_sub_inst_ids} & scheduling_sub_inst_ids
+
+    def handle_report_data(self, sub_inst_id: int, success_callback_step: str, report_data: List[bytes]) -> Dict:
         """处理上报数据"""
-        name = REDIS_INSTALL_CALLBACK_KEY_TPL.format(sub_inst_id=sub_inst_id)
-        # 先计算出要从redis取数据的长度
-        report_data_len = REDIS_INST.llen(name)
-        # 从redis中取出对应长度的数据
-        report_data = REDIS_INST.lrange(name, -report_data_len, -1)
-        # 后使用ltrim保留剩下的，可以保证report_log中新push的值不会丢失
-        REDIS_INST.ltrim(name, 0, -report_data_len - 1)
-        report_data.reverse()
         cpu_arch = None
         os_version = None
         agent_id = None
@@ -622,26 +815,44 @@ class InstallService(base.AgentBaseService, remote.RemoteServiceMixin):
 
     def _schedule(self, data, parent_data, callback_data=None):
         """通过轮询redis的方式来处理，避免使用callback的方式频繁调用schedule"""
-        common_data = self.get_common_data(data)
-        success_callback_step = data.get_one_of_inputs("success_callback_step")
         # 与上一轮次的订阅实例ID取交集，确保本轮次需执行的订阅实例ID已排除手动终止的情况
-        scheduling_sub_inst_ids = (
-            set(data.get_one_of_outputs("scheduling_sub_inst_ids", [])) & common_data.subscription_instance_ids
+        # 需在跳过本轮次前完成，否则已终止的实例会一直处于调度中，并在超时后被再次置为失败
+        scheduling_sub_inst_ids: Set[int] = set(data.get_one_of_outputs("scheduling_sub_inst_ids", [])) & set(
+            self.get_subscription_instance_ids(data)
         )
         if not scheduling_sub_inst_ids:
             self.finish_schedule()
             return
 
-        params_list = [
-            {"sub_inst_id": sub_inst_id, "success_callback_step": success_callback_step}
-            for sub_inst_id in scheduling_sub_inst_ids
-        ]
+        notified_sub_inst_ids: Optional[Set[int]] = self.pop_notified_sub_inst_ids(
+            scheduling_sub_inst_ids, data.get_one_of_outputs("polling_time")
+        )
+        if notified_sub_inst_ids is not None and not notified_sub_inst_ids:
+            # 本轮次没有新上报的日志，仅推进轮询时间
+            return self.update_scheduling_state(data, list(scheduling_sub_inst_ids))
+
+        common_data = self.get_common_data(data)
+        success_callback_step = data.get_one_of_inputs("success_callback_step")
+
+        draining_sub_inst_ids: Set[int] = (
+            scheduling_sub_inst_ids
+            if notified_sub_inst_ids is None
+            else scheduling_sub_inst_ids & notified_sub_inst_ids
+        )
+        sub_inst_id__report_data_map: Dict[int, List[bytes]] = self.bulk_drain_report_data(
+            sorted(draining_sub_inst_ids)
+        )
         host_id__sub_inst_map: Dict[int, models.SubscriptionInstanceRecord] = {
             common_data.sub_inst_id__host_id_map[sub_inst.id]: sub_inst
             for sub_inst in common_data.subscription_instances
         }
+        params_list = [
+            {"sub_inst_id": sub_inst_id, "success_callback_step": success_callback_step, "report_data": report_data}
+            for sub_inst_id, report_data in sub_inst_id__report_data_map.items()
+        ]
         results = concurrent.batch_call(func=self.handle_report_data, params_list=params_list)
-        left_scheduling_sub_inst_ids = []
+        # 本轮次未检查的实例，留到下一次schedule中继续检查
+        left_scheduling_sub_inst_ids = list(scheduling_sub_inst_ids - draining_sub_inst_ids)
         cpu_arch__host_id_map = defaultdict(list)
         os_version__host_id_map = defaultdict(list)
         host_id__agent_id_map: Dict[int, str] = {}
@@ -685,6 +896,15 @@ class InstallService(base.AgentBaseService, remote.RemoteServiceMixin):
                 report_agent_id_sub_insts, fields=["instance_info", "update_time"], batch_size=self.batch_size
             )
 
+        return self.update_scheduling_state(data, left_scheduling_sub_inst_ids)
+
+    def update_scheduling_state(self, data, left_scheduling_sub_inst_ids: List[int]):
+        """
+        更新调度状态：记录剩余调度中的实例，并推进轮询时间
+        :param data:
+        :param left_scheduling_sub_inst_ids: 剩余调度中的订阅实例ID
+        :return:
+        """
         data.outputs.scheduling_sub_inst_ids = left_scheduling_sub_inst_ids
         if not left_scheduling_sub_inst_ids:
             self.finish_schedule()
@@ -11,6 +11,7 @@ specific language governing permissions and limitations under the License.
 import os
 import traceback
 import typing
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import (
     Any,
@@ -26,13 +27,12 @@ from typing import (
 )
 
 from django.conf import settings
-from django.db.models import Value
-from django.db.models.functions import Concat
 from django.utils import timezone
 from django.utils.translation import ugettext as _
 
 from apps.adapters.api.gse import GseApiBaseHelper, get_gse_api_helper
 from apps.backend.subscription import errors
+from apps.backend.subscription.statistic import SubscriptionStatisticSnapshot
 from apps.core.files.storage import get_storage
 from apps.node_man import constants, models
 from apps.utils import cache, time_handler, translation
@@ -120,9 +120,87 @@ class LogMixin:
     # 日志类
     log_maker_class: Type[LogMaker] = LogMaker
 
+    # 日志缓冲区，元素为 (订阅实例ID, 日志等级, 日志内容)，订阅实例ID 为 None 时表示当前原子下的全部订阅实例
+    _log_buffer: Optional[List[Tuple[Union[int, Iterable[int], None], str, str]]] = None
+
     def get_log_maker(self):
         return self.log_maker_class()
 
+    @contextmanager
+    def buffered_logs(self):
+        """
+        缓冲原子执行期间的日志，退出时批量写入
+        日志仅追加写入 SubscriptionInstanceLog，不再对 SubscriptionInstanceStatusDetail.log 进行拼接更新，
+        避免大批量实例下反复重写日志字段及长时间持有行锁
+        """
+        if self._log_buffer is not None:
+            # 已处于缓冲中，由外层统一写入
+            yield
+            return
+
+        self._log_buffer = []
+        try:
+            yield
+        finally:
+            log_buffer, self._log_buffer = self._log_buffer, None
+            self.bulk_append_logs(log_buffer)
+
+    def bulk_append_logs(self, logs: List[Tuple[Union[int, Iterable[int], None], str, str]]):
+        """
+        批量写入日志
+        :param logs: (订阅实例ID, 日志等级, 日志内容) 列表
+        :return:
+        """
+        if not logs:
+            return
+
+        node_sub_inst_ids: Optional[List[int]] = None
+        to_be_created_logs: List[models.SubscriptionInstanceLog] = []
+        for sub_inst_ids, level_name, log_content in logs:
+            if sub_inst_ids is None:
+                # 未指定订阅实例，记录到当前原子下的全部订阅实例
+                if node_sub_inst_ids is None:
+                    node_sub_inst_ids = list(
+                        models.SubscriptionInstanceStatusDetail.objects.filter(node_id=self.id).values_list(
+                            "subscription_instance_record_id", flat=True
+                        )
+                    )
+                sub_inst_ids = node_sub_inst_ids
+            elif isinstance(sub_inst_ids, int):
+                sub_inst_ids = [sub_inst_ids]
+
+            to_be_created_logs.extend(
+                models.SubscriptionInstanceLog(
+                    subscription_instance_record_id=sub_inst_id,
+                    node_id=self.id,
+                    log=log_content,
+                    level_name=level_name,
+                )
+                for sub_inst_id in sub_inst_ids
+            )
+
+        models.SubscriptionInstanceLog.objects.bulk_create(
+            to_be_created_logs, batch_size=constants.SUBSCRIPTION_INSTANCE_LOG_BATCH_SIZE
+        )
+
+    def append_log(self, sub_inst_ids: Union[int, Iterable[int], None], log_content: str, level: int = LogLevel.INFO):
+        """
+        追加日志，处于缓冲中时暂存，否则直接写入
+        :param sub_inst_ids: 订阅实例ID
+        :param log_content: 已格式化的日志内容
+        :param level: 日志等级
+        :return:
+        """
+        level_name: str = LogLevel.LEVEL_PREFIX_MAP.get(level, LogLevel.LEVEL_PREFIX_MAP[LogLevel.INFO])
+        # 迭代器只能消费一次，需在缓冲前固化
+        if sub_inst_ids is not None and not isinstance(sub_inst_ids, int):
+            sub_inst_ids = list(sub_inst_ids)
+
+        if self._log_buffer is not None:
+            self._log_buffer.append((sub_inst_ids, level_name, log_content))
+        else:
+            self.bulk_append_logs([(sub_inst_ids, level_name, log_content)])
+
     def log_base(
         self, sub_inst_ids: Union[int, List[int], None] = None, log_content: str = None, level: int = LogLevel.INFO
     ):
@@ -133,18 +211,7 @@ class LogMixin:
         :param level:
         :return:
         """
-        filters = {"node_id": self.id}
-        if sub_inst_ids is None:
-            pass
-        elif isinstance(sub_inst_ids, int):
-            filters["subscription_instance_record_id"] = sub_inst_ids
-        else:
-            filters["subscription_instance_record_id__in"] = sub_inst_ids
-
-        models.SubscriptionInstanceStatusDetail.objects.filter(**filters).update(
-            log=Concat("log", Value(f"\n{self.log_maker.get_log_content(level, log_content)}")),
-            update_time=timezone.now(),
-        )
+        self.append_log(sub_inst_ids, self.log_maker.get_log_content(level, log_content), level=level)
 
     def log_info(self, sub_inst_ids: Union[int, Iterable[int], None] = None, log_content: str = None):
         self.log_base(sub_inst_ids, log_content, level=LogLevel.INFO)
@@ -252,36 +319,65 @@ class BaseService(Service, LogMixin, DBHelperMixin):
         """
         raise NotImplementedError()
 
-    def bulk_set_sub_inst_status(self, status: str, sub_inst_ids: Union[List[int], Set[int]]):
-        """批量设置实例状态，对于实例及原子的状态更新只应该在base内部使用"""
+    def bulk_set_sub_inst_status(
+        self, status: str, sub_inst_ids: Union[List[int], Set[int]], subscription_id: Optional[int] = None
+    ):
+        """
+        批量设置实例状态，对于实例及原子的状态更新只应该在base内部使用
+        :param status: 状态
+        :param sub_inst_ids: 订阅实例ID列表/集合
+        :param subscription_id: 订阅ID，同一批实例源于同一订阅，为空时按实例查询
+        """
         models.SubscriptionInstanceRecord.objects.filter(id__in=sub_inst_ids).update(
             status=status, update_time=timezone.now()
         )
+        # 实例状态变更，标记订阅统计快照待刷新
+        if sub_inst_ids and models.GlobalSettings.get_config(
+            key=models.GlobalSettings.KeyEnum.ENABLE_SUBSCRIPTION_STATISTIC_SNAPSHOT.value, default=False
+        ):
+            subscription_ids: List[int] = (
+                [subscription_id]
+                if subscription_id
+                else list(
+                    models.SubscriptionInstanceRecord.objects.filter(id__in=sub_inst_ids)
+                    .values_list("subscription_id", flat=True)
+                    .distinct()
+                )
+            )
+            SubscriptionStatisticSnapshot.mark_dirty(subscription_ids)
         if status in [constants.JobStatusType.FAILED]:
             self.sub_inst_failed_handler(sub_inst_ids)
 
     def bulk_set_sub_inst_act_status(
-        self, sub_inst_ids: Union[List[int], Set[int]], status: str, common_log: str = None
+        self,
+        sub_inst_ids: Union[List[int], Set[int]],
+        status: str,
+        common_log: str = None,
+        subscription_id: Optional[int] = None,
     ):
         """
         批量设置实例状态
         :param sub_inst_ids:
         :param status:
         :param common_log: 全局日志，用于需要全局暴露的异常
+        :param subscription_id: 订阅ID
         :return:
         """
         if not sub_inst_ids:
             return
-        update_fields = {"status": status}
-        if common_log:
-            update_fields["log"] = Concat("log", Value(f"\n{common_log}"))
         models.SubscriptionInstanceStatusDetail.objects.filter(
             subscription_instance_record_id__in=sub_inst_ids, node_id=self.id
-        ).update(**{**update_fields, "update_time": timezone.now()})
+        ).update(status=status, update_time=timezone.now())
+        if common_log:
+            self.append_log(
+                sub_inst_ids,
+                common_log,
+                level=(LogLevel.ERROR if status == constants.JobStatusType.FAILED else LogLevel.INFO),
+            )
 
         # 失败的实例需要更新汇总状态
         if status in [constants.JobStatusType.FAILED]:
-            self.bulk_set_sub_inst_status(constants.JobStatusType.FAILED, sub_inst_ids)
+            self.bulk_set_sub_inst_status(constants.JobStatusType.FAILED, sub_inst_ids, subscription_id=subscription_id)
 
     @staticmethod
     def get_subscription_instance_ids(data):
@@ -365,11 +461,17 @@ class BaseService(Service, LogMixin, DBHelperMixin):
         subscription_instance_ids = BaseService.get_subscription_instance_ids(data)
         act_name = data.get_one_of_inputs("act_name")
         act_type = data.get_one_of_inputs("act_type")
+        # 调度阶段不初始化常用数据，订阅ID为空时按实例查询
+        common_data: Optional[CommonData] = kwargs.get("common_data")
+        subscription_id: Optional[int] = common_data.subscription.id if common_data else None
         # 流程起始设置RUNNING
         if service_func == self._execute and act_type in [ActivityType.HEAD, ActivityType.HEAD_TAIL]:
-            self.bulk_set_sub_inst_status(constants.JobStatusType.RUNNING, subscription_instance_ids)
+            self.bulk_set_sub_inst_status(
+                constants.JobStatusType.RUNNING, subscription_instance_ids, subscription_id=subscription_id
+            )
 
-        service_func(data, parent_data, **kwargs)
+        with self.buffered_logs():
+            service_func(data, parent_data, **kwargs)
 
         failed_subscription_instance_id_set = set(self.failed_subscription_instance_id_reason_map.keys())
         succeeded_subscription_instance_id_set = set(subscription_instance_ids) - failed_subscription_instance_id_set
@@ -394,6 +496,7 @@ class BaseService(Service, LogMixin, DBHelperMixin):
                     act_name=act_name, revoke_sub_inst_id_set=revoked_subscription_instance_ids
                 )
             ),
+            subscription_id=subscription_id,
         )
 
         data.inputs.succeeded_subscription_instance_ids = succeeded_subscription_instance_ids
@@ -415,6 +518,7 @@ class BaseService(Service, LogMixin, DBHelperMixin):
             common_log=self.log_maker.error_log(
                 _("{act_name} 失败，请先尝试查看日志并处理，若无法解决，请联系管理员处理。").format(act_name=act_name)
             ),
+            subscription_id=subscription_id,
         )
 
         # 需要进入调度逻辑
@@ -425,12 +529,15 @@ class BaseService(Service, LogMixin, DBHelperMixin):
             sub_inst_ids=succeeded_subscription_instance_ids,
             status=constants.JobStatusType.SUCCESS,
             common_log=self.log_maker.info_log(_("{act_name} 成功").format(act_name=act_name)),
+            subscription_id=subscription_id,
         )
 
         # 流程结束设置成功的实例
         if act_type in [ActivityType.TAIL, ActivityType.HEAD_TAIL]:
             self.bulk_set_sub_inst_status(
-                constants.JobStatusType.SUCCESS, sub_inst_ids=succeeded_subscription_instance_ids
+                constants.JobStatusType.SUCCESS,
+                sub_inst_ids=succeeded_subscription_instance_ids,
+                subscription_id=subscription_id,
             )
 
         return bool(succeeded_subscription_instance_ids)
@@ -8,6 +8,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import asyncio
 import traceback
 import typing
 from abc import ABC
@@ -46,11 +47,30 @@ class RemoteConnHelper:
     sub_inst_id: int = None
     host: models.Host = None
     identity_data: models.IdentityData = None
-
-    def __init__(self, sub_inst_id: int, host: models.Host, identity_data: models.IdentityData):
+    conn_pool: typing.Optional[conns.AsyncsshConnPool] = None
+
+    def __init__(
+        self,
+        sub_inst_id: int,
+        host: models.Host,
+        identity_data: models.IdentityData,
+        conn_pool: typing.Optional[conns.AsyncsshConnPool] = None,
+    ):
+        """
+        :param sub_inst_id: 订阅实例 ID
+        :param host: 主机
+        :param identity_data: 认证信息
+        :param conn_pool: SSH 连接池，指定时同一主机的多次连接复用已认证的连接
+        """
         self.sub_inst_id = sub_inst_id
         self.host = host
         self.identity_data = identity_data
+        self.conn_pool = conn_pool
+
+    @property
+    def conn_pool_group(self) -> typing.Optional[int]:
+        """连接池分组，按接入点限制连接数"""
+        return self.host.ap_id
 
     @property
     @class_member_cache()
@@ -75,9 +95,25 @@ class RemoteConnHelper:
             password=self.identity_data.password,
             client_key_strings=client_key_strings,
             connect_timeout=backend_constants.SSH_CON_TIMEOUT,
+            pool=self.conn_pool,
+            pool_group=self.conn_pool_group,
         )
 
 
+def get_conn_pool_loop(
+    remote_conn_helpers: typing.List[RemoteConnHelper],
+) -> typing.Optional[asyncio.AbstractEventLoop]:
+    """
+    获取连接池的事件循环，连接绑定在事件循环上，复用连接需在同一事件循环中执行
+    :param remote_conn_helpers: 远程连接对象列表
+    :return: 事件循环，未使用连接池时返回 None
+    """
+    for remote_conn_helper in remote_conn_helpers:
+        if remote_conn_helper.conn_pool is not None:
+            return remote_conn_helper.conn_pool.loop
+    return None
+
+
 RemoteConnHelperT = typing.TypeVar("RemoteConnHelperT", bound=RemoteConnHelper)
 
 
@@ -149,7 +185,9 @@ class RemoteServiceMixin(base.BaseService, ABC):
         self, remote_conn_helpers: typing.List[RemoteConnHelperT]
     ) -> typing.List[typing.Dict[str, typing.Union[str, RemoteConnHelperT]]]:
         params_list = [{"remote_conn_helper": remote_conn_helper} for remote_conn_helper in remote_conn_helpers]
-        return concurrent.batch_call_coroutine(func=self.check_ssh, params_list=params_list)
+        return concurrent.batch_call_coroutine(
+            func=self.check_ssh, params_list=params_list, loop=get_conn_pool_loop(remote_conn_helpers)
+        )
 
     def bulk_check_ssh(
         self, remote_conn_helpers: typing.List[RemoteConnHelperT]
@@ -14,6 +14,7 @@ import traceback
 from enum import Enum
 from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 
+from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 
 from apps.core.concurrent import core_concurrent_constants
@@ -47,6 +48,9 @@ def get_config_dict(config_name: str) -> Dict[str, Any]:
     if config_name == ServiceCCConfigName.SSH.value:
         # 目前 asyncssh 协程执行的最佳批次内数量
         default_concurrent_control_config.update(limit=100)
+        if settings.SSH_COROUTINE_EXECUTOR_ENABLED:
+            # 由有界并发协程执行器统一控制并发，无需分批
+            default_concurrent_control_config.update(execute_all=True)
     elif config_name == ServiceCCConfigName.WMIEXE.value:
         # Windows 管控数量相对较少，且单个执行约为 30 秒，需要减少批次内串行的数量
         default_concurrent_control_config.update(limit=4)
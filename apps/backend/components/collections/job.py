@@ -264,7 +264,7 @@ class JobV3BaseService(six.with_metaclass(abc.ABCMeta, BaseService)):
 
     def request_get_job_instance_status(self, job_sub_map: models.JobSubscriptionInstanceMap):
         """
-        查询作业平台执行状态
+        查询作业平台执行状态，作业完成时更新映射的状态，由调用方批量写入 DB
         :param job_sub_map:
         :return:
         """
@@ -283,17 +283,24 @@ class JobV3BaseService(six.with_metaclass(abc.ABCMeta, BaseService)):
             # 任务未完成，直接跳过，等待下次查询
             return
 
-        if job_status == constants.BkJobStatus.SUCCEEDED:
-            # 任务成功，记录状态，避免下次继续查询
-            job_sub_map.status = job_status
-            job_sub_map.save()
-            return
-
-        # 其它都认为存在失败的情况，需要具体查作业平台的接口查IP详情
-        self.handler_job_result(job_sub_map)
+        if job_status != constants.BkJobStatus.SUCCEEDED:
+            # 其它都认为存在失败的情况，需要具体查作业平台的接口查IP详情
+            self.handler_job_result(job_sub_map)
 
+        # 任务完成，记录状态，避免下次继续查询
         job_sub_map.status = job_status
-        job_sub_map.save()
+
+    def update_job_sub_maps_status(self, job_sub_maps: List[models.JobSubscriptionInstanceMap]):
+        """
+        按作业状态批量更新作业平台ID映射
+        :param job_sub_maps: 状态已变更的作业平台ID映射
+        :return:
+        """
+        status__job_sub_map_ids: Dict[int, List[int]] = defaultdict(list)
+        for job_sub_map in job_sub_maps:
+            status__job_sub_map_ids[job_sub_map.status].append(job_sub_map.id)
+        for status, job_sub_map_ids in status__job_sub_map_ids.items():
+            models.JobSubscriptionInstanceMap.objects.filter(id__in=job_sub_map_ids).update(status=status)
 
     def skip_polling_result_by_os_types(self, os_types: Optional[List[str]] = None):
         """
@@ -318,13 +325,6 @@ class JobV3BaseService(six.with_metaclass(abc.ABCMeta, BaseService)):
     def _schedule(self, data, parent_data, callback_data=None):
         polling_time = data.get_one_of_outputs("polling_time") or 0
         skip_polling_result = data.get_one_of_inputs("skip_polling_result", default=False)
-        # 查询未完成的作业, 批量查询作业状态并更新DB
-        multi_params = [
-            {"job_sub_map": job_sub_map}
-            for job_sub_map in models.JobSubscriptionInstanceMap.objects.filter(
-                node_id=self.id, status=constants.BkJobStatus.PENDING
-            )
-        ]
 
         # 处理跳过作业平台结果轮训的情况
         if skip_polling_result:
@@ -332,19 +332,27 @@ class JobV3BaseService(six.with_metaclass(abc.ABCMeta, BaseService)):
             self.finish_schedule()
             return
 
-        request_multi_thread(self.request_get_job_instance_status, multi_params)
+        # 查询未完成的作业, 批量查询作业状态
+        pending_job_sub_maps: List[models.JobSubscriptionInstanceMap] = list(
+            models.JobSubscriptionInstanceMap.objects.filter(node_id=self.id, status=constants.BkJobStatus.PENDING)
+        )
+        request_multi_thread(
+            self.request_get_job_instance_status,
+            [{"job_sub_map": job_sub_map} for job_sub_map in pending_job_sub_maps],
+        )
+        # 仅对状态发生变化的作业批量写入 DB
+        self.update_job_sub_maps_status(
+            [job_sub_map for job_sub_map in pending_job_sub_maps if job_sub_map.status != constants.BkJobStatus.PENDING]
+        )
 
         # 判断 JobSubscriptionInstanceMap 中对应的 job_instance_id 都执行完成的，把成功的 subscription_instance_ids 向下传递
-        is_finished = not models.JobSubscriptionInstanceMap.objects.filter(
-            node_id=self.id, status=constants.BkJobStatus.PENDING
-        ).exists()
-        if is_finished:
+        pending_job_sub_maps = [
+            job_sub_map for job_sub_map in pending_job_sub_maps if job_sub_map.status == constants.BkJobStatus.PENDING
+        ]
+        if not pending_job_sub_maps:
             self.finish_schedule()
         elif polling_time + POLLING_INTERVAL > POLLING_TIMEOUT:
             # 由于JOB的超时机制可能会失效，因此这里节点管理自己需要有超时机制进行兜底
-            pending_job_sub_maps = models.JobSubscriptionInstanceMap.objects.filter(
-                node_id=self.id, status=constants.BkJobStatus.PENDING
-            )
             handler_job_result_params_list = [
                 {"job_sub_map": pending_job_sub_map} for pending_job_sub_map in pending_job_sub_maps
             ]
@@ -361,15 +369,13 @@ class JobV3BaseService(six.with_metaclass(abc.ABCMeta, BaseService)):
                 # 处理 PENDING 的订阅实例任务已全部完成的情况
                 if pending_sub_inst_ids.issubset(succeed_sub_inst_ids):
                     pending_job_sub_map.status = constants.BkJobStatus.SUCCEEDED
-                    pending_job_sub_map.save()
                     continue
                 # pending_sub_inst_ids 与 succeed_sub_inst_ids 取差集获得已超时的订阅实例ID集合
                 timeout_sub_inst_ids = timeout_sub_inst_ids | (pending_sub_inst_ids - succeed_sub_inst_ids)
+                pending_job_sub_map.status = constants.BkJobStatus.FAILED
 
             self.move_insts_to_failed(sub_inst_ids=timeout_sub_inst_ids, log_content=_("作业平台执行任务超时"))
-            models.JobSubscriptionInstanceMap.objects.filter(
-                node_id=self.id, status=constants.BkJobStatus.PENDING
-            ).update(status=constants.BkJobStatus.FAILED)
+            self.update_job_sub_maps_status(pending_job_sub_maps)
             self.finish_schedule()
         data.outputs.polling_time = polling_time + POLLING_INTERVAL
 
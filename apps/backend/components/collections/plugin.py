@@ -41,6 +41,7 @@ from apps.backend.components.collections.job import (
 from apps.backend.subscription import errors
 from apps.backend.subscription.steps.adapter import PolicyStepAdapter
 from apps.backend.subscription.tools import (
+    SubscriptionStepsContextBase,
     create_group_id,
     get_all_subscription_steps_context,
     render_config_files_by_config_templates,
@@ -935,26 +936,40 @@ class RenderAndPushConfigService(PluginBaseService, JobV3BaseService):
     """
 
     def _execute(self, data, parent_data, common_data: PluginCommonData):
-        subscription_step_id = data.get_one_of_inputs("subscription_step_id")
         process_statuses = common_data.process_statuses
         policy_step_adapter = common_data.policy_step_adapter
         group_id_instance_map = common_data.group_id_instance_map
         host_id_obj_map = common_data.host_id_obj_map
 
-        # 此处 subscription_step 一定有值，否则前置流程已出现异常
-        subscription_step = models.SubscriptionStep.objects.get(id=subscription_step_id)
+        # common_data 中的订阅步骤即为当前节点的订阅步骤，无需重复查询
+        subscription_step = common_data.subscription_step
 
         # 组装调用作业平台的参数
         multi_job_params_map: Dict[str, Dict[str, Any]] = {}
+        # 待更新配置的进程状态，渲染完成后批量更新
+        to_be_updated_process_statuses: List[models.ProcessStatus] = []
+        # 渲染结果按内容去重，相同的配置文件在多个进程状态间共享同一对象
+        config_key__rendered_config_map: Dict[str, Dict[str, Any]] = {}
+        # 与主机无关的上下文数据按插件计算一次，各主机共享
+        plugin_name__context_base_map: Dict[str, SubscriptionStepsContextBase] = {}
         for process_status in process_statuses:
             target_bk_host_id = process_status.bk_host_id
             subscription_instance = group_id_instance_map.get(process_status.group_id)
             target_host = host_id_obj_map.get(target_bk_host_id)
             package = self.get_package_by_process_status(process_status, common_data)
             agent_config = self.get_agent_config_by_process_status(process_status, common_data)
+            if process_status.name not in plugin_name__context_base_map:
+                plugin_name__context_base_map[process_status.name] = SubscriptionStepsContextBase(
+                    subscription_step, process_status.name
+                )
             # 获取订阅的上下文变量
             context = get_all_subscription_steps_context(
-                subscription_step, subscription_instance.instance_info, target_host, process_status.name, agent_config
+                subscription_step,
+                subscription_instance.instance_info,
+                target_host,
+                process_status.name,
+                agent_config,
+                context_base=plugin_name__context_base_map[process_status.name],
             )
 
             # 根据配置模板和上下文变量渲染配置文件
@@ -964,8 +979,14 @@ class RenderAndPushConfigService(PluginBaseService, JobV3BaseService):
                 context,
                 package_obj=package,
             )
+            rendered_configs = [
+                config_key__rendered_config_map.setdefault(
+                    f"{config['file_path']}-{config['name']}-{config['md5']}", config
+                )
+                for config in rendered_configs
+            ]
             process_status.configs = rendered_configs
-            process_status.save()
+            to_be_updated_process_statuses.append(process_status)
 
             path_handler = PathHandler(target_host.os_type)
             plugin_root = self.get_plugin_root_by_process_status(process_status, common_data)
@@ -973,8 +994,7 @@ class RenderAndPushConfigService(PluginBaseService, JobV3BaseService):
                 file_target_path = path_handler.join(plugin_root, config["file_path"])
                 file_name = config["name"]
                 file_content = config["content"]
-                file_md5 = self.get_md5(file_content)
-                key = f"{file_target_path}-{file_name}-{file_md5}"
+                key = f"{file_target_path}-{file_name}-{config['md5']}"
                 # 路径、文件名、文件内容一致，则认为是同一个文件，合并到一个作业中，提高执行效率
                 if key in multi_job_params_map:
                     multi_job_params_map = self.append_unique_key_params_info(
@@ -1004,6 +1024,10 @@ class RenderAndPushConfigService(PluginBaseService, JobV3BaseService):
                         },
                     }
 
+        models.ProcessStatus.objects.bulk_update(
+            to_be_updated_process_statuses, fields=["configs"], batch_size=self.batch_size
+        )
+
         if not multi_job_params_map:
             subscription_instance_ids = common_data.subscription_instance_ids
             self.log_info(
@@ -124,6 +124,15 @@ class AgentMigrateType(enum.EnhanceEnum):
 # redis键名模板
 REDIS_INSTALL_CALLBACK_KEY_TPL = f"{settings.APP_CODE}:backend:agent:log:list:" + "{sub_inst_id}"
 
+# redis 安装回调通知集合，记录 Pipeline 节点下有新上报日志的订阅实例
+REDIS_INSTALL_CALLBACK_NOTIFY_KEY_TPL = f"{settings.APP_CODE}:backend:agent:log:notify:set:" + "{node_id}"
+
+# 每批次取出的安装回调日志列表数
+INSTALL_CALLBACK_DRAIN_BATCH_SIZE = 500
+
+# 开启回调通知时，每隔多少个轮询周期全量检查一次安装回调日志，兜底未经通知写入的日志
+INSTALL_CALLBACK_FULL_DRAIN_POLLS = 6
+
 # redis Gse Agent 配置缓存
 REDIS_AGENT_CONF_KEY_TPL = f"{settings.APP_CODE}:backend:agent:config:" + "{file_name}:str:{sub_inst_id}"
 
@@ -129,4 +129,7 @@ def calculate_statistics():
             )
             logger.exception(err)
 
+    # 批量创建（如自动触发）的任务不经过 save，在此兜底同步任务检索索引
+    models.Job.sync_search_index(jobs)
+
     logger.info(f"calculate_statistics finished: job_ids_gby_reason -> {job_ids_gby_reason}")
@@ -13,8 +13,6 @@ import logging
 from datetime import timedelta
 
 from celery.task import periodic_task
-from django.db.models import Value
-from django.db.models.functions import Concat
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
@@ -53,11 +51,29 @@ def check_zombie_sub_inst_record():
         **base_update_kwargs
     )
 
-    forced_failed_status_detail_num = models.SubscriptionInstanceStatusDetail.objects.filter(**query_kwargs).update(
-        **base_update_kwargs,
-        log=Concat(
-            "log", Value(_("\n[{time_str} ERROR] 任务长时间处在执行状态，已强制失败").format(time_str=strftime_local(timezone.now())))
-        ),
+    forced_failed_status_details = list(
+        models.SubscriptionInstanceStatusDetail.objects.filter(**query_kwargs).values(
+            "id", "subscription_instance_record_id", "node_id"
+        )
+    )
+    forced_failed_status_detail_num = models.SubscriptionInstanceStatusDetail.objects.filter(
+        id__in=[status_detail["id"] for status_detail in forced_failed_status_details]
+    ).update(**base_update_kwargs)
+
+    log_content: str = (
+        _("\n[{time_str} ERROR] 任务长时间处在执行状态，已强制失败").format(time_str=strftime_local(timezone.now())).strip()
+    )
+    models.SubscriptionInstanceLog.objects.bulk_create(
+        [
+            models.SubscriptionInstanceLog(
+                subscription_instance_record_id=status_detail["subscription_instance_record_id"],
+                node_id=status_detail["node_id"],
+                log=log_content,
+                level_name="ERROR",
+            )
+            for status_detail in forced_failed_status_details
+        ],
+        batch_size=constants.SUBSCRIPTION_INSTANCE_LOG_BATCH_SIZE,
     )
 
     logger.info(
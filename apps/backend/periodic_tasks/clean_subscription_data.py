@@ -8,19 +8,27 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from datetime import timedelta
 from typing import Dict, List, Optional, Union
 
 from celery.schedules import crontab
 from celery.task import periodic_task
 from django.db import connection
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
+from apps.backend.subscription.lifecycle import (
+    DataLifecycleManager,
+    get_archive_writer,
+)
 from apps.node_man import constants, models
 from apps.utils.time_handler import strftime_local
 from common.log import logger
+from pipeline.engine.models import History, HistoryData
 
 DEFAULT_ALIVE_TIME = 30
 DEFAULT_CLEAN_RECORD_LIMIT = 5000
+DEFAULT_CLEAN_MAX_CHUNKS = 10
 SUBSCRIPTION_INSTANCE_DETAIL_TABLE = "node_man_subscriptioninstancestatusdetail"
 JOB_SUB_INSTANCE_MAP_TABLE = "node_man_jobsubscriptioninstancemap"
 
@@ -32,7 +40,7 @@ JOB_SUB_INSTANCE_MAP_TABLE = "node_man_jobsubscriptioninstancemap"
 )
 def clean_subscription_data():
     """
-    周期清理订阅实例状态详情表和作业订阅实例映射表
+    周期清理订阅实例状态详情表、订阅实例日志表和作业订阅实例映射表
     """
     clean_subscription_data_map: Dict[str, Union[int, str, bool]] = (
         models.GlobalSettings.get_config(models.GlobalSettings.KeyEnum.CLEAN_SUBSCRIPTION_DATA_MAP.value) or {}
@@ -57,6 +65,17 @@ def clean_subscription_data():
         f"rule: {models.GlobalSettings.KeyEnum.CLEAN_SUBSCRIPTION_DATA_MAP.value} -> [{clean_subscription_data_map}]"
     )
 
+    # 按 ID 区间分批清理，并支持冷数据归档及删除过期分区
+    if clean_subscription_data_map.get("enable_lifecycle_manager", False):
+        clean_subscription_data_by_lifecycle(
+            chunk_size=limit,
+            max_chunks=clean_subscription_data_map.get("max_chunks", DEFAULT_CLEAN_MAX_CHUNKS),
+            alive_days=alive_days,
+            sub_ins_detail_save_log_status=sub_ins_detail_save_log_status,
+            job_map_clean_status=job_map_clean_status,
+        )
+        return
+
     with connection.cursor() as cursor:
 
         sub_detail_delete_sql: str = build_delete_query_sql(
@@ -75,6 +94,14 @@ def clean_subscription_data():
             f"deleted subscription instance status detail records -> [{cursor.rowcount}] "
         )
 
+        deleted_sub_inst_log_num: int = clean_subscription_instance_log(
+            days=alive_days, limit=limit, log_save_levels=sub_ins_detail_save_log_status
+        )
+        logger.info(
+            f"periodic_task -> clean_subscription_data, time -> {strftime_local(timezone.now())}, "
+            f"deleted subscription instance log records -> [{deleted_sub_inst_log_num}] "
+        )
+
         job_instance_map_delete_sql: str = build_delete_query_sql(
             table_name=JOB_SUB_INSTANCE_MAP_TABLE, appoint_clean_statuses=job_map_clean_status, limit=limit
         )
@@ -95,6 +122,75 @@ def clean_subscription_data():
             )
 
 
+def clean_subscription_data_by_lifecycle(
+    chunk_size: int,
+    max_chunks: int,
+    alive_days: int,
+    sub_ins_detail_save_log_status: List[str],
+    job_map_clean_status: List[int],
+):
+    """
+    通过数据生命周期管理清理订阅执行历史
+    :param chunk_size: 每个区间的 ID 跨度
+    :param max_chunks: 每张表单次最多处理的区间数
+    :param alive_days: 保留天数
+    :param sub_ins_detail_save_log_status: 需保留的原子状态，相应的订阅实例记录同样保留
+    :param job_map_clean_status: job 映射表中需清理的状态，为空时不清理
+    """
+    archive_writer = get_archive_writer()
+    lifecycle_managers: List[DataLifecycleManager] = [
+        DataLifecycleManager(
+            model=models.SubscriptionInstanceStatusDetail,
+            chunk_size=chunk_size,
+            time_field="create_time",
+            alive_days=alive_days,
+            keep_q=Q(status__in=sub_ins_detail_save_log_status) if sub_ins_detail_save_log_status else None,
+            archive_writer=archive_writer,
+        ),
+        DataLifecycleManager(
+            model=models.SubscriptionInstanceRecord,
+            chunk_size=chunk_size,
+            time_field="create_time",
+            alive_days=alive_days,
+            # 实例最新记录用于展示订阅实例当前状态，不清理
+            keep_q=Q(is_latest=True) | Q(status__in=sub_ins_detail_save_log_status),
+            archive_writer=archive_writer,
+        ),
+        DataLifecycleManager(
+            model=History,
+            chunk_size=chunk_size,
+            time_field="archived_time",
+            alive_days=alive_days,
+            related_fields=["data_id"],
+            on_deleted=lambda rows: HistoryData.objects.filter(id__in=[row["data_id"] for row in rows]).delete(),
+        ),
+    ]
+    if job_map_clean_status:
+        lifecycle_managers.append(
+            DataLifecycleManager(
+                model=models.JobSubscriptionInstanceMap,
+                chunk_size=chunk_size,
+                keep_q=~Q(status__in=job_map_clean_status),
+                archive_writer=archive_writer,
+            )
+        )
+
+    for lifecycle_manager in lifecycle_managers:
+        deleted_num: int = lifecycle_manager.clean(max_chunks=max_chunks)
+        logger.info(
+            f"periodic_task -> clean_subscription_data, time -> {strftime_local(timezone.now())}, "
+            f"deleted {lifecycle_manager.table_name} records -> [{deleted_num}] "
+        )
+
+    deleted_sub_inst_log_num: int = clean_subscription_instance_log(
+        days=alive_days, limit=chunk_size * max_chunks, log_save_levels=sub_ins_detail_save_log_status
+    )
+    logger.info(
+        f"periodic_task -> clean_subscription_data, time -> {strftime_local(timezone.now())}, "
+        f"deleted subscription instance log records -> [{deleted_sub_inst_log_num}] "
+    )
+
+
 def build_delete_query_sql(
     table_name: str,
     limit: int,
@@ -122,3 +218,28 @@ def build_delete_query_sql(
             )
         )
     return f"{head_sql} {where_condition} {limit_condition}"
+
+
+def clean_subscription_instance_log(days: int, limit: int, log_save_levels: Optional[List[str]] = None) -> int:
+    """
+    清理订阅实例日志，与状态详情的清理规则保持一致：所属原子状态处于保留状态的日志不清理
+    :param days: 日志保留天数
+    :param limit: 单次最多删除的记录数
+    :param log_save_levels: 需保留日志的原子状态
+    :return: 删除的记录数
+    """
+    expired_logs = models.SubscriptionInstanceLog.objects.filter(created_at__lt=timezone.now() - timedelta(days=days))
+    if log_save_levels:
+        expired_logs = expired_logs.filter(
+            ~Exists(
+                models.SubscriptionInstanceStatusDetail.objects.filter(
+                    subscription_instance_record_id=OuterRef("subscription_instance_record_id"),
+                    node_id=OuterRef("node_id"),
+                    status__in=log_save_levels,
+                )
+            )
+        )
+    expired_log_ids: List[int] = list(expired_logs.values_list("id", flat=True)[:limit])
+    if not expired_log_ids:
+        return 0
+    return models.SubscriptionInstanceLog.objects.filter(id__in=expired_log_ids).delete()[0]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+from typing import Dict, List, Set
+
+from celery.task import periodic_task
+
+from apps.backend.subscription.constants import (
+    SUBSCRIPTION_STATISTIC_RECONCILE_INTERVAL,
+    SUBSCRIPTION_STATISTIC_REFRESH_BATCH_SIZE,
+    SUBSCRIPTION_STATISTIC_REFRESH_INTERVAL,
+)
+from apps.backend.subscription.statistic import (
+    SubscriptionStatisticSnapshot,
+    calculate_subscription_statistics,
+)
+from apps.node_man import models
+
+logger = logging.getLogger("celery")
+
+
+@periodic_task(
+    run_every=SUBSCRIPTION_STATISTIC_REFRESH_INTERVAL,
+    queue="backend",
+    options={"queue": "backend"},
+    ignore_result=True,
+)
+def refresh_subscription_statistic():
+    """
+    刷新订阅统计快照
+    仅刷新已生成快照的订阅：实例状态有变更的订阅，以及超过对账周期的快照
+    """
+    if not models.GlobalSettings.get_config(
+        key=models.GlobalSettings.KeyEnum.ENABLE_SUBSCRIPTION_STATISTIC_SNAPSHOT.value, default=False
+    ):
+        # 未开启时清理变更标记，避免标记集合持续增长
+        SubscriptionStatisticSnapshot.pop_dirty(SUBSCRIPTION_STATISTIC_REFRESH_BATCH_SIZE)
+        return
+
+    dirty_sub_ids: Set[int] = SubscriptionStatisticSnapshot.filter_exists(
+        SubscriptionStatisticSnapshot.pop_dirty(SUBSCRIPTION_STATISTIC_REFRESH_BATCH_SIZE)
+    )
+    stale_sub_ids: Set[int] = SubscriptionStatisticSnapshot.list_stale(
+        expire=SUBSCRIPTION_STATISTIC_RECONCILE_INTERVAL,
+        count=max(SUBSCRIPTION_STATISTIC_REFRESH_BATCH_SIZE - len(dirty_sub_ids), 0),
+    )
+    refresh_sub_ids: Set[int] = dirty_sub_ids | stale_sub_ids
+    if not refresh_sub_ids:
+        return
+
+    alive_sub_ids: Set[int] = set(
+        models.Subscription.objects.filter(id__in=refresh_sub_ids, is_deleted=False).values_list("id", flat=True)
+    )
+    # 已删除的订阅不再刷新
+    SubscriptionStatisticSnapshot.delete_many(refresh_sub_ids - alive_sub_ids)
+
+    sub_statistic_list: List[Dict] = calculate_subscription_statistics(alive_sub_ids)
+    SubscriptionStatisticSnapshot.save_many(sub_statistic_list)
+    logger.info(
+        f"[refresh_subscription_statistic] dirty_sub_ids -> {dirty_sub_ids}, stale_sub_ids -> {stale_sub_ids}, "
+        f"refreshed -> {len(sub_statistic_list)}"
+    )
@@ -26,6 +26,7 @@ from apps.backend import exceptions
 from apps.core.files.storage import get_storage
 from apps.node_man import constants, models
 from apps.utils import env, files
+from apps.utils.artifact_cache import get_artifact_cache, link_tree
 
 logger = logging.getLogger("app")
 
@@ -37,9 +38,10 @@ def locale_fields() -> Dict[str, str]:
     return {"description": "description_en", "scenario": "scenario_en"}
 
 
-def list_package_infos(file_path: str) -> List[Dict[str, Any]]:
+def list_package_infos(file_path: str, file_md5: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     :param file_path: 插件包所在路径
+    :param file_md5: 插件包 MD5，提供时按 MD5 缓存解压结果，重复解析同一插件包时无需再次解压
     解析`self.file_path`下插件，获取包信息字典列表
     :return: [
         {
@@ -63,23 +65,35 @@ def list_package_infos(file_path: str) -> List[Dict[str, Any]]:
     if not storage.exists(name=file_path):
         raise exceptions.PluginParseError(_("插件不存在: file_path -> {file_path}").format(file_path=file_path))
 
-    # 解压压缩文件
-    tmp_dir = files.mk_and_return_tmpdir()
-    with storage.open(name=file_path, mode="rb") as tf_from_storage:
-        with tarfile.open(fileobj=tf_from_storage) as tf:
-            # 检查是否存在可疑内容
-            for file_info in tf.getmembers():
-                if file_info.name.startswith("/") or "../" in file_info.name:
-                    logger.error(
-                        "file-> {file_path} contains member-> {name} try to escape!".format(
-                            file_path=file_path, name=file_info.name
+    def _extract(_extract_dir: str):
+        with storage.open(name=file_path, mode="rb") as tf_from_storage:
+            with tarfile.open(fileobj=tf_from_storage) as tf:
+                # 检查是否存在可疑内容
+                for file_info in tf.getmembers():
+                    if file_info.name.startswith("/") or "../" in file_info.name:
+                        logger.error(
+                            "file-> {file_path} contains member-> {name} try to escape!".format(
+                                file_path=file_path, name=file_info.name
+                            )
                         )
+                        raise exceptions.PluginParseError(_("文件包含非法路径成员 -> {name}，请检查").format(name=file_info.name))
+                logger.info(
+                    "file-> {file_path} extract to path -> {tmp_dir} success.".format(
+                        file_path=file_path, tmp_dir=_extract_dir
                     )
-                    raise exceptions.PluginParseError(_("文件包含非法路径成员 -> {name}，请检查").format(name=file_info.name))
-            logger.info(
-                "file-> {file_path} extract to path -> {tmp_dir} success.".format(file_path=file_path, tmp_dir=tmp_dir)
-            )
-            tf.extractall(path=tmp_dir)
+                )
+                tf.extractall(path=_extract_dir)
+
+    # 解压压缩文件
+    tmp_dir = files.mk_and_return_tmpdir()
+    artifact_cache = get_artifact_cache() if file_md5 else None
+    if artifact_cache:
+        # 调用方会修改及清理 tmp_dir，从缓存硬链接一份，不影响缓存内容
+        link_tree(
+            src=artifact_cache.get_or_create(namespace="upload_tree", key=file_md5, create_func=_extract), dst=tmp_dir
+        )
+    else:
+        _extract(tmp_dir)
 
     package_infos = []
 
@@ -336,6 +350,7 @@ def create_package_records(
     creator: Optional[str] = None,
     select_pkg_relative_paths: Optional[List[str]] = None,
     is_template_load: bool = False,
+    file_md5: Optional[str] = None,
 ) -> List[models.Packages]:
     """
     解析上传插件，拆分为插件包并保存记录
@@ -345,11 +360,12 @@ def create_package_records(
     :param creator: 操作人
     :param select_pkg_relative_paths: 指定注册插件包的相对路径列表
     :param is_template_load: 是否需要读取配置文件
+    :param file_md5: 上传插件 MD5，用于复用解压缓存
     :return: [package_object, ...]
     :return:
     """
     pkg_record_objs = []
-    package_infos = list_package_infos(file_path=file_path)
+    package_infos = list_package_infos(file_path=file_path, file_md5=file_md5)
 
     with transaction.atomic():
         for package_info in package_infos:
@@ -910,7 +910,9 @@ class PluginViewSet(APIViewSet, mixins.RetrieveModelMixin, mixins.ListModelMixin
             raise exceptions.FileNotExistError(_("找不到请求发布的文件，请确认后重试"))
 
         # 获取插件中各个插件包的路径信息
-        package_infos = tools.list_package_infos(file_path=upload_package_obj.file_path)
+        package_infos = tools.list_package_infos(
+            file_path=upload_package_obj.file_path, file_md5=upload_package_obj.md5
+        )
         # 解析插件包
         pkg_parse_results = []
         for package_info in package_infos:
@@ -32,3 +32,18 @@ TASK_HOST_LIMIT = 500
 
 # 订阅范围实例缓存时间，比自动下发周期多1小时
 SUBSCRIPTION_SCOPE_CACHE_TIME = SUBSCRIPTION_UPDATE_INTERVAL + constants.TimeUnit.HOUR
+
+# 订阅范围指纹保留时间，需大于自动下发周期，过期后触发全量变更计算
+SUBSCRIPTION_SCOPE_FINGERPRINT_EXPIRE = 2 * SUBSCRIPTION_UPDATE_INTERVAL + constants.TimeUnit.HOUR
+
+# 订阅范围全量变更计算周期，兜底插件包、接入点等指纹未覆盖的变更
+SUBSCRIPTION_SCOPE_FULL_DIFF_INTERVAL = 6 * constants.TimeUnit.HOUR
+
+# 订阅统计快照刷新周期
+SUBSCRIPTION_STATISTIC_REFRESH_INTERVAL = 30 * constants.TimeUnit.SECOND
+
+# 订阅统计快照对账周期，超过该时间的快照会被重新计算
+SUBSCRIPTION_STATISTIC_RECONCILE_INTERVAL = 10 * constants.TimeUnit.MINUTE
+
+# 每次刷新最多计算的订阅数
+SUBSCRIPTION_STATISTIC_REFRESH_BATCH_SIZE = 100
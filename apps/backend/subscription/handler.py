@@ -12,7 +12,7 @@ from __future__ import absolute_import, unicode_literals
 
 import logging
 import random
-from collections import Counter, defaultdict
+from collections import Counter
 from copy import deepcopy
 from typing import Any, Dict, List, Optional, Set
 
@@ -24,6 +24,10 @@ from django.utils.translation import ugettext as _
 
 from apps.backend.subscription import errors, task_tools, tasks, tools
 from apps.backend.subscription.errors import InstanceTaskIsRunning
+from apps.backend.subscription.statistic import (
+    SubscriptionStatisticSnapshot,
+    calculate_subscription_statistics,
+)
 from apps.backend.utils.pipeline_parser import PipelineParser
 from apps.node_man import constants, models
 from apps.utils.basic import filter_values
@@ -449,6 +453,20 @@ class SubscriptionHandler(object):
         :param subscription_id_list:
         :return:
         """
+        if models.GlobalSettings.get_config(
+            key=models.GlobalSettings.KeyEnum.ENABLE_SUBSCRIPTION_STATISTIC_SNAPSHOT.value, default=False
+        ):
+            # 优先读取后台预计算的统计快照，仅对未生成快照的订阅实时计算
+            sub_id__statistic_map: Dict[int, Dict] = SubscriptionStatisticSnapshot.get_many(subscription_id_list)
+            miss_sub_ids: Set[int] = set(subscription_id_list) - set(sub_id__statistic_map.keys())
+            logger.info(f"statistic snapshot hit_sub_ids -> {set(sub_id__statistic_map.keys())}")
+            if miss_sub_ids:
+                sub_statistic_list: List[Dict] = calculate_subscription_statistics(miss_sub_ids)
+                SubscriptionStatisticSnapshot.save_many(sub_statistic_list)
+                sub_id__statistic_map.update(
+                    {sub_statistic["subscription_id"]: sub_statistic for sub_statistic in sub_statistic_list}
+                )
+            return list(sub_id__statistic_map.values())
 
         cache_keys: List[str] = []
         cache_key_tmpl = settings.CACHE_KEY_TMPL.format(scope="subscription:statistic", body="sub_id:{sub_id}")
@@ -467,69 +485,9 @@ class SubscriptionHandler(object):
             return hit_sub_statistic_list
 
         logger.info(f"miss_sub_ids -> {miss_sub_ids}")
-        subscriptions = models.Subscription.objects.filter(id__in=miss_sub_ids)
-
-        host_statuses = models.ProcessStatus.objects.filter(
-            source_id__in=subscription_id_list, source_type=models.ProcessStatus.SourceType.SUBSCRIPTION
-        ).values("version", "group_id", "name", "id")
-
-        instance_host_statuses = defaultdict(dict)
-        for host_status in host_statuses:
-            instance_host_statuses[host_status["group_id"]][host_status["id"]] = host_status
-
-        subscription_instances = list(
-            models.SubscriptionInstanceRecord.objects.filter(
-                subscription_id__in=subscription_id_list, is_latest=True
-            ).values("subscription_id", "instance_id", "status")
-        )
-        subscription_instance_status_map = defaultdict(dict)
-        for sub_inst in subscription_instances:
-            subscription_instance_status_map[sub_inst["subscription_id"]][sub_inst["instance_id"]] = {
-                "status": sub_inst["status"]
-            }
-
-        sub_statistic_list: List[Dict] = []
-        for subscription in subscriptions:
-            sub_statistic = {"subscription_id": subscription.id, "status": []}
-            current_instances = tools.get_instances_by_scope(subscription.scope, get_cache=True)
-
-            status_statistic = {"SUCCESS": 0, "PENDING": 0, "FAILED": 0, "RUNNING": 0}
-            plugin_versions = defaultdict(lambda: defaultdict(int))
-            for instance_id, instance_info in current_instances.items():
-                try:
-                    group_id = tools.create_group_id(subscription, instance_info)
-                except KeyError:
-                    # 在订阅变更 node_type & 缓存不一致时可能会发生，极小概率事件，记录堆栈并忽略
-                    logger.exception(
-                        f"create group id failed: subscription -> {subscription.id}, instance_info -> {instance_info}"
-                    )
-                    continue
-
-                if group_id not in instance_host_statuses:
-                    continue
-
-                if instance_id not in subscription_instance_status_map.get(subscription.id, {}):
-                    continue
-
-                sub_instance_status = subscription_instance_status_map[subscription.id][instance_id]
-
-                # 订阅实例任务状态统计
-                status_statistic[sub_instance_status["status"]] += 1
-                # 版本统计
-                host_statuses = instance_host_statuses.get(group_id, {}).values()
-                for host_status in host_statuses:
-                    plugin_versions[host_status["name"]][host_status["version"]] += 1
-
-            sub_statistic["versions"] = [
-                {"version": version, "count": count, "name": name}
-                for name, versions in plugin_versions.items()
-                for version, count in versions.items()
-            ]
-            sub_statistic["instances"] = sum(status_statistic.values())
-            for status, count in status_statistic.items():
-                sub_statistic["status"].append({"status": status, "count": count})
-
-            cache_key = cache_key_tmpl.format(sub_id=subscription.id)
+        sub_statistic_list: List[Dict] = calculate_subscription_statistics(miss_sub_ids)
+        for sub_statistic in sub_statistic_list:
+            cache_key = cache_key_tmpl.format(sub_id=sub_statistic["subscription_id"])
             # 缓存时间范围： 16s ~ 35s
             # 根据数据规模，每增加 1k 缓存增加 1s，最多 15s
             cache_expires: int = 15 * constants.TimeUnit.SECOND + random.randint(
@@ -543,6 +501,4 @@ class SubscriptionHandler(object):
             )
             cache.set(cache_key, sub_statistic, cache_expires)
 
-            sub_statistic_list.append(sub_statistic)
-
         return sub_statistic_list + hit_sub_statistic_list
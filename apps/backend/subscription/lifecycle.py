@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import gzip
+import json
+import logging
+import os
+import typing
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.node_man.models import GlobalSettings
+
+logger = logging.getLogger("app")
+
+
+def scrub_instance_info(instance_info: typing.Any) -> bool:
+    """
+    清除订阅实例信息中的主机密码及密钥
+    :param instance_info: 订阅实例信息
+    :return: 是否有字段被清除
+    """
+    try:
+        host_info: typing.Dict[str, typing.Any] = instance_info["host"]
+    except (KeyError, TypeError):
+        return False
+    if not isinstance(host_info, dict):
+        return False
+
+    scrubbed: bool = False
+    for field in ["password", "key"]:
+        if host_info.get(field):
+            host_info[field] = ""
+            scrubbed = True
+    return scrubbed
+
+
+class ArchiveWriter:
+    """
+    冷数据归档，将待删除的记录以 gzip 压缩的 JSON Lines 写入归档目录
+    - 文件按表名分目录，文件名包含 ID 区间，重复归档同一区间时覆盖
+    - 先写临时文件再原子重命名，读取方不会看到不完整的归档文件
+    """
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+
+    def write(self, table_name: str, begin: int, end: int, rows: typing.List[typing.Dict[str, typing.Any]]) -> str:
+        """
+        :param table_name: 表名
+        :param begin: ID 区间起点（包含）
+        :param end: ID 区间终点（不包含）
+        :param rows: 待归档记录
+        :return: 归档文件路径
+        """
+        table_archive_dir: str = os.path.join(self.archive_dir, table_name)
+        os.makedirs(table_archive_dir, exist_ok=True)
+        file_path: str = os.path.join(table_archive_dir, f"{table_name}-{begin}-{end}.jsonl.gz")
+        tmp_file_path: str = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with gzip.open(tmp_file_path, "wt", encoding="utf-8") as fs:
+                for row in rows:
+                    fs.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n")
+            os.rename(tmp_file_path, file_path)
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+        return file_path
+
+
+class DataLifecycleManager:
+    """
+    大表数据生命周期管理：按 ID 区间（逻辑分区）归档并删除过期数据
+    - 表主键为自增 ID，ID 与写入时间单调对应，过期数据集中在 ID 较小的一端，
+      通过时间索引定位最近一条过期记录的 ID 作为清理上界，逐个区间按主键范围扫描，避免全表排序删除
+    - 已按 RANGE(id) 分区的表（MySQL），每日切分出以日期命名的分区，整个分区均可清理时直接删除分区
+    - 清理进度以游标形式记录在 GlobalSettings，追平上界后游标复位，下一轮重新扫描此前保留的记录
+    """
+
+    # 游标在 GlobalSettings 中的键
+    CURSOR_KEY_TMPL = "DATA_LIFECYCLE__{table_name}__LAST_ID"
+    # 兜底分区名称
+    TAIL_PARTITION_NAME = "pmax"
+
+    def __init__(
+        self,
+        model: typing.Type[models.Model],
+        chunk_size: int,
+        time_field: typing.Optional[str] = None,
+        alive_days: typing.Optional[int] = None,
+        keep_q: typing.Optional[Q] = None,
+        archive_writer: typing.Optional[ArchiveWriter] = None,
+        related_fields: typing.Optional[typing.List[str]] = None,
+        on_deleted: typing.Optional[typing.Callable[[typing.List[typing.Dict[str, typing.Any]]], None]] = None,
+    ):
+        """
+        :param model: 模型，主键需为自增 ID
+        :param chunk_size: 每个区间的 ID 跨度
+        :param time_field: 时间字段，需建有索引，为空时不按时间过期
+        :param alive_days: 保留天数
+        :param keep_q: 需保留记录的条件
+        :param archive_writer: 归档，为空时不归档直接删除
+        :param related_fields: 删除后回调需要的字段
+        :param on_deleted: 删除后回调，用于清理关联表
+        """
+        self.model = model
+        self.table_name: str = model._meta.db_table
+        self.chunk_size = chunk_size
+        self.time_field = time_field
+        self.alive_days = alive_days
+        self.keep_q = keep_q
+        self.archive_writer = archive_writer
+        self.related_fields = related_fields or []
+        self.on_deleted = on_deleted
+        self.cursor_key: str = self.CURSOR_KEY_TMPL.format(table_name=self.table_name)
+
+    @property
+    def expired_q(self) -> Q:
+        expired_q: Q = Q()
+        if self.time_field:
+            expired_q &= Q(**{f"{self.time_field}__lt": timezone.now() - timedelta(days=self.alive_days)})
+        if self.keep_q is not None:
+            expired_q &= ~self.keep_q
+        return expired_q
+
+    def get_boundary_id(self) -> typing.Optional[int]:
+        """
+        获取清理上界，即最近一条过期记录的 ID
+        """
+        if not self.time_field:
+            return self.model.objects.order_by("-id").values_list("id", flat=True).first()
+        return (
+            self.model.objects.filter(**{f"{self.time_field}__lt": timezone.now() - timedelta(days=self.alive_days)})
+            .order_by(f"-{self.time_field}", "-id")
+            .values_list("id", flat=True)
+            .first()
+        )
+
+    def get_cursor(self) -> int:
+        return GlobalSettings.get_config(key=self.cursor_key, default=0)
+
+    def set_cursor(self, cursor: int):
+        GlobalSettings.objects.update_or_create(key=self.cursor_key, defaults={"v_json": cursor})
+
+    def clean_range(self, begin: int, end: int) -> int:
+        """
+        归档并删除 [begin, end) 区间内的过期记录
+        :return: 删除的记录数
+        """
+        expired_records = self.model.objects.filter(self.expired_q, id__gte=begin, id__lt=end)
+        if self.archive_writer is None:
+            rows = list(expired_records.values("id", *self.related_fields))
+        else:
+            rows = list(expired_records.values())
+            if not rows:
+                return 0
+            for row in rows:
+                # 归档文件不保留敏感信息
+                scrub_instance_info(row.get("instance_info"))
+            file_path: str = self.archive_writer.write(self.table_name, begin, end, rows)
+            logger.info(f"[DataLifecycleManager] archive {self.table_name}[{begin}, {end}) -> {file_path}")
+
+        if not rows:
+            return 0
+        deleted_num: int = self.model.objects.filter(id__in=[row["id"] for row in rows]).delete()[0]
+        if self.on_deleted:
+            self.on_deleted(rows)
+        return deleted_num
+
+    def clean(self, max_chunks: int) -> int:
+        """
+        从游标处开始，清理至多 max_chunks 个区间内的过期数据
+        :param max_chunks: 单次最多处理的区间数
+        :return: 删除的记录数
+        """
+        boundary_id: typing.Optional[int] = self.get_boundary_id()
+        if boundary_id is None:
+            return 0
+
+        deleted_num: int = self.drop_expired_partitions(boundary_id)
+
+        begin: int = self.get_cursor()
+        if begin > boundary_id:
+            begin = 0
+        if begin == 0:
+            begin = self.model.objects.order_by("id").values_list("id", flat=True).first() or 0
+
+        for __ in range(max_chunks):
+            if begin > boundary_id:
+                # 已追平清理上界，游标复位
+                begin = 0
+                break
+            end: int = min(begin + self.chunk_size, boundary_id + 1)
+            deleted_num += self.clean_range(begin, end)
+            begin = end
+
+        self.set_cursor(begin)
+        logger.info(
+            f"[DataLifecycleManager] clean {self.table_name}: boundary_id -> {boundary_id}, "
+            f"cursor -> {begin}, deleted -> {deleted_num}"
+        )
+        return deleted_num
+
+    def list_partitions(self) -> typing.List[typing.Tuple[str, typing.Optional[int]]]:
+        """
+        获取表的 RANGE 分区，仅支持 MySQL
+        :return: [(分区名, 分区上界，MAXVALUE 为 None)]
+        """
+        if connection.vendor != "mysql":
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+                "ORDER BY PARTITION_ORDINAL_POSITION",
+                [self.table_name],
+            )
+            return [
+                (name, None if description == "MAXVALUE" else int(description))
+                for name, description in cursor.fetchall()
+            ]
+
+    def drop_expired_partitions(self, boundary_id: int) -> int:
+        """
+        删除所有记录均已过期的分区，分区需由 DBA 预先以 PARTITION BY RANGE (id) 创建
+        :param boundary_id: 清理上界
+        :return: 删除的记录数
+        """
+        partitions: typing.List[typing.Tuple[str, typing.Optional[int]]] = self.list_partitions()
+        if not partitions:
+            return 0
+
+        deleted_num: int = 0
+        lower_bound: int = 0
+        for name, upper_bound in partitions:
+            if upper_bound is None or upper_bound > boundary_id + 1:
+                break
+            partition_records = self.model.objects.filter(id__gte=lower_bound, id__lt=upper_bound)
+            if not partition_records.exclude(self.expired_q).exists():
+                if self.archive_writer is not None or self.on_deleted:
+                    for begin in range(lower_bound, upper_bound, self.chunk_size):
+                        deleted_num += self.clean_range(begin, min(begin + self.chunk_size, upper_bound))
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ALTER TABLE `{self.table_name}` DROP PARTITION `{name}`")
+                logger.info(f"[DataLifecycleManager] drop partition {self.table_name}.{name}")
+            lower_bound = upper_bound
+
+        self.split_tail_partition(partitions)
+        return deleted_num
+
+    def split_tail_partition(self, partitions: typing.List[typing.Tuple[str, typing.Optional[int]]]):
+        """
+        每日从兜底分区切分出以日期命名的分区，使分区与写入时间对齐
+        :param partitions: 当前分区列表
+        """
+        partition_name: str = f"p{timezone.localtime().strftime('%Y%m%d')}"
+        partition_names: typing.Set[str] = {name for name, __ in partitions}
+        if self.TAIL_PARTITION_NAME not in partition_names or partition_name in partition_names:
+            return
+
+        max_id: typing.Optional[int] = self.model.objects.order_by("-id").values_list("id", flat=True).first()
+        last_upper_bound: int = max([upper_bound for __, upper_bound in partitions if upper_bound] or [0])
+        if max_id is None or max_id < last_upper_bound:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE `{self.table_name}` REORGANIZE PARTITION `{self.TAIL_PARTITION_NAME}` INTO ("
+                f"PARTITION `{partition_name}` VALUES LESS THAN ({max_id + 1}), "
+                f"PARTITION `{self.TAIL_PARTITION_NAME}` VALUES LESS THAN MAXVALUE)"
+            )
+        logger.info(f"[DataLifecycleManager] split partition {self.table_name}.{partition_name} < {max_id + 1}")
+
+
+def get_archive_writer() -> typing.Optional[ArchiveWriter]:
+    """
+    获取冷数据归档，未配置归档目录时返回 None
+    """
+    archive_dir: str = getattr(settings, "SUBSCRIPTION_DATA_ARCHIVE_DIR", "")
+    if not archive_dir:
+        return None
+    return ArchiveWriter(archive_dir=archive_dir)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import hashlib
+import time
+import typing
+from dataclasses import dataclass, field
+
+import ujson as json
+from django.conf import settings
+
+from apps.backend.subscription.constants import (
+    SUBSCRIPTION_SCOPE_FINGERPRINT_EXPIRE,
+    SUBSCRIPTION_SCOPE_FULL_DIFF_INTERVAL,
+)
+from apps.backend.utils.redis import REDIS_INST
+from apps.node_man import constants, models
+from apps.utils.basic import chunk_lists
+
+
+@dataclass
+class ScopeDiff:
+    """订阅范围变更"""
+
+    added: typing.Set[str] = field(default_factory=set)
+    removed: typing.Set[str] = field(default_factory=set)
+    changed: typing.Set[str] = field(default_factory=set)
+    unchanged: typing.Set[str] = field(default_factory=set)
+
+    @property
+    def changed_instance_ids(self) -> typing.Set[str]:
+        """新增及内容发生变化的实例"""
+        return self.added | self.changed
+
+
+class ScopeFingerprint:
+    """
+    订阅范围指纹
+    以 Redis Hash 记录订阅范围内各实例内容的摘要（instance_id -> md5），
+    自动巡检时与上一次的指纹比对，仅对变化的实例进行配置渲染比对等高开销的变更计算
+    """
+
+    FINGERPRINT_KEY_TPL: str = f"{settings.APP_CODE}:backend:subscription:scope_fingerprint:hash:" + "{subscription_id}"
+    META_KEY_TPL: str = f"{settings.APP_CODE}:backend:subscription:scope_fingerprint:meta:hash:" + "{subscription_id}"
+
+    # 每批次写入的指纹数
+    SAVE_BATCH_SIZE: int = 1000
+
+    def __init__(self, subscription: models.Subscription):
+        self.subscription_id: int = subscription.id
+        self.fingerprint_key: str = self.FINGERPRINT_KEY_TPL.format(subscription_id=subscription.id)
+        self.meta_key: str = self.META_KEY_TPL.format(subscription_id=subscription.id)
+        self.steps_signature: str = self.make_steps_signature(subscription)
+
+    @staticmethod
+    def make_fingerprint(instance_info: typing.Dict[str, typing.Any]) -> str:
+        return hashlib.md5(json.dumps(instance_info, sort_keys=True).encode()).hexdigest()
+
+    @classmethod
+    def make_fingerprints(cls, instances: typing.Mapping[str, typing.Dict[str, typing.Any]]) -> typing.Dict[str, str]:
+        return {instance_id: cls.make_fingerprint(instance_info) for instance_id, instance_info in instances.items()}
+
+    @staticmethod
+    def make_steps_signature(subscription: models.Subscription) -> str:
+        """订阅步骤签名，步骤配置或参数变化时需全量计算变更"""
+        steps: typing.List[typing.Dict[str, typing.Any]] = [
+            {"step_id": step.step_id, "type": step.type, "config": step.config, "params": step.params}
+            for step in subscription.steps
+        ]
+        return hashlib.md5(json.dumps(steps, sort_keys=True).encode()).hexdigest()
+
+    def diff(self, instance_id__fingerprint_map: typing.Dict[str, str]) -> typing.Optional[ScopeDiff]:
+        """
+        与上一次保存的指纹比对
+        :param instance_id__fingerprint_map: 当前订阅范围的 实例 ID - 指纹 映射
+        :return: 范围变更，返回 None 表示需全量计算变更（无历史指纹、步骤变化或已到全量周期）
+        """
+        meta: typing.Dict[bytes, bytes] = REDIS_INST.hgetall(self.meta_key)
+        if not meta:
+            return None
+        if meta.get(b"steps_signature", b"").decode() != self.steps_signature:
+            return None
+        if time.time() - float(meta.get(b"full_diff_time", 0)) > SUBSCRIPTION_SCOPE_FULL_DIFF_INTERVAL:
+            return None
+
+        last_fingerprints: typing.Dict[str, str] = {
+            instance_id.decode(): fingerprint.decode()
+            for instance_id, fingerprint in REDIS_INST.hgetall(self.fingerprint_key).items()
+        }
+        scope_diff = ScopeDiff(removed=set(last_fingerprints) - set(instance_id__fingerprint_map))
+        for instance_id, fingerprint in instance_id__fingerprint_map.items():
+            last_fingerprint: typing.Optional[str] = last_fingerprints.get(instance_id)
+            if last_fingerprint is None:
+                scope_diff.added.add(instance_id)
+            elif last_fingerprint != fingerprint:
+                scope_diff.changed.add(instance_id)
+            else:
+                scope_diff.unchanged.add(instance_id)
+
+        # 指纹在任务创建时即已保存，最近一次执行未成功（如配置下发失败）或仍在执行的实例需重新检查，不能仅凭指纹跳过
+        unsettled_instance_ids: typing.Set[str] = (
+            set(
+                models.SubscriptionInstanceRecord.objects.filter(subscription_id=self.subscription_id, is_latest=True)
+                .exclude(status=constants.JobStatusType.SUCCESS)
+                .values_list("instance_id", flat=True)
+            )
+            & scope_diff.unchanged
+        )
+        scope_diff.unchanged -= unsettled_instance_ids
+        scope_diff.changed |= unsettled_instance_ids
+        return scope_diff
+
+    def save(self, instance_id__fingerprint_map: typing.Dict[str, str], is_full_diff: bool):
+        """
+        保存指纹，需在变更计算完成后调用
+        :param instance_id__fingerprint_map: 当前订阅范围的 实例 ID - 指纹 映射
+        :param is_full_diff: 本次是否为全量计算
+        :return:
+        """
+        meta: typing.Dict[str, typing.Any] = {"steps_signature": self.steps_signature}
+        if is_full_diff:
+            meta["full_diff_time"] = time.time()
+
+        pipeline = REDIS_INST.pipeline()
+        pipeline.delete(self.fingerprint_key)
+        for instance_ids in chunk_lists(list(instance_id__fingerprint_map.keys()), self.SAVE_BATCH_SIZE):
+            pipeline.hset(
+                self.fingerprint_key,
+                mapping={instance_id: instance_id__fingerprint_map[instance_id] for instance_id in instance_ids},
+            )
+        pipeline.hset(self.meta_key, mapping=meta)
+        pipeline.expire(self.fingerprint_key, SUBSCRIPTION_SCOPE_FINGERPRINT_EXPIRE)
+        pipeline.expire(self.meta_key, SUBSCRIPTION_SCOPE_FINGERPRINT_EXPIRE)
+        pipeline.execute()
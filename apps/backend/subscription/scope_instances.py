@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import struct
+import sys
+import typing
+import zlib
+from collections.abc import MutableMapping
+
+import ujson as json
+
+
+class ScopeInstance:
+    """
+    订阅范围实例
+    仅常驻实例 ID 及主机 / 服务实例 ID，实例详情（instance_info）以序列化后的形式保存，首次访问时才反序列化
+    """
+
+    __slots__ = ("instance_id", "bk_host_id", "service_instance_id", "_payload", "_instance_info")
+
+    def __init__(
+        self,
+        instance_id: str,
+        bk_host_id: typing.Optional[int] = None,
+        service_instance_id: typing.Optional[int] = None,
+        payload: typing.Optional[bytes] = None,
+        instance_info: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ):
+        self.instance_id: str = sys.intern(instance_id)
+        self.bk_host_id: typing.Optional[int] = bk_host_id
+        self.service_instance_id: typing.Optional[int] = service_instance_id
+        self._payload: typing.Optional[bytes] = payload
+        self._instance_info: typing.Optional[typing.Dict[str, typing.Any]] = instance_info
+
+    @classmethod
+    def from_instance_info(cls, instance_id: str, instance_info: typing.Dict[str, typing.Any]) -> "ScopeInstance":
+        host_info: typing.Dict[str, typing.Any] = instance_info.get("host") or {}
+        service_info: typing.Dict[str, typing.Any] = instance_info.get("service") or {}
+        return cls(
+            instance_id=instance_id,
+            bk_host_id=host_info.get("bk_host_id") or service_info.get("bk_host_id"),
+            service_instance_id=service_info.get("id"),
+            instance_info=instance_info,
+        )
+
+    @property
+    def is_expanded(self) -> bool:
+        return self._instance_info is not None
+
+    @property
+    def instance_info(self) -> typing.Dict[str, typing.Any]:
+        if self._instance_info is None:
+            self._instance_info = json.loads(self._payload)
+            # 展开后以字典为准，调用方可能原地修改实例详情
+            self._payload = None
+        return self._instance_info
+
+    @property
+    def payload(self) -> bytes:
+        if self._instance_info is not None:
+            return json.dumps(self._instance_info).encode()
+        return self._payload
+
+    @property
+    def identity_info(self) -> typing.Dict[str, typing.Dict[str, int]]:
+        """仅包含主机 / 服务实例 ID 的实例信息，用于计算插件组 ID 等场景，避免展开实例详情"""
+        identity_info: typing.Dict[str, typing.Dict[str, int]] = {}
+        if self.bk_host_id is not None:
+            identity_info["host"] = {"bk_host_id": self.bk_host_id}
+        if self.service_instance_id is not None:
+            identity_info["service"] = {"id": self.service_instance_id}
+        return identity_info
+
+
+class ScopeInstances(MutableMapping):
+    """
+    订阅范围实例集合，兼容 get_instances_by_scope 原有的 Dict[实例 ID, 实例详情] 用法
+    - 实例详情按需展开，仅关心实例 ID / 主机 ID 的调用方（统计、范围过滤等）无需反序列化全部实例
+    - 提供紧凑的二进制编码，用于缓存大范围订阅的实例
+    """
+
+    # 编码格式：MAGIC + zlib(记录数 + [ID 长度, 主机 ID, 服务实例 ID, 详情长度, ID, 详情] * 记录数)
+    MAGIC: bytes = b"NMSI\x01"
+    COUNT_STRUCT = struct.Struct("<I")
+    RECORD_HEADER_STRUCT = struct.Struct("<IqqI")
+    # 主机 / 服务实例 ID 为空时的占位值
+    NULL_ID: int = -1
+
+    def __init__(self, records: typing.Iterable[ScopeInstance] = ()):
+        self._records: typing.Dict[str, ScopeInstance] = {record.instance_id: record for record in records}
+
+    @classmethod
+    def from_mapping(cls, instances: typing.Mapping[str, typing.Dict[str, typing.Any]]) -> "ScopeInstances":
+        if isinstance(instances, cls):
+            return instances
+        return cls(
+            ScopeInstance.from_instance_info(instance_id, instance_info)
+            for instance_id, instance_info in instances.items()
+        )
+
+    def __getitem__(self, instance_id: str) -> typing.Dict[str, typing.Any]:
+        return self._records[instance_id].instance_info
+
+    def __setitem__(self, instance_id: str, instance_info: typing.Dict[str, typing.Any]):
+        self._records[instance_id] = ScopeInstance.from_instance_info(instance_id, instance_info)
+
+    def __delitem__(self, instance_id: str):
+        del self._records[instance_id]
+
+    def __contains__(self, instance_id: object) -> bool:
+        return instance_id in self._records
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} len={len(self)}>"
+
+    def update(self, other=(), **kwargs):
+        if isinstance(other, ScopeInstances):
+            # 直接合并记录，避免展开实例详情
+            self._records.update(other._records)
+            other = ()
+        super().update(other, **kwargs)
+
+    def records(self) -> typing.Iterable[ScopeInstance]:
+        return self._records.values()
+
+    def get_record(self, instance_id: str) -> typing.Optional[ScopeInstance]:
+        return self._records.get(instance_id)
+
+    def dumps(self) -> bytes:
+        chunks: typing.List[bytes] = [self.COUNT_STRUCT.pack(len(self._records))]
+        for record in self._records.values():
+            instance_id: bytes = record.instance_id.encode()
+            payload: bytes = record.payload
+            chunks.append(
+                self.RECORD_HEADER_STRUCT.pack(
+                    len(instance_id),
+                    self.NULL_ID if record.bk_host_id is None else record.bk_host_id,
+                    self.NULL_ID if record.service_instance_id is None else record.service_instance_id,
+                    len(payload),
+                )
+            )
+            chunks.append(instance_id)
+            chunks.append(payload)
+        return self.MAGIC + zlib.compress(b"".join(chunks), 1)
+
+    @classmethod
+    def loads(cls, data: typing.Union[bytes, str]) -> "ScopeInstances":
+        if isinstance(data, str) or not data.startswith(cls.MAGIC):
+            # 兼容 JSON 编码的历史缓存
+            return cls.from_mapping(json.loads(data))
+
+        body: bytes = zlib.decompress(data[len(cls.MAGIC) :])
+        (count,) = cls.COUNT_STRUCT.unpack_from(body, 0)
+        offset: int = cls.COUNT_STRUCT.size
+        records: typing.List[ScopeInstance] = []
+        for __ in range(count):
+            id_len, bk_host_id, service_instance_id, payload_len = cls.RECORD_HEADER_STRUCT.unpack_from(body, offset)
+            offset += cls.RECORD_HEADER_STRUCT.size
+            instance_id: str = body[offset : offset + id_len].decode()
+            offset += id_len
+            records.append(
+                ScopeInstance(
+                    instance_id=instance_id,
+                    bk_host_id=None if bk_host_id == cls.NULL_ID else bk_host_id,
+                    service_instance_id=None if service_instance_id == cls.NULL_ID else service_instance_id,
+                    payload=body[offset : offset + payload_len],
+                )
+            )
+            offset += payload_len
+        return cls(records)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+import time
+import typing
+from collections import defaultdict
+
+import ujson as json
+from django.conf import settings
+
+from apps.backend.subscription import tools
+from apps.backend.subscription.scope_instances import ScopeInstances
+from apps.backend.utils.redis import REDIS_INST
+from apps.node_man import models
+
+logger = logging.getLogger("app")
+
+
+def calculate_subscription_statistics(
+    subscription_ids: typing.Iterable[int],
+) -> typing.List[typing.Dict[str, typing.Any]]:
+    """
+    计算订阅的实例状态及插件版本统计
+    :param subscription_ids: 订阅 ID 列表
+    :return: 统计结果列表
+    """
+    subscription_ids: typing.List[int] = list(subscription_ids)
+    subscriptions = models.Subscription.objects.filter(id__in=subscription_ids)
+
+    host_statuses = models.ProcessStatus.objects.filter(
+        source_id__in=subscription_ids, source_type=models.ProcessStatus.SourceType.SUBSCRIPTION
+    ).values("version", "group_id", "name", "id")
+
+    instance_host_statuses = defaultdict(dict)
+    for host_status in host_statuses:
+        instance_host_statuses[host_status["group_id"]][host_status["id"]] = host_status
+
+    subscription_instances = list(
+        models.SubscriptionInstanceRecord.objects.filter(subscription_id__in=subscription_ids, is_latest=True).values(
+            "subscription_id", "instance_id", "status"
+        )
+    )
+    subscription_instance_status_map = defaultdict(dict)
+    for sub_inst in subscription_instances:
+        subscription_instance_status_map[sub_inst["subscription_id"]][sub_inst["instance_id"]] = {
+            "status": sub_inst["status"]
+        }
+
+    sub_statistic_list: typing.List[typing.Dict[str, typing.Any]] = []
+    for subscription in subscriptions:
+        sub_statistic = {"subscription_id": subscription.id, "status": []}
+        current_instances: ScopeInstances = ScopeInstances.from_mapping(
+            tools.get_instances_by_scope(subscription.scope, get_cache=True)
+        )
+
+        status_statistic = {"SUCCESS": 0, "PENDING": 0, "FAILED": 0, "RUNNING": 0}
+        plugin_versions = defaultdict(lambda: defaultdict(int))
+        for scope_instance in current_instances.records():
+            instance_id: str = scope_instance.instance_id
+            try:
+                # 统计仅需主机 / 服务实例 ID，无需展开实例详情
+                group_id = tools.create_group_id(subscription, scope_instance.identity_info)
+            except KeyError:
+                # 在订阅变更 node_type & 缓存不一致时可能会发生，极小概率事件，记录堆栈并忽略
+                logger.exception(
+                    f"create group id failed: subscription -> {subscription.id}, "
+                    f"instance_info -> {scope_instance.instance_info}"
+                )
+                continue
+
+            if group_id not in instance_host_statuses:
+                continue
+
+            if instance_id not in subscription_instance_status_map.get(subscription.id, {}):
+                continue
+
+            sub_instance_status = subscription_instance_status_map[subscription.id][instance_id]
+
+            # 订阅实例任务状态统计
+            status_statistic[sub_instance_status["status"]] += 1
+            # 版本统计
+            host_statuses = instance_host_statuses.get(group_id, {}).values()
+            for host_status in host_statuses:
+                plugin_versions[host_status["name"]][host_status["version"]] += 1
+
+        sub_statistic["versions"] = [
+            {"version": version, "count": count, "name": name}
+            for name, versions in plugin_versions.items()
+            for version, count in versions.items()
+        ]
+        sub_statistic["instances"] = sum(status_statistic.values())
+        for status, count in status_statistic.items():
+            sub_statistic["status"].append({"status": status, "count": count})
+
+        sub_statistic_list.append(sub_statistic)
+
+    return sub_statistic_list
+
+
+class SubscriptionStatisticSnapshot:
+    """
+    订阅统计快照
+    - 统计结果以 Redis Hash 保存（subscription_id -> 统计结果），读取时无需查询 DB 及 CMDB
+    - 订阅实例状态变更时标记订阅为脏数据，由周期任务重新计算
+    - 周期任务同时对超过对账周期的快照进行全量重算，兜底订阅范围（CMDB）等未经标记的变化
+    """
+
+    SNAPSHOT_KEY: str = f"{settings.APP_CODE}:backend:subscription:statistic:snapshot:hash"
+    UPDATE_TIME_KEY: str = f"{settings.APP_CODE}:backend:subscription:statistic:update_time:zset"
+    DIRTY_KEY: str = f"{settings.APP_CODE}:backend:subscription:statistic:dirty:set"
+
+    @classmethod
+    def get_many(cls, subscription_ids: typing.Iterable[int]) -> typing.Dict[int, typing.Dict[str, typing.Any]]:
+        subscription_ids: typing.List[int] = list(subscription_ids)
+        if not subscription_ids:
+            return {}
+        snapshots: typing.List[typing.Optional[bytes]] = REDIS_INST.hmget(cls.SNAPSHOT_KEY, subscription_ids)
+        return {
+            subscription_id: json.loads(snapshot)
+            for subscription_id, snapshot in zip(subscription_ids, snapshots)
+            if snapshot is not None
+        }
+
+    @classmethod
+    def save_many(cls, sub_statistic_list: typing.List[typing.Dict[str, typing.Any]]):
+        if not sub_statistic_list:
+            return
+        now: float = time.time()
+        pipeline = REDIS_INST.pipeline()
+        pipeline.hset(
+            cls.SNAPSHOT_KEY,
+            mapping={
+                sub_statistic["subscription_id"]: json.dumps(sub_statistic) for sub_statistic in sub_statistic_list
+            },
+        )
+        pipeline.zadd(
+            cls.UPDATE_TIME_KEY, {sub_statistic["subscription_id"]: now for sub_statistic in sub_statistic_list}
+        )
+        pipeline.execute()
+
+    @classmethod
+    def delete_many(cls, subscription_ids: typing.Iterable[int]):
+        subscription_ids: typing.List[int] = list(subscription_ids)
+        if not subscription_ids:
+            return
+        pipeline = REDIS_INST.pipeline()
+        pipeline.hdel(cls.SNAPSHOT_KEY, *subscription_ids)
+        pipeline.zrem(cls.UPDATE_TIME_KEY, *subscription_ids)
+        pipeline.execute()
+
+    @classmethod
+    def filter_exists(cls, subscription_ids: typing.Iterable[int]) -> typing.Set[int]:
+        """过滤出已存在快照的订阅"""
+        subscription_ids: typing.List[int] = list(subscription_ids)
+        if not subscription_ids:
+            return set()
+        pipeline = REDIS_INST.pipeline()
+        for subscription_id in subscription_ids:
+            pipeline.hexists(cls.SNAPSHOT_KEY, subscription_id)
+        return {
+            subscription_id for subscription_id, is_exists in zip(subscription_ids, pipeline.execute()) if is_exists
+        }
+
+    @classmethod
+    def mark_dirty(cls, subscription_ids: typing.Iterable[int]):
+        subscription_ids: typing.List[int] = list(subscription_ids)
+        if subscription_ids:
+            REDIS_INST.sadd(cls.DIRTY_KEY, *subscription_ids)
+
+    @classmethod
+    def pop_dirty(cls, count: int) -> typing.Set[int]:
+        return {int(subscription_id) for subscription_id in REDIS_INST.spop(cls.DIRTY_KEY, count) or []}
+
+    @classmethod
+    def list_stale(cls, expire: int, count: int) -> typing.Set[int]:
+        """
+        获取超过对账周期的快照
+        :param expire: 对账周期（秒）
+        :param count: 最大数量
+        :return: 订阅 ID 集合
+        """
+        subscription_ids: typing.List[bytes] = REDIS_INST.zrangebyscore(
+            cls.UPDATE_TIME_KEY, "-inf", time.time() - expire, start=0, num=count
+        )
+        return {int(subscription_id) for subscription_id in subscription_ids}
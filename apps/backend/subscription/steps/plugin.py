@@ -245,6 +245,7 @@ class PluginStep(Step):
         ap_id_obj_map: Dict,
         process_status_list: List[Dict[str, Any]],
         proc_status_id__configs_map: Dict[int, List[Dict]],
+        context_base: Optional[tools.SubscriptionStepsContextBase] = None,
     ) -> Dict[str, Union[bool, str]]:
         """检测配置是否有变动"""
         try:
@@ -256,7 +257,12 @@ class PluginStep(Step):
                     raise ApIDNotExistsError()
                 agent_config = ap.agent_config[target_host.os_type.lower()]
                 context = tools.get_all_subscription_steps_context(
-                    subscription_step, instance_info, target_host, process_status["name"], agent_config
+                    subscription_step,
+                    instance_info,
+                    target_host,
+                    process_status["name"],
+                    agent_config,
+                    context_base=context_base,
                 )
 
                 rendered_configs = tools.render_config_files_by_config_templates(
@@ -530,6 +536,8 @@ class PluginStep(Step):
             proc_configs["id"]: proc_configs["configs"] for proc_configs in proc_configs_list
         }
 
+        # 与主机无关的上下文数据仅计算一次，各实例共享
+        context_base = tools.SubscriptionStepsContextBase(self.subscription_step, self.plugin_name)
         check_config_change_params_list: List[Dict] = []
         for instance_id in instance_ids:
             check_config_change_params_list.append(
@@ -541,6 +549,7 @@ class PluginStep(Step):
                     "ap_id_obj_map": ap_id_obj_map,
                     "process_status_list": instance_id__proc_statuses_map[instance_id],
                     "proc_status_id__configs_map": proc_status_id__configs_map,
+                    "context_base": context_base,
                 }
             )
 
@@ -703,8 +712,10 @@ class PluginStep(Step):
         :param instances: dict 变更后的实例列表
         :param auto_trigger: bool 是否自动触发
         :param preview_only: 是否仅预览，若为true则不做任何保存或执行动作
+        :param changed_instance_ids: 相较上一次计算新增或发生变化的实例，为 None 时对全部实例进行配置变更检查
         :return: dict 需要对哪些实例做哪些动作
         """
+        changed_instance_ids: Optional[Set[str]] = kwargs.get("changed_instance_ids")
         migrate_reasons = {}
 
         def _push_migrate_reason(_instance_id: str, **_extra_info):
@@ -838,6 +849,9 @@ class PluginStep(Step):
                         )
 
                 # 如果配置文件变化，则需要重新下发
+                # 实例及订阅步骤均未变化时渲染结果不变，跳过配置渲染比对
+                if changed_instance_ids is not None and instance_id not in changed_instance_ids:
+                    continue
                 if instance_actions.get(instance_id) in [None, action_dict["start_action"]]:
                     wait_for_config_check_instance_ids.append(instance_id)
                     instance_id__proc_statuses_map[instance_id] = process_statuses
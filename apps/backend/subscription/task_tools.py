@@ -11,7 +11,7 @@ specific language governing permissions and limitations under the License.
 import logging
 import traceback
 from collections import defaultdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from django.db import transaction
 from django.db.models import QuerySet
@@ -112,12 +112,19 @@ class TaskResultTools:
         fields = ["id", "subscription_instance_record_id", "node_id", "status", "update_time", "create_time"]
         if need_detail:
             fields.append("log")
+        sub_inst_ids: Set[int] = set([inst_record.id for inst_record in instance_records])
         node_id_inst_status_detail_map = {
             f"{status_detail['node_id']}-{status_detail['subscription_instance_record_id']}": status_detail
             for status_detail in models.SubscriptionInstanceStatusDetail.objects.filter(
-                subscription_instance_record_id__in=set([inst_record.id for inst_record in instance_records])
+                subscription_instance_record_id__in=sub_inst_ids
             ).values(*fields)
         }
+        if need_detail:
+            # 原子执行过程中的日志追加写入日志表，拼接到状态详情的初始日志之后
+            node_id_inst_log_map = models.SubscriptionInstanceLog.get_node_id_inst_log_map(sub_inst_ids)
+            for node_id_inst_key, status_detail in node_id_inst_status_detail_map.items():
+                if node_id_inst_key in node_id_inst_log_map:
+                    status_detail["log"] = f"{status_detail['log']}\n{node_id_inst_log_map[node_id_inst_key]}"
 
         instance_status_list = []
         for instance_record in instance_records:
@@ -25,6 +25,7 @@ from apps.backend.components.collections.base import ActivityType
 from apps.backend.subscription import tools
 from apps.backend.subscription.constants import TASK_HOST_LIMIT
 from apps.backend.subscription.errors import SubscriptionInstanceEmpty
+from apps.backend.subscription.scope_diff import ScopeDiff, ScopeFingerprint
 from apps.backend.subscription.steps import StepFactory, agent
 from apps.core.gray.tools import GrayTools
 from apps.node_man import constants, models
@@ -497,7 +498,8 @@ def run_subscription_task_and_create_instance(
     }
     """
     # 如果不传范围，则使用订阅全部范围
-    if not scope:
+    is_full_scope: bool = not scope
+    if is_full_scope:
         scope = subscription.scope
     else:
         scope["object_type"] = subscription.object_type
@@ -508,6 +510,20 @@ def run_subscription_task_and_create_instance(
     logger.info(f"run_subscription_task[{subscription_task.id}] instances_num={len(instances)}")
     # 创建步骤管理器实例
     step_managers = {step.step_id: StepFactory.get_step_manager(step) for step in subscription.steps}
+    # 仅自动巡检全部范围时进行增量变更计算，手动触发或指定范围、动作的场景保持全量计算
+    scope_fingerprint: Optional[ScopeFingerprint] = None
+    if all(
+        [
+            subscription_task.is_auto_trigger,
+            is_full_scope,
+            actions is None,
+            not preview_only,
+            models.GlobalSettings.get_config(
+                key=models.GlobalSettings.KeyEnum.ENABLE_INCREMENTAL_SCOPE_DIFF.value, default=False
+            ),
+        ]
+    ):
+        scope_fingerprint = ScopeFingerprint(subscription)
     # 删除无用subscription缓存，否则执行延时任务时传入可能引起pickle异常
     if hasattr(subscription, "_steps"):
         delattr(subscription, "_steps")
@@ -525,13 +541,29 @@ def run_subscription_task_and_create_instance(
         f"run_subscription_task[{subscription_task.id}] pre-inject meta to instances[num={len(instances)}] successfully"
     )
 
+    instance_id__fingerprint_map: Dict[str, str] = {}
+    scope_diff: Optional[ScopeDiff] = None
+    if scope_fingerprint is not None:
+        # 指纹需包含 Meta，灰度等信息变化时同样需要重新检查
+        instance_id__fingerprint_map = scope_fingerprint.make_fingerprints(instances)
+        scope_diff = scope_fingerprint.diff(instance_id__fingerprint_map)
+        if scope_diff is not None:
+            logger.info(
+                f"run_subscription_task[{subscription_task.id}] incremental scope diff: "
+                f"added -> {len(scope_diff.added)}, removed -> {len(scope_diff.removed)}, "
+                f"changed -> {len(scope_diff.changed)}, unchanged -> {len(scope_diff.unchanged)}"
+            )
+
     # 按步骤顺序计算实例变更所需的动作
     instance_actions = defaultdict(dict)
     instance_migrate_reasons = defaultdict(dict)
     for step in step_managers.values():
         # 计算变更的动作
         migrate_results = step.make_instances_migrate_actions(
-            instances, auto_trigger=subscription_task.is_auto_trigger, preview_only=preview_only
+            instances,
+            auto_trigger=subscription_task.is_auto_trigger,
+            preview_only=preview_only,
+            changed_instance_ids=None if scope_diff is None else scope_diff.changed_instance_ids,
         )
         # 归类变更动作
         # eg: {"host|instance|host|1": "MAIN_INSTALL_PLUGIN"}
@@ -595,9 +627,18 @@ def run_subscription_task_and_create_instance(
 
         instances.update(deleted_instance_info)
 
-    create_task_result = create_task(
-        subscription, subscription_task, instances, instance_actions, preview_only=preview_only
-    )
+    try:
+        create_task_result = create_task(
+            subscription, subscription_task, instances, instance_actions, preview_only=preview_only
+        )
+    except SubscriptionInstanceEmpty:
+        # 无需变更同样视为计算完成，记录本次指纹
+        if scope_fingerprint is not None:
+            scope_fingerprint.save(instance_id__fingerprint_map, is_full_diff=scope_diff is None)
+        raise
+
+    if scope_fingerprint is not None:
+        scope_fingerprint.save(instance_id__fingerprint_map, is_full_diff=scope_diff is None)
 
     return {
         "to_be_created_records_map": create_task_result["to_be_created_records_map"],
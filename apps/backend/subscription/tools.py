@@ -8,7 +8,6 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-import copy
 import hashlib
 import ipaddress
 import logging
@@ -32,7 +31,8 @@ from apps.backend.subscription.errors import (
     MultipleObjectError,
     PipelineTreeParseError,
 )
-from apps.backend.utils.data_renderer import nested_render_data
+from apps.backend.subscription.scope_instances import ScopeInstances
+from apps.backend.utils.data_renderer import JINJA_TEMPLATE_CACHE, nested_render_data
 from apps.component.esbclient import client_v2
 from apps.exceptions import ComponentCallError
 from apps.node_man import constants, models
@@ -112,6 +112,9 @@ def get_module_to_topo_dict(bk_biz_id: int) -> Dict:
         "module|1": ["biz|2", "set|3", "module|1"]
     }
     """
+    if node_man_tools.BizHostTopoCache.is_enabled():
+        return node_man_tools.BizHostTopoCache.get_topo_nodes(bk_biz_id)["module_to_topo"]
+
     topo_tree = client_v2.cc.search_biz_inst_topo({"bk_username": "admin", "bk_biz_id": bk_biz_id})
     internal_module = client_v2.cc.get_biz_internal_module({"bk_biz_id": bk_biz_id})
 
@@ -638,7 +641,11 @@ def get_host_relation(bk_biz_id, nodes):
     data = []
     hosts = get_host_by_inst(bk_biz_id, nodes)
 
-    host_biz_relations = find_host_biz_relations([_host["bk_host_id"] for _host in hosts])
+    bk_host_ids = [_host["bk_host_id"] for _host in hosts]
+    if node_man_tools.BizHostTopoCache.is_enabled():
+        host_biz_relations = node_man_tools.BizHostTopoCache.get_host_topo_relations(bk_biz_id, bk_host_ids)
+    else:
+        host_biz_relations = find_host_biz_relations(bk_host_ids)
 
     relations = defaultdict(lambda: defaultdict(list))
     for item in host_biz_relations:
@@ -672,7 +679,7 @@ def support_multi_biz(get_instances_by_scope_func):
             if None in [node.get("bk_biz_id") for node in scope["nodes"]]:
                 return get_instances_by_scope_func(scope, **kwargs)
 
-        instance_id_info_map = {}
+        instance_id_info_map = ScopeInstances()
         nodes = sorted(scope["nodes"], key=lambda node: node["bk_biz_id"])
         params_list = [
             {
@@ -696,8 +703,10 @@ def support_multi_biz(get_instances_by_scope_func):
 
 
 @support_multi_biz
-@func_cache_decorator(cache_time=SUBSCRIPTION_SCOPE_CACHE_TIME)
-def get_instances_by_scope(scope: Dict[str, Union[Dict, int, Any]]) -> Dict[str, Dict[str, Union[Dict, Any]]]:
+@func_cache_decorator(
+    cache_time=SUBSCRIPTION_SCOPE_CACHE_TIME, encoder=ScopeInstances.dumps, decoder=ScopeInstances.loads
+)
+def get_instances_by_scope(scope: Dict[str, Union[Dict, int, Any]]) -> ScopeInstances:
     """
     获取范围内的所有主机
     :param scope: dict {
@@ -724,7 +733,7 @@ def get_instances_by_scope(scope: Dict[str, Union[Dict, int, Any]]) -> Dict[str,
             }
         ]
     }
-    :return: dict {
+    :return: ScopeInstances {
         "host|instance|host|xxxx": {...},
         "host|instance|host|yyyy": {...},
     }
@@ -732,7 +741,7 @@ def get_instances_by_scope(scope: Dict[str, Union[Dict, int, Any]]) -> Dict[str,
     instance_selector = scope.get("instance_selector")
     # 不进行主机筛选时传入 None，传入空列表则识别为全部过滤
     if instance_selector == []:
-        return {}
+        return ScopeInstances()
 
     instances = []
     bk_biz_id = scope["bk_biz_id"]
@@ -744,7 +753,7 @@ def get_instances_by_scope(scope: Dict[str, Union[Dict, int, Any]]) -> Dict[str,
     nodes = scope["nodes"]
     if not nodes:
         # 兼容节点为空的情况
-        return {}
+        return ScopeInstances()
 
     need_register = scope.get("need_register", False)
     # 按照拓扑查询
@@ -810,7 +819,7 @@ def get_instances_by_scope(scope: Dict[str, Union[Dict, int, Any]]) -> Dict[str,
         add_scope_info_to_instances(nodes, scope, instances, module_to_topo)
         add_process_info_to_instances(bk_biz_id, scope, instances)
 
-    instances_dict = {}
+    instances_dict = ScopeInstances()
     data = {
         "object_type": scope["object_type"],
         "node_type": models.Subscription.NodeType.INSTANCE,
@@ -834,7 +843,7 @@ def get_instances_by_scope(scope: Dict[str, Union[Dict, int, Any]]) -> Dict[str,
             return_all_node_type=True
         ).values_list("bk_host_id", flat=True)
 
-        selector_instances_dict = {}
+        selector_instances_dict = ScopeInstances()
         for node_id, instance in instances_dict.items():
             is_host = data["object_type"] == models.Subscription.ObjectType.HOST
             instance_data = instance["host"] if is_host else instance["service"]
@@ -1015,57 +1024,97 @@ def get_plugin_common_constants(plugin_name: str) -> Dict:
     return plugin_constants
 
 
+class SubscriptionStepsContextBase:
+    """
+    订阅步骤上下文基础层
+    - 与主机无关的数据（步骤管理器、步骤参数上下文、插件公共常量）按订阅步骤计算一次，在多台主机间共享
+    - 每台主机仅在此基础上叠加主机相关数据，生成上下文时无需重复查询及深拷贝
+    - 共享数据不可修改，渲染时通过 nested_render_data 写时复制
+    """
+
+    def __init__(self, subscription_step: models.SubscriptionStep, plugin_name: str):
+        """
+        :param subscription_step: 订阅步骤
+        :param plugin_name: 插件名称
+        """
+        from apps.backend.subscription.steps import StepFactory
+
+        self.subscription_step = subscription_step
+        self.plugin_name = plugin_name
+        self.steps: List[models.SubscriptionStep] = subscription_step.subscription.steps
+        self.step_id__params_context_map: Dict[str, Dict] = {
+            step.step_id: order_dict(step.params.get("context") or {}) for step in self.steps
+        }
+        self.step_id__manager_map: Dict[str, Any] = {
+            step.step_id: StepFactory.get_step_manager(step) for step in self.steps
+        }
+        # 获取插件配置公共常量
+        self.plugin_common_constants: Dict = get_plugin_common_constants(plugin_name)
+
+    def make_context(self, instance_info: Dict, target_host: models.Host, agent_config: Dict) -> Dict:
+        """
+        叠加主机相关数据，生成上下文
+        :param instance_info: 实例信息
+        :param target_host: 主机信息
+        :param agent_config: AGENT配置
+        :return:
+        """
+        context = {}
+        all_step_data = {}
+        for step in self.steps:
+            step_context = dict(self.step_id__params_context_map[step.step_id])
+            step_context.update(
+                self.step_id__manager_map[step.step_id].get_step_data(instance_info, target_host, agent_config)
+            )
+            all_step_data[step.step_id] = step_context
+
+        plugin_path = get_plugin_path(self.plugin_name, target_host, agent_config)
+        # 当前step_id的数据单独拎出来，作为 shortcut
+        context.update(all_step_data[self.subscription_step.step_id])
+        context.update(
+            cmdb_instance=instance_info,
+            step_data=all_step_data,
+            target=instance_info,
+            plugin_path=plugin_path,
+            nodeman={
+                "host": {
+                    "bk_host_id": target_host.bk_host_id,
+                    "os_type": target_host.os_type,
+                    "cpu_arch": target_host.cpu_arch,
+                    "inner_ip": target_host.inner_ip,
+                    "outer_ip": target_host.outer_ip,
+                    "login_ip": target_host.login_ip,
+                },
+                "constants": self.plugin_common_constants,
+            },
+        )
+        return context
+
+
 def get_all_subscription_steps_context(
     subscription_step: models.SubscriptionStep,
     instance_info: Dict,
     target_host: models.Host,
     plugin_name: str,
     agent_config: Dict,
+    context_base: SubscriptionStepsContextBase = None,
 ) -> Dict:
     """
     获取订阅步骤上下文数据
+    返回的上下文与 context_base 及 instance_info 共享嵌套数据，仅可通过 nested_render_data 或模板渲染读取
     :param agent_config:
     :param SubscriptionStep subscription_step:
     :param dict instance_info: 实例信息
     :param dict target_host: 主机信息
     :param string plugin_name: 插件名称
+    :param context_base: 上下文基础层，批量渲染时传入以复用与主机无关的数据
     :return:
     """
-    from apps.backend.subscription.steps import StepFactory
-
-    context = {}
-    all_step_data = {}
-    for step in subscription_step.subscription.steps:
-        step_context = order_dict(step.params.get("context") or {})
-        step_context.update(StepFactory.get_step_manager(step).get_step_data(instance_info, target_host, agent_config))
-        all_step_data[step.step_id] = step_context
-
-    plugin_path = get_plugin_path(plugin_name, target_host, agent_config)
-    # 当前step_id的数据单独拎出来，作为 shortcut
-    context.update(all_step_data[subscription_step.step_id])
-    context.update(
-        cmdb_instance=instance_info,
-        step_data=all_step_data,
-        target=instance_info,
-        plugin_path=plugin_path,
-        nodeman={
-            "host": {
-                "bk_host_id": target_host.bk_host_id,
-                "os_type": target_host.os_type,
-                "cpu_arch": target_host.cpu_arch,
-                "inner_ip": target_host.inner_ip,
-                "outer_ip": target_host.outer_ip,
-                "login_ip": target_host.login_ip,
-            },
-            # 获取插件配置公共常量
-            "constants": get_plugin_common_constants(plugin_name),
-        },
-    )
-    # 深拷贝一份，避免原数据后续被污染
-    context = copy.deepcopy(context)
-    return context
+    context_base = context_base or SubscriptionStepsContextBase(subscription_step, plugin_name)
+    return context_base.make_context(instance_info, target_host, agent_config)
 
 
+@JINJA_TEMPLATE_CACHE.record_stats
 def render_config_files(
     config_instances: List[models.PluginConfigInstance],
     host_status: models.ProcessStatus,
@@ -1120,6 +1169,7 @@ def render_config_files(
     return rendered_configs
 
 
+@JINJA_TEMPLATE_CACHE.record_stats
 def render_config_files_by_config_templates(
     config_templates: List[models.PluginConfigTemplate],
     process_status_info: Dict[str, Any],
@@ -1167,7 +1217,7 @@ def render_config_files_by_config_templates(
         else:
             # 非官方插件、官方插件中的主配置文件，无需追加 group id
             # 适配模板名可渲染的形式
-            rendered_config["name"] = nested_render_data(template.name, context)
+            rendered_config["name"] = nested_render_data(template.name, context, template_id=template.id)
         if rendered_config["name"]:
             rendered_configs.append(rendered_config)
     return rendered_configs
@@ -603,13 +603,22 @@ class AgentServiceBaseTestCase(CustomAPITestCase, ComponentTestMixin, ABC):
             sub_inst_id = sub_inst_status_detail_obj.subscription_instance_record_id
             sub_inst_id__status_detail_obj_map[sub_inst_id] = sub_inst_status_detail_obj
 
+        node_id_inst_log_map: Dict[str, str] = models.SubscriptionInstanceLog.get_node_id_inst_log_map(
+            self.common_inputs["subscription_instance_ids"]
+        )
+
         for sub_inst_obj in self.obj_factory.sub_inst_record_objs:
             print(f"sub_inst_id -> {sub_inst_obj.id} | ip -> {sub_inst_obj.instance_info['host']['bk_host_innerip']}")
             sub_inst_status_detail_obj = sub_inst_id__status_detail_obj_map.get(sub_inst_obj.id)
             if sub_inst_status_detail_obj is None:
                 log = "There is no SubscriptionInstanceStatusDetail"
             else:
-                log = sub_inst_status_detail_obj.log
+                log = "\n".join(
+                    [
+                        sub_inst_status_detail_obj.log,
+                        node_id_inst_log_map.get(f"{sub_inst_status_detail_obj.node_id}-{sub_inst_obj.id}", ""),
+                    ]
+                )
             # 多行缩进，参考：https://stackoverflow.com/questions/8234274/
             print(textwrap.indent(log, 4 * " "))
 
@@ -10,9 +10,14 @@ specific language governing permissions and limitations under the License.
 """
 
 import datetime
+import gzip
+import json
+import os
+import shutil
 import typing
 from itertools import cycle
 
+from django.test import override_settings
 from django.utils import timezone
 
 from apps.backend.periodic_tasks.clean_subscription_data import clean_subscription_data
@@ -22,8 +27,10 @@ from apps.node_man import constants
 from apps.node_man.models import (
     GlobalSettings,
     JobSubscriptionInstanceMap,
+    SubscriptionInstanceLog,
     SubscriptionInstanceStatusDetail,
 )
+from apps.utils import files
 from apps.utils.unittest.testcase import CustomBaseTestCase
 
 
@@ -106,3 +113,58 @@ class SubscriptionCleanTestCase(CustomBaseTestCase):
         self.assertEqual(SubscriptionInstanceStatusDetail.objects.count(), 75)
         # JOB 映射表没有时间概念，只要状态符合就会被清理，默认不清理，所以为 100
         self.assertEqual(JobSubscriptionInstanceMap.objects.count(), 100)
+
+    def test_sub_inst_log_clean(self):
+        node_id: str = "45f9d4adc1c24e499891c69bc80172bc"
+        SubscriptionInstanceStatusDetail.objects.all().delete()
+        SubscriptionInstanceStatusDetail.objects.bulk_create(
+            [
+                SubscriptionInstanceStatusDetail(
+                    subscription_instance_record_id=sub_inst_id, node_id=node_id, log="", status=status
+                )
+                for sub_inst_id, status in [(1, constants.JobStatusType.SUCCESS), (2, constants.JobStatusType.FAILED)]
+            ]
+        )
+        SubscriptionInstanceLog.objects.bulk_create(
+            [
+                SubscriptionInstanceLog(subscription_instance_record_id=sub_inst_id, node_id=node_id, log="log")
+                for sub_inst_id in [1, 2]
+                for _ in range(10)
+            ]
+        )
+        # created_at 为 auto_now_add，需在创建后更新
+        SubscriptionInstanceLog.objects.update(created_at=timezone.now() - datetime.timedelta(days=50))
+
+        clean_subscription_data()
+        # 默认保留失败原子的日志
+        self.assertEqual(
+            set(SubscriptionInstanceLog.objects.values_list("subscription_instance_record_id", flat=True)), {2}
+        )
+
+    def test_sub_clean_with_lifecycle_manager(self):
+        sub_clean_map: typing.Dict[str, typing.Any] = {
+            "enable_lifecycle_manager": True,
+            "limit": 10,
+            "max_chunks": 3,
+            "sub_ins_detail_save_log_status": [constants.JobStatusType.SUCCESS],
+            "job_map_clean_status": self.job_sub_instance_clean_status,
+        }
+        GlobalSettings.set_config(GlobalSettings.KeyEnum.CLEAN_SUBSCRIPTION_DATA_MAP.value, sub_clean_map)
+        archive_dir: str = files.mk_and_return_tmpdir()
+        with override_settings(SUBSCRIPTION_DATA_ARCHIVE_DIR=archive_dir):
+            # 每次最多处理 3 个区间，多次执行后追平清理上界
+            for _ in range(4):
+                clean_subscription_data()
+
+        self.assertEqual(SubscriptionInstanceStatusDetail.objects.count(), 75)
+        self.assertEqual(JobSubscriptionInstanceMap.objects.count(), 0)
+
+        # 删除前已归档
+        archived_ids: typing.List[int] = []
+        table_archive_dir: str = os.path.join(archive_dir, SubscriptionInstanceStatusDetail._meta.db_table)
+        for file_name in os.listdir(table_archive_dir):
+            with gzip.open(os.path.join(table_archive_dir, file_name), "rt") as fs:
+                archived_ids.extend([json.loads(line)["id"] for line in fs])
+        self.assertEqual(len(archived_ids), 25)
+        self.assertFalse(SubscriptionInstanceStatusDetail.objects.filter(id__in=archived_ids).exists())
+        shutil.rmtree(archive_dir)
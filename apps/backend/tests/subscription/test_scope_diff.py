@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import typing
+
+from apps.backend.subscription.scope_diff import ScopeFingerprint
+from apps.backend.utils.redis import REDIS_INST
+from apps.node_man import constants, models
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class TestScopeFingerprint(CustomBaseTestCase):
+    SUBSCRIPTION_ID = 10001
+
+    @staticmethod
+    def gen_instances(bk_host_ids: typing.Iterable[int]) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        return {
+            f"host|instance|host|{bk_host_id}": {"host": {"bk_host_id": bk_host_id}, "process": {}}
+            for bk_host_id in bk_host_ids
+        }
+
+    def gen_subscription(self, params: typing.Dict[str, typing.Any]) -> models.Subscription:
+        subscription = models.Subscription(id=self.SUBSCRIPTION_ID)
+        subscription.steps = [
+            models.SubscriptionStep(
+                subscription_id=self.SUBSCRIPTION_ID,
+                step_id="bkmonitorbeat",
+                type="PLUGIN",
+                config={"plugin_name": "bkmonitorbeat"},
+                params=params,
+            )
+        ]
+        return subscription
+
+    def setUp(self) -> None:
+        super().setUp()
+        scope_fingerprint = ScopeFingerprint(self.gen_subscription(params={}))
+        REDIS_INST.delete(scope_fingerprint.fingerprint_key, scope_fingerprint.meta_key)
+
+    def test_diff(self):
+        scope_fingerprint = ScopeFingerprint(self.gen_subscription(params={}))
+        fingerprints = scope_fingerprint.make_fingerprints(self.gen_instances([1, 2, 3]))
+        # 无历史指纹，需全量计算
+        self.assertIsNone(scope_fingerprint.diff(fingerprints))
+        scope_fingerprint.save(fingerprints, is_full_diff=True)
+
+        instances = self.gen_instances([2, 3, 4])
+        instances["host|instance|host|3"]["meta"] = {"GSE_VERSION": "V2"}
+        scope_diff = scope_fingerprint.diff(scope_fingerprint.make_fingerprints(instances))
+        self.assertEqual(scope_diff.added, {"host|instance|host|4"})
+        self.assertEqual(scope_diff.removed, {"host|instance|host|1"})
+        self.assertEqual(scope_diff.changed, {"host|instance|host|3"})
+        self.assertEqual(scope_diff.unchanged, {"host|instance|host|2"})
+        self.assertEqual(scope_diff.changed_instance_ids, {"host|instance|host|3", "host|instance|host|4"})
+
+    def test_steps_changed(self):
+        scope_fingerprint = ScopeFingerprint(self.gen_subscription(params={}))
+        fingerprints = scope_fingerprint.make_fingerprints(self.gen_instances([1, 2]))
+        scope_fingerprint.save(fingerprints, is_full_diff=True)
+        self.assertEqual(len(scope_fingerprint.diff(fingerprints).unchanged), 2)
+
+        # 步骤参数变化，需全量计算
+        scope_fingerprint = ScopeFingerprint(self.gen_subscription(params={"context": {"interval": 60}}))
+        self.assertIsNone(scope_fingerprint.diff(fingerprints))
+
+    def test_unsettled_instances(self):
+        scope_fingerprint = ScopeFingerprint(self.gen_subscription(params={}))
+        fingerprints = scope_fingerprint.make_fingerprints(self.gen_instances([1, 2, 3]))
+        scope_fingerprint.save(fingerprints, is_full_diff=True)
+        for bk_host_id, status in [(1, constants.JobStatusType.SUCCESS), (2, constants.JobStatusType.FAILED)]:
+            models.SubscriptionInstanceRecord.objects.create(
+                task_id=1,
+                subscription_id=self.SUBSCRIPTION_ID,
+                instance_id=f"host|instance|host|{bk_host_id}",
+                instance_info={},
+                steps=[],
+                status=status,
+            )
+
+        # 最近一次执行失败的实例即使指纹未变化也需重新检查
+        scope_diff = scope_fingerprint.diff(fingerprints)
+        self.assertEqual(scope_diff.changed, {"host|instance|host|2"})
+        self.assertEqual(scope_diff.unchanged, {"host|instance|host|1", "host|instance|host|3"})
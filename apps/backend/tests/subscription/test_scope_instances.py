@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import typing
+
+import ujson as json
+
+from apps.backend.subscription.scope_instances import ScopeInstances
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class TestScopeInstances(CustomBaseTestCase):
+    @staticmethod
+    def gen_instances(num: int) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        return {
+            f"host|instance|host|{bk_host_id}": {
+                "host": {"bk_host_id": bk_host_id, "bk_host_innerip": f"127.0.0.{bk_host_id % 255}", "module": [1]},
+                "scope": [{"bk_obj_id": "module", "bk_inst_id": 1}],
+                "process": {},
+            }
+            for bk_host_id in range(1, num + 1)
+        }
+
+    def test_dumps_and_loads(self):
+        instances = self.gen_instances(100)
+        scope_instances = ScopeInstances.loads(ScopeInstances.from_mapping(instances).dumps())
+        self.assertEqual(len(scope_instances), 100)
+        # 仅访问实例 ID 及主机 ID 时，不展开实例详情
+        self.assertEqual({record.bk_host_id for record in scope_instances.records()}, set(range(1, 101)))
+        self.assertFalse(any(record.is_expanded for record in scope_instances.records()))
+        self.assertEqual(scope_instances, instances)
+
+    def test_loads_json_cache(self):
+        instances = self.gen_instances(10)
+        self.assertEqual(ScopeInstances.loads(json.dumps(instances)), instances)
+
+    def test_mutate(self):
+        scope_instances = ScopeInstances.loads(ScopeInstances.from_mapping(self.gen_instances(2)).dumps())
+        # 原地修改展开后的实例详情，修改需要保留
+        scope_instances["host|instance|host|1"]["meta"] = {"GSE_VERSION": "V2"}
+        self.assertEqual(
+            ScopeInstances.loads(scope_instances.dumps())["host|instance|host|1"]["meta"], {"GSE_VERSION": "V2"}
+        )
+
+        other_instances = ScopeInstances.from_mapping(self.gen_instances(3))
+        scope_instances.update(other_instances)
+        self.assertEqual(len(scope_instances), 3)
+
+    def test_identity_info(self):
+        scope_instances = ScopeInstances.from_mapping(
+            {"service|instance|service|1": {"service": {"id": 1, "bk_host_id": 2}, "host": {"bk_host_id": 2}}}
+        )
+        record = scope_instances.get_record("service|instance|service|1")
+        self.assertEqual(record.identity_info, {"host": {"bk_host_id": 2}, "service": {"id": 1}})
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from apps.backend.subscription.statistic import SubscriptionStatisticSnapshot
+from apps.backend.utils.redis import REDIS_INST
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class TestSubscriptionStatisticSnapshot(CustomBaseTestCase):
+    def setUp(self) -> None:
+        REDIS_INST.delete(
+            SubscriptionStatisticSnapshot.SNAPSHOT_KEY,
+            SubscriptionStatisticSnapshot.UPDATE_TIME_KEY,
+            SubscriptionStatisticSnapshot.DIRTY_KEY,
+        )
+        super().setUp()
+
+    @staticmethod
+    def gen_statistic(subscription_id: int):
+        return {
+            "subscription_id": subscription_id,
+            "status": [{"status": "SUCCESS", "count": 1}],
+            "versions": [{"version": "1.0.0", "count": 1, "name": "bkmonitorbeat"}],
+            "instances": 1,
+        }
+
+    def test_save_and_get(self):
+        SubscriptionStatisticSnapshot.save_many([self.gen_statistic(1), self.gen_statistic(2)])
+        self.assertEqual(SubscriptionStatisticSnapshot.get_many([1, 3]), {1: self.gen_statistic(1)})
+        self.assertEqual(SubscriptionStatisticSnapshot.filter_exists([1, 2, 3]), {1, 2})
+
+        SubscriptionStatisticSnapshot.delete_many([2])
+        self.assertEqual(SubscriptionStatisticSnapshot.filter_exists([1, 2, 3]), {1})
+
+    def test_dirty_and_stale(self):
+        SubscriptionStatisticSnapshot.mark_dirty([1, 2, 2])
+        self.assertEqual(SubscriptionStatisticSnapshot.pop_dirty(10), {1, 2})
+        self.assertEqual(SubscriptionStatisticSnapshot.pop_dirty(10), set())
+
+        SubscriptionStatisticSnapshot.save_many([self.gen_statistic(1)])
+        # 刚生成的快照未超过对账周期
+        self.assertEqual(SubscriptionStatisticSnapshot.list_stale(expire=60, count=10), set())
+        self.assertEqual(SubscriptionStatisticSnapshot.list_stale(expire=-1, count=10), {1})
@@ -8,9 +8,11 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import tempfile
+
 from django.test import TestCase
 
-from apps.backend.utils.data_renderer import nested_render_data
+from apps.backend.utils.data_renderer import JinjaTemplateCache, nested_render_data
 
 
 class TestDataRenderer(TestCase):
@@ -229,3 +231,36 @@ tasks:
       CMDB_LABEL_2: "anything"
     \n    """
         self.assertEqual(content, expect_content)
+
+    def test_nested_render_data_copy_on_write(self):
+        shared_data = {"static": {"port": 80}, "labels": ["{{ ip }}", "fixed"]}
+        context = {"ip": "127.0.0.1", "shared": shared_data, "addr": "{{ ip }}:{{ shared.static.port }}"}
+        rendered_context = nested_render_data(context, context)
+        # 第一层原地渲染
+        self.assertIs(rendered_context, context)
+        self.assertEqual(context["addr"], "127.0.0.1:80")
+        # 嵌套数据写时复制，共享数据不被修改，未变化的部分复用原对象
+        self.assertEqual(context["shared"]["labels"], ["127.0.0.1", "fixed"])
+        self.assertEqual(shared_data["labels"], ["{{ ip }}", "fixed"])
+        self.assertIs(context["shared"]["static"], shared_data["static"])
+
+
+class TestJinjaTemplateCache(TestCase):
+    def test_lru(self):
+        cache = JinjaTemplateCache(maxsize=2)
+        self.assertEqual(cache.get_template("{{ a }}", template_id=1).render({"a": 1}), "1")
+        # 相同模板 ID 及内容命中缓存
+        self.assertIs(cache.get_template("{{ a }}", template_id=1), cache.get_template("{{ a }}", template_id=1))
+        cache.get_template("{{ b }}", template_id=1)
+        cache.get_template("{{ c }}", template_id=2)
+        self.assertEqual(cache.snapshot(), {"size": 2, "hit": 2, "miss": 3})
+        # 最久未使用的模板已被淘汰，重新编译
+        cache.get_template("{{ a }}", template_id=1)
+        self.assertEqual(cache.snapshot(), {"size": 2, "hit": 2, "miss": 4})
+
+    def test_bytecode_cache(self):
+        with tempfile.TemporaryDirectory() as bytecode_cache_dir:
+            JinjaTemplateCache(maxsize=2, bytecode_cache_dir=bytecode_cache_dir).get_template("{{ a }}")
+            # 新进程内缓存从字节码加载
+            template = JinjaTemplateCache(maxsize=2, bytecode_cache_dir=bytecode_cache_dir).get_template("{{ a }}")
+            self.assertEqual(template.render({"a": "x"}), "x")
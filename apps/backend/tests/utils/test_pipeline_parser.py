@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import typing
+
+from apps.backend.utils.pipeline_parser import (
+    ActType,
+    ParsedPipelineTreeCache,
+    parse_pipeline,
+)
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class TestPipelineParser(CustomBaseTestCase):
+    @staticmethod
+    def gen_pipeline() -> typing.Dict[str, typing.Any]:
+        """start -> act1 -> parallel -> (act2, act3) -> converge -> end"""
+        flows = {
+            f"flow{idx}": {"id": f"flow{idx}", "source": source, "target": target}
+            for idx, (source, target) in enumerate(
+                [
+                    ("start", "act1"),
+                    ("act1", "parallel"),
+                    ("parallel", "act2"),
+                    ("parallel", "act3"),
+                    ("act2", "converge"),
+                    ("act3", "converge"),
+                    ("converge", "end"),
+                ]
+            )
+        }
+        return {
+            "id": "pipeline",
+            "start_event": {"id": "start", "type": ActType.START, "outgoing": "flow0"},
+            "end_event": {"id": "end", "type": ActType.END, "incoming": ["flow6"], "outgoing": ""},
+            "activities": {
+                "act1": {"id": "act1", "type": ActType.SERVICE, "name": "act1", "outgoing": "flow1"},
+                "act2": {"id": "act2", "type": ActType.SERVICE, "name": "act2", "outgoing": "flow4"},
+                "act3": {"id": "act3", "type": ActType.SERVICE, "name": "act3", "outgoing": "flow5"},
+            },
+            "gateways": {
+                "parallel": {"id": "parallel", "type": ActType.PARALLEL, "outgoing": ["flow2", "flow3"]},
+                "converge": {"id": "converge", "type": ActType.CONVERGE, "outgoing": "flow6"},
+            },
+            "flows": flows,
+        }
+
+    def test_parse_pipeline(self):
+        children = parse_pipeline(self.gen_pipeline())
+        self.assertEqual(list(children.keys()), ["act1", "parallel"])
+        self.assertEqual(children["act1"]["index"], 0)
+        self.assertEqual(children["parallel"]["index"], 1)
+        self.assertEqual(set(children["parallel"]["children"].keys()), {"act2", "act3"})
+
+    def test_parsed_pipeline_tree_cache(self):
+        cache = ParsedPipelineTreeCache(maxsize=2)
+        cache.set_many({"p1": {"children": {}}, "p2": {"children": {}}})
+        # 访问 p1 后，p2 成为最久未使用的记录，写入 p3 时被淘汰
+        self.assertEqual(set(cache.get_many(["p1"])), {"p1"})
+        cache.set_many({"p3": {"children": {}}})
+        self.assertEqual(set(cache.get_many(["p1", "p2", "p3"])), {"p1", "p3"})
@@ -14,7 +14,10 @@ from typing import Any, Dict
 
 import ujson as json
 
-from apps.backend.constants import REDIS_INSTALL_CALLBACK_KEY_TPL
+from apps.backend.constants import (
+    REDIS_INSTALL_CALLBACK_KEY_TPL,
+    REDIS_INSTALL_CALLBACK_NOTIFY_KEY_TPL,
+)
 from apps.backend.utils.redis import REDIS_INST
 from apps.node_man import constants
 
@@ -25,15 +28,18 @@ class ReportLogTestCase(ViewBaseTestCase):
     def setUp(self) -> None:
         super().setUp()
         # 每个 case 执行前移除 redis 日志列表
-        REDIS_INST.delete(self.gen_redis_list_key())
+        REDIS_INST.delete(self.gen_redis_list_key(), self.gen_redis_notify_key())
 
     def tearDown(self) -> None:
         super().tearDown()
-        REDIS_INST.delete(self.gen_redis_list_key())
+        REDIS_INST.delete(self.gen_redis_list_key(), self.gen_redis_notify_key())
 
     def gen_redis_list_key(self) -> str:
         return REDIS_INSTALL_CALLBACK_KEY_TPL.format(sub_inst_id=self.SUB_INST_ID)
 
+    def gen_redis_notify_key(self) -> str:
+        return REDIS_INSTALL_CALLBACK_NOTIFY_KEY_TPL.format(node_id=self.PIPELINE_ID)
+
     @classmethod
     def gen_log(cls) -> Dict[str, Any]:
         return {
@@ -81,3 +87,10 @@ class ReportLogTestCase(ViewBaseTestCase):
             REDIS_INST.lrange(self.gen_redis_list_key(), 0, 0)[0].decode(encoding="utf-8"),
             json.dumps(second_query_params["logs"][-1]),
         )
+
+    def test_notify(self):
+        """验证上报日志后通知对应节点"""
+        self.query_report_log()
+        self.query_report_log()
+        self.assertEqual(REDIS_INST.smembers(self.gen_redis_notify_key()), {str(self.SUB_INST_ID).encode()})
+        self.assertTrue(REDIS_INST.ttl(self.gen_redis_notify_key()) > 0)
@@ -9,17 +9,137 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 import copy
+import hashlib
 import logging
+import threading
+import typing
+from collections import OrderedDict, defaultdict
+from functools import wraps
 
 import six
-from jinja2 import Template
+from django.conf import settings
+from jinja2 import Environment, FileSystemBytecodeCache, Template
+
+from apps.prometheus import helper as prometheus_helper
 
 """
 jinja2渲染相关的公共函数
 """
 logger = logging.getLogger("app")
 
-TEMPLATE_CACHE = {}
+
+class JinjaTemplateCache(object):
+    """
+    已编译的 Jinja 模板缓存，按 (模板 ID, 模板内容 MD5) 进行 LRU 淘汰
+    - 所有模板共享同一个 Environment，避免每个 Template 各自构造编译环境
+    - 配置了字节码缓存时，进程重启后可直接加载字节码，无需重新解析模板
+    """
+
+    # 命中进程内缓存
+    HIT = "hit"
+    # 未命中，需要加载字节码或重新编译
+    MISS = "miss"
+
+    def __init__(
+        self,
+        maxsize: int,
+        environment: typing.Optional[Environment] = None,
+        bytecode_cache_dir: typing.Optional[str] = None,
+    ):
+        """
+        :param maxsize: 最多缓存的模板数量
+        :param environment: 编译环境，默认与 jinja2.Template 的默认配置保持一致
+        :param bytecode_cache_dir: 字节码缓存目录，为空时不启用
+        """
+        self.maxsize = maxsize
+        self.environment = environment or Environment()
+        self.bytecode_cache: typing.Optional[FileSystemBytecodeCache] = None
+        if bytecode_cache_dir:
+            self.bytecode_cache = FileSystemBytecodeCache(directory=bytecode_cache_dir)
+        self._cache: typing.Dict[typing.Tuple[str, str], Template] = OrderedDict()
+        self._counters: typing.Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(source: str, template_id: typing.Optional[typing.Union[int, str]] = None) -> typing.Tuple[str, str]:
+        return str(template_id or ""), hashlib.md5(source.encode()).hexdigest()
+
+    def compile(self, source: str, name: str) -> Template:
+        if not self.bytecode_cache:
+            return self.environment.from_string(source)
+
+        # 参考 jinja2.loaders.BaseLoader.load，优先从字节码缓存中加载
+        bucket = self.bytecode_cache.get_bucket(self.environment, name, None, source)
+        code = bucket.code
+        if code is None:
+            code = self.environment.compile(source, name)
+            bucket.code = code
+            try:
+                self.bytecode_cache.set_bucket(bucket)
+            except Exception as err:
+                # 磁盘缓存写入失败不影响渲染
+                logger.warning(f"[JinjaTemplateCache] set bytecode cache failed: name -> {name}, err -> {err}")
+        return self.environment.template_class.from_code(self.environment, code, self.environment.make_globals(None))
+
+    def get_template(self, source: str, template_id: typing.Optional[typing.Union[int, str]] = None) -> Template:
+        """
+        获取已编译的模板
+        :param source: 模板内容
+        :param template_id: 模板 ID，用于区分来源，为空时仅按模板内容缓存
+        :return: Template
+        """
+        key = self.make_key(source, template_id)
+        with self._lock:
+            template = self._cache.get(key)
+            if template is not None:
+                self._cache.move_to_end(key)
+                self._counters[self.HIT] += 1
+        if template is not None:
+            prometheus_helper.inc_counter("jinja_template_cache_events", labels=[self.HIT])
+            return template
+
+        # 编译耗时较长，不在锁内进行，并发编译同一模板时以后写入的为准
+        template = self.compile(source, name=":".join(key))
+        with self._lock:
+            self._counters[self.MISS] += 1
+            self._cache[key] = template
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        prometheus_helper.inc_counter("jinja_template_cache_events", labels=[self.MISS])
+        return template
+
+    def snapshot(self) -> typing.Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._cache), self.HIT: self._counters[self.HIT], self.MISS: self._counters[self.MISS]}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._counters.clear()
+
+    def record_stats(self, func: typing.Callable) -> typing.Callable:
+        """装饰器：记录被装饰函数执行期间的缓存命中情况，多线程渲染时为近似值"""
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            before: typing.Dict[str, int] = self.snapshot()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                after: typing.Dict[str, int] = self.snapshot()
+                logger.debug(
+                    f"[JinjaTemplateCache] {func.__name__}: hit -> {after[self.HIT] - before[self.HIT]}, "
+                    f"miss -> {after[self.MISS] - before[self.MISS]}, size -> {after['size']}"
+                )
+
+        return wrapper
+
+
+JINJA_TEMPLATE_CACHE = JinjaTemplateCache(
+    maxsize=getattr(settings, "JINJA_TEMPLATE_CACHE_SIZE", 2000),
+    bytecode_cache_dir=getattr(settings, "JINJA_BYTECODE_CACHE_DIR", ""),
+)
 
 
 def find_element(element, dict_data):
@@ -36,24 +156,34 @@ def find_element(element, dict_data):
     return rv
 
 
-def nested_render_data(data, context):
+def render_string(data, context, template_id=None):
     """
-    递归渲染字典中的模板字符串
+    渲染模板字符串
+    :param data: 模板字符串
+    :param context: 上下文
+    :param template_id: 模板 ID，仅用于区分模板缓存来源
+    """
+    if "{{" not in data:
+        # 无 jinja 占位符，直接跳过
+        return data
+    try:
+        # 尝试渲染用户参数，一旦失败，立即返回原数据
+        return JINJA_TEMPLATE_CACHE.get_template(data, template_id=template_id).render(context)
+    except Exception as err:
+        logger.exception(f"nested_render_data error: {err}")
+        return data
+
+
+def copy_on_write_render(data, context):
+    """
+    递归渲染嵌套数据，不修改原数据
+    字典 / 列表仅在其中有值被渲染时才复制，未变化的部分直接复用原对象
+    :param data: 待渲染数据
+    :param context: 上下文
+    :return: 渲染后的数据，无变化时返回原对象
     """
     if isinstance(data, six.string_types):
-        if "{{" not in data:
-            # 无 jinja 占位符，直接跳过
-            return data
-        try:
-            # 尝试渲染用户参数，一旦失败，立即返回原数据
-            template = TEMPLATE_CACHE.get(data)
-            if not template:
-                template = Template(data)
-                TEMPLATE_CACHE[data] = template
-            return template.render(context)
-        except Exception as err:
-            logger.exception(f"nested_render_data error: {err}")
-            return data
+        return render_string(data, context)
     elif isinstance(data, dict):
         if "$for" in data and "$item" in data and "$body" in data:
             # 循环动态变量解析
@@ -64,16 +194,49 @@ def nested_render_data(data, context):
             for item in for_list:
                 # 临时设置上下文
                 context[data["$item"]] = item
-                # 深拷贝一次，防止原始模板被修改
-                body_data = copy.deepcopy(data["$body"])
-                data_list.append(nested_render_data(body_data, context))
+                data_list.append(copy_on_write_render(data["$body"], context))
                 # 恢复上下文
                 context.pop(data["$item"])
             return data_list
 
+        rendered_data = None
+        for key, value in data.items():
+            rendered_value = copy_on_write_render(value, context)
+            if rendered_value is not value:
+                if rendered_data is None:
+                    rendered_data = copy.copy(data)
+                rendered_data[key] = rendered_value
+        return data if rendered_data is None else rendered_data
+    elif isinstance(data, list):
+        rendered_data = None
+        for index, value in enumerate(data):
+            rendered_value = copy_on_write_render(value, context)
+            if rendered_value is not value:
+                if rendered_data is None:
+                    rendered_data = list(data)
+                rendered_data[index] = rendered_value
+        return data if rendered_data is None else rendered_data
+    return data
+
+
+def nested_render_data(data, context, template_id=None):
+    """
+    递归渲染字典中的模板字符串
+    第一层字典 / 列表原地渲染，后渲染的值可以引用先渲染的结果（如使用上下文渲染上下文自身）
+    更深层的嵌套数据写时复制，不会被修改，因此上下文可以与其他主机共享嵌套数据，无需深拷贝
+    :param data: 待渲染数据
+    :param context: 上下文
+    :param template_id: 模板 ID，仅用于区分模板缓存来源
+    """
+    if isinstance(data, six.string_types):
+        return render_string(data, context, template_id=template_id)
+    elif isinstance(data, dict):
+        if "$for" in data and "$item" in data and "$body" in data:
+            return copy_on_write_render(data, context)
+
         for key, value in data.items():
-            data[key] = nested_render_data(value, context)
+            data[key] = copy_on_write_render(value, context)
     elif isinstance(data, list):
         for index, value in enumerate(data):
-            data[index] = nested_render_data(value, context)
+            data[index] = copy_on_write_render(value, context)
     return data
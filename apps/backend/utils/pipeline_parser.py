@@ -10,7 +10,9 @@ specific language governing permissions and limitations under the License.
 """
 
 import logging
-from collections import defaultdict
+import threading
+import typing
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 
 from django.db.models import F, Q
@@ -61,18 +63,9 @@ class ActType(object):
 def get_next(pipeline, outgoing):
     if not outgoing:
         return None
-    for flow in pipeline["flows"]:
-        if flow == outgoing:
-            target = pipeline["flows"][flow]["target"]
-            break
-
-    for act in pipeline["activities"]:
-        if act == target:
-            return pipeline["activities"][act]
-
-    for gt in pipeline["gateways"]:
-        if gt == target:
-            return pipeline["gateways"][gt]
+    # flows / activities / gateways 均以节点 ID 为键，直接索引，避免每条连线都遍历全部节点
+    target = pipeline["flows"][outgoing]["target"]
+    return pipeline["activities"].get(target) or pipeline["gateways"].get(target)
 
 
 def parse_act(pipeline, act):
@@ -139,6 +132,45 @@ def check_running_records(records_queryset):
     return False
 
 
+class ParsedPipelineTreeCache(object):
+    """
+    已解析的 pipeline 树缓存，按 pipeline_id 进行 LRU 淘汰
+    pipeline 树创建后不再变更，解析结果可在多次查询间复用，避免重复加载及解析拓扑
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._cache: typing.Dict[str, typing.Dict[str, typing.Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, pipeline_ids: typing.Iterable[str]) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        pipeline_id__tree_map: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        with self._lock:
+            for pipeline_id in pipeline_ids:
+                if pipeline_id in self._cache:
+                    self._cache.move_to_end(pipeline_id)
+                    pipeline_id__tree_map[pipeline_id] = self._cache[pipeline_id]
+        return pipeline_id__tree_map
+
+    def set_many(self, pipeline_id__tree_map: typing.Dict[str, typing.Dict[str, typing.Any]]):
+        with self._lock:
+            for pipeline_id, tree in pipeline_id__tree_map.items():
+                self._cache[pipeline_id] = tree
+                self._cache.move_to_end(pipeline_id)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# 进程内缓存的已解析 pipeline 树数量，单页任务详情通常不超过该数量
+PARSED_PIPELINE_TREE_CACHE_SIZE = 2000
+
+PARSED_PIPELINE_TREE_CACHE = ParsedPipelineTreeCache(maxsize=PARSED_PIPELINE_TREE_CACHE_SIZE)
+
+
 class PipelineParser(object):
     """
     pipeline 数据解析器
@@ -163,14 +195,20 @@ class PipelineParser(object):
     def sorted_pipeline_tree(self):
         if hasattr(self, "_sorted_pipeline_tree"):
             return self._sorted_pipeline_tree
-        sorted_pipeline_tree = {}
-        for pipeline_tree in self.pipeline_trees:
-            pipeline = pipeline_tree.tree
-            if not pipeline:
-                continue
-            single_sorted_pipeline_tree = parse_pipeline(pipeline)
-
-            sorted_pipeline_tree.update({pipeline["id"]: {"children": single_sorted_pipeline_tree}})
+        # 已解析过的 pipeline 树直接复用，仅加载并解析未命中缓存的部分
+        sorted_pipeline_tree = PARSED_PIPELINE_TREE_CACHE.get_many(self.pipeline_ids)
+        missing_pipeline_ids = set(self.pipeline_ids) - set(sorted_pipeline_tree)
+        if missing_pipeline_ids:
+            from apps.node_man.models import PipelineTree
+
+            parsed_pipeline_tree = {}
+            for pipeline_tree in PipelineTree.objects.filter(id__in=missing_pipeline_ids):
+                pipeline = pipeline_tree.tree
+                if not pipeline:
+                    continue
+                parsed_pipeline_tree[pipeline["id"]] = {"children": parse_pipeline(pipeline)}
+            PARSED_PIPELINE_TREE_CACHE.set_many(parsed_pipeline_tree)
+            sorted_pipeline_tree.update(parsed_pipeline_tree)
         self._sorted_pipeline_tree = sorted_pipeline_tree
         return sorted_pipeline_tree
 
@@ -24,6 +24,7 @@ from django.views.decorators.csrf import csrf_exempt
 from apps.backend.constants import (
     REDIS_AGENT_CONF_KEY_TPL,
     REDIS_INSTALL_CALLBACK_KEY_TPL,
+    REDIS_INSTALL_CALLBACK_NOTIFY_KEY_TPL,
 )
 from apps.backend.serializers.views import PackageDownloadSerializer
 from apps.backend.subscription.steps.agent_adapter import legacy
@@ -147,6 +148,14 @@ def report_log(request):
     json_dumps_logs = [json.dumps(log) for log in data["logs"]]
     # 日志会被 Service 消费并持久化，在 Redis 保留一段时间便于排查「主机 -api-> Redis -log-> DB」 上的问题
     LPUSH_AND_EXPIRE_FUNC(keys=[name], args=[constants.TimeUnit.DAY] + json_dumps_logs)
+
+    # 通知安装调度有新日志，是否按通知调度由 Service 侧开关控制，此处总是写入，避免在高频回调接口上查询配置
+    # 通知集合与日志列表在集群模式下可能位于不同 slot，不能在同一脚本中操作，单独写入
+    notify_name = REDIS_INSTALL_CALLBACK_NOTIFY_KEY_TPL.format(node_id=decrypted_token["task_id"])
+    with REDIS_INST.pipeline(transaction=False) as pipe:
+        pipe.sadd(notify_name, decrypted_token["inst_id"])
+        pipe.expire(notify_name, constants.TimeUnit.DAY)
+        pipe.execute()
     return JsonResponse({})
 
 
@@ -14,6 +14,7 @@ from django_mysql.models import QuerySet
 
 from .. import constants, types
 from ..tools import base
+from ..tools.host_tool import HostTool
 from .base import BaseHandler
 
 
@@ -40,6 +41,7 @@ class HostHandler:
         # 获取主机信息
         host_fields: typing.List[str] = constants.CommonEnum.DEFAULT_HOST_FIELDS.value
         untreated_host_infos: typing.List[types.HostInfo] = list(host_queryset.values(*host_fields))
+        HostTool.fill_cached_agent_state_info_to_hosts(untreated_host_infos)
         return BaseHandler.format_hosts(untreated_host_infos)
 
     @classmethod
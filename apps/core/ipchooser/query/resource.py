@@ -17,7 +17,7 @@ from django.utils.translation import ugettext_lazy as _
 from apps.core.concurrent import controller
 from apps.node_man import constants as node_man_constants
 from apps.utils import concurrent
-from apps.utils.batch_request import batch_request
+from apps.utils.batch_request import batch_request, batch_request_iter
 from common.api import CCApi
 
 from .. import constants, exceptions, types
@@ -93,6 +93,11 @@ class ResourceQueryHelper:
 
     @staticmethod
     def fetch_host_topo_relations(bk_biz_id: int) -> typing.List[typing.Dict]:
+        # node_man.tools 依赖 ipchooser，此处延迟导入避免循环引用
+        from apps.node_man.tools.biz_host_topo import BizHostTopoCache
+
+        if BizHostTopoCache.is_enabled():
+            return BizHostTopoCache.get_host_topo_relations(bk_biz_id)
         host_topo_relations: typing.List[typing.Dict] = batch_request(
             func=CCApi.find_host_topo_relation,
             params={"bk_biz_id": bk_biz_id, "no_request": True},
@@ -124,3 +129,71 @@ class ResourceQueryHelper:
         if host_property_filter:
             query_params["host_property_filter"] = host_property_filter
         return batch_request(func=CCApi.list_biz_hosts, params=query_params)
+
+    @staticmethod
+    def iter_biz_hosts(
+        bk_biz_id: int,
+        fields: typing.List[str] = None,
+        filter_obj_id: typing.Optional[str] = None,
+        filter_inst_ids: typing.Optional[typing.List[int]] = None,
+        host_property_filter: typing.Optional[typing.Dict] = None,
+    ) -> typing.Iterator[typing.List[types.HostInfo]]:
+        """
+        流式查询业务主机，参数同 fetch_biz_hosts，逐页返回主机，调用方可边取边处理
+        :return: 主机分页迭代器
+        """
+        query_params: typing.Dict[str, typing.Union[int, typing.Dict, typing.List[int]]] = {
+            "bk_biz_id": bk_biz_id,
+            "fields": fields or node_man_constants.CC_HOST_FIELDS,
+            "no_request": True,
+        }
+        if filter_inst_ids:
+            query_params[f"bk_{filter_obj_id}_ids"] = filter_inst_ids
+        if host_property_filter:
+            query_params["host_property_filter"] = host_property_filter
+        return batch_request_iter(func=CCApi.list_biz_hosts, params=query_params)
+
+    @staticmethod
+    @controller.ConcurrentController(
+        data_list_name="filter_inst_ids",
+        batch_call_func=concurrent.batch_call,
+        extend_result=True,
+        get_config_dict_func=lambda: {"limit": 200},
+    )
+    def fetch_biz_host_id_list(
+        bk_biz_id: int,
+        filter_obj_id: typing.Optional[str] = None,
+        filter_inst_ids: typing.Optional[typing.List[int]] = None,
+    ) -> typing.List[int]:
+        """
+        查询业务主机 ID 列表，拓扑节点按 200 个一组并发查询，逐页收集，无需在内存中保留完整的主机列表
+        :param bk_biz_id: 业务 ID
+        :param filter_obj_id: 过滤的拓扑节点类型
+        :param filter_inst_ids: 过滤的拓扑节点 ID 列表
+        :return: 主机 ID 列表
+        """
+        bk_host_ids: typing.List[int] = []
+        for host_infos in ResourceQueryHelper.iter_biz_hosts(
+            bk_biz_id=bk_biz_id, fields=["bk_host_id"], filter_obj_id=filter_obj_id, filter_inst_ids=filter_inst_ids
+        ):
+            bk_host_ids.extend(host_info["bk_host_id"] for host_info in host_infos)
+        return bk_host_ids
+
+    @classmethod
+    def fetch_biz_host_ids(
+        cls,
+        bk_biz_id: int,
+        filter_obj_id: typing.Optional[str] = None,
+        filter_inst_ids: typing.Optional[typing.List[int]] = None,
+    ) -> typing.Set[int]:
+        """
+        查询业务主机 ID 集合
+        :param bk_biz_id: 业务 ID
+        :param filter_obj_id: 过滤的拓扑节点类型
+        :param filter_inst_ids: 过滤的拓扑节点 ID 列表
+        :return: 主机 ID 集合
+        """
+        bk_host_ids: typing.List[int] = cls.fetch_biz_host_id_list(
+            bk_biz_id=bk_biz_id, filter_obj_id=filter_obj_id, filter_inst_ids=filter_inst_ids
+        )
+        return set(bk_host_ids)
@@ -302,10 +302,9 @@ class HostQuerySqlHelper:
                         "filter_inst_ids": list(set(bk_set_ids)),
                     }
 
-                host_infos: typing.List[types.HostInfo] = resource.ResourceQueryHelper.fetch_biz_hosts(
-                    bk_biz_id=topo_biz_id, fields=["bk_host_id"], **extra_kwargs
+                host_ids: typing.Set[int] = resource.ResourceQueryHelper.fetch_biz_host_ids(
+                    bk_biz_id=topo_biz_id, **extra_kwargs
                 )
-                host_ids: typing.Set[int] = {host_info["bk_host_id"] for host_info in host_infos}
 
                 if topo_host_ids is None:
                     topo_host_ids = host_ids
@@ -11,10 +11,11 @@ specific language governing permissions and limitations under the License.
 import typing
 
 from apps.node_man.constants import QUERY_AGENT_STATUS_HOST_LENS
-from apps.node_man.models import Host
+from apps.node_man.models import GlobalSettings, Host
 from apps.node_man.periodic_tasks.sync_agent_status_task import (
     update_or_create_host_agent_status,
 )
+from apps.node_man.tools.agent_state import AgentStateCache
 from common.log import logger
 
 
@@ -22,13 +23,17 @@ class HostTool:
     @classmethod
     def fill_agent_state_info_to_hosts(cls, host_infos: typing.List[typing.Dict[str, typing.Any]]):
         """
-        实时查询 Agent 状态，并填充到主机信息列表中
+        实时查询 Agent 状态，并填充到主机信息列表中，开启 Agent 状态缓存时改为读取缓存
         :param host_infos: 主机信息列表
         :return:
         """
         if len(host_infos) > QUERY_AGENT_STATUS_HOST_LENS:
             return
 
+        if cls.is_agent_state_cache_enabled():
+            cls._fill_cached_agent_state_info_to_hosts(host_infos)
+            return
+
         bk_host_ids: typing.List[int] = [host_info["bk_host_id"] for host_info in host_infos]
 
         try:
@@ -48,3 +53,48 @@ class HostTool:
                 host_info["version"] = host_id__agent_state_info[bk_host_id]["version"]
             except KeyError:
                 pass
+
+    @staticmethod
+    def is_agent_state_cache_enabled() -> bool:
+        return GlobalSettings.get_config(key=GlobalSettings.KeyEnum.ENABLE_AGENT_STATE_CACHE.value, default=False)
+
+    @classmethod
+    def fill_cached_agent_state_info_to_hosts(cls, host_infos: typing.List[typing.Dict[str, typing.Any]]):
+        """
+        开启 Agent 状态缓存时，使用缓存中的 Agent 状态覆盖主机信息列表中 DB 记录的状态
+        :param host_infos: 主机信息列表
+        :return:
+        """
+        if len(host_infos) > QUERY_AGENT_STATUS_HOST_LENS or not cls.is_agent_state_cache_enabled():
+            return
+        cls._fill_cached_agent_state_info_to_hosts(host_infos)
+
+    @classmethod
+    def _fill_cached_agent_state_info_to_hosts(cls, host_infos: typing.List[typing.Dict[str, typing.Any]]):
+        """
+        从缓存读取 Agent 状态并填充到主机信息列表中，缓存缺失或过期的主机异步刷新，请求内不查询 GSE 及写入 DB
+        缓存缺失的主机保持 DB 中记录的状态
+        :param host_infos: 主机信息列表
+        :return:
+        """
+        try:
+            host_id__agent_state_map, to_be_refreshed_host_ids = AgentStateCache.get_many(
+                [host_info["bk_host_id"] for host_info in host_infos]
+            )
+            to_be_refreshed_host_ids = AgentStateCache.acquire_refresh(to_be_refreshed_host_ids)
+            if to_be_refreshed_host_ids:
+                update_or_create_host_agent_status.delay(
+                    "[fill_agent_state_info_to_hosts]", Host.objects.filter(bk_host_id__in=to_be_refreshed_host_ids)
+                )
+        except Exception as e:
+            # 获取主机状态信息失败，跳过填充步骤
+            logger.error(f"fill_cached_agent_state_info_to_hosts error: {e}")
+            return
+
+        for host_info in host_infos:
+            agent_state: typing.Optional[typing.Dict[str, typing.Any]] = host_id__agent_state_map.get(
+                host_info["bk_host_id"]
+            )
+            if agent_state:
+                host_info["status"] = agent_state["status_display"]
+                host_info["version"] = agent_state["version"]
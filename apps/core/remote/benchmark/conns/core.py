@@ -272,3 +272,87 @@ def do_performance(nums: typing.List[int], repeat: int, call_func: typing.Callab
             f"call_func -> {call_func.__name__}, num -> {num}, cost -> {round(total_cost / repeat, 3)} \n"
             f"{'-' * 150} \n\n"
         )
+
+
+class HandshakeCountingAsyncsshConn(conns.AsyncsshConn):
+    """统计实际建立的 SSH 连接（握手及认证）次数"""
+
+    handshake_num: int = 0
+
+    async def _connect(self):
+        conn = await super()._connect()
+        HandshakeCountingAsyncsshConn.handshake_num += 1
+        return conn
+
+
+def gen_local_login_infos(num: int, port: int, username: str, password: str) -> typing.List[LoginInfo]:
+    """
+    生成本地 sshd 的登录信息，通过 127.0.0.0/8 的不同地址模拟多台主机
+    :param num: 主机数量
+    :param port: sshd 端口
+    :param username: 用户名
+    :param password: 密码
+    :return:
+    """
+    return [
+        LoginInfo(
+            login_id=idx, ip=f"127.0.{idx // 254}.{idx % 254 + 1}", port=port, username=username, password=password
+        )
+        for idx in range(num)
+    ]
+
+
+@ExceptionHandler(exc_handler=exc_handler)
+async def execute_install_steps_with_asyncssh(
+    login_info: LoginInfo, cmds: typing.List[str], pool: typing.Optional[conns.AsyncsshConnPool] = None
+) -> typing.List[str]:
+    """模拟 Windows 主机安装流程：SSH 通道检测获取一次连接，文件推送及命令执行在同一连接上进行"""
+    conn_params = dict(
+        host=login_info.ip,
+        username=login_info.username,
+        port=login_info.port,
+        password=login_info.password,
+        pool=pool,
+        # 全部主机视为同一分组，用于验证分组连接数限制
+        pool_group=0,
+    )
+    # SSH 通道检测
+    async with HandshakeCountingAsyncsshConn(**conn_params):
+        pass
+    # 文件推送 -> 命令执行
+    outputs: typing.List[str] = []
+    async with HandshakeCountingAsyncsshConn(**conn_params) as conn:
+        async with await conn.file_client() as file_client:
+            await file_client.makedirs(path="/tmp/nm_benchmark")
+        for cmd in cmds:
+            run_result: conns.RunOutput = await conn.run(cmd, check=True)
+            outputs.append(f"cmd -> {cmd}, stdout -> {run_result.stdout}, stderr -> {run_result.stderr}")
+    return outputs
+
+
+def do_handshake_performance(login_infos: typing.List[LoginInfo], limit_per_group: typing.Optional[int] = None):
+    """
+    对比使用连接池前后的握手次数及耗时
+    本地 sshd 用法：do_handshake_performance(gen_local_login_infos(100, 22, "root", "password"))
+    :param login_infos: 登录信息
+    :param limit_per_group: 连接池单个分组的最大连接数
+    """
+    for is_pooled in [False, True]:
+        HandshakeCountingAsyncsshConn.handshake_num = 0
+        begin = time.time()
+        with conns.AsyncsshConnPool(limit_per_group=limit_per_group) as pool:
+            results = concurrent.batch_call_coroutine(
+                func=execute_install_steps_with_asyncssh,
+                params_list=[
+                    {"login_info": login_info, "cmds": CMDS[:1], "pool": (None, pool)[is_pooled]}
+                    for login_info in login_infos
+                ],
+                loop=pool.loop,
+            )
+        cost = time.time() - begin
+        logging.error(
+            f"pooled -> {is_pooled}, total -> {len(results)}, failed -> {len([r for r in results if r is None])}, "
+            f"handshakes -> {HandshakeCountingAsyncsshConn.handshake_num}, "
+            f"handshakes per host -> {round(HandshakeCountingAsyncsshConn.handshake_num / len(login_infos), 3)}, "
+            f"cost -> {round(cost, 3)}"
+        )
@@ -10,6 +10,10 @@ specific language governing permissions and limitations under the License.
 """
 
 import abc
+import functools
+import hashlib
+import os
+import shlex
 import typing
 
 import asyncssh
@@ -19,6 +23,9 @@ from apps.utils import exc
 
 from .. import exceptions
 
+# 文件读取分块大小
+CHUNK_SIZE = 64 * 1024
+
 
 def exc_handler(
     wrapped: typing.Callable,
@@ -88,6 +95,21 @@ class AsyncSFTPClient(FileBaseClient):
     async def makedirs(self, path: str):
         await self._client.makedirs(path, exist_ok=True)
 
+    @exc.ExceptionHandler(exc_handler=exc_handler)
+    async def resume_put(self, localpath: str, remotepath: str, offset: int):
+        """
+        从指定位置续传文件
+        :param localpath: 本地文件路径
+        :param remotepath: 远程文件路径
+        :param offset: 续传起始位置，远程文件在该位置前的内容需与本地文件一致
+        """
+        async with self._client.open(remotepath, "r+b") as remote_file:
+            with open(localpath, "rb") as local_file:
+                local_file.seek(offset)
+                for chunk in iter(lambda: local_file.read(CHUNK_SIZE), b""):
+                    await remote_file.write(chunk, offset)
+                    offset += len(chunk)
+
 
 class ParamikoSFTPClient(FileBaseClient):
 
@@ -105,3 +127,77 @@ class ParamikoSFTPClient(FileBaseClient):
     def makedirs(self, path: str):
         # 可参考：https://stackoverflow.com/questions/14819681/
         raise NotImplementedError
+
+
+@functools.lru_cache(maxsize=256)
+def _get_local_md5(localpath: str, file_size: int, mtime: float, length: int) -> str:
+    # 文件大小及修改时间作为缓存键的一部分，文件变更后缓存自动失效
+    hash_md5 = hashlib.md5()
+    with open(localpath, "rb") as fs:
+        remaining: int = length
+        while remaining > 0:
+            chunk: bytes = fs.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            hash_md5.update(chunk)
+            remaining -= len(chunk)
+    return hash_md5.hexdigest()
+
+
+def get_local_md5(localpath: str, length: typing.Optional[int] = None) -> str:
+    """
+    计算本地文件前 length 字节的 md5，同一文件在多台主机间推送时仅计算一次
+    :param localpath: 本地文件路径
+    :param length: 计算长度，为空时计算整个文件
+    :return:
+    """
+    stat_result = os.stat(localpath)
+    length = stat_result.st_size if length is None else min(length, stat_result.st_size)
+    return _get_local_md5(localpath, stat_result.st_size, stat_result.st_mtime, length)
+
+
+def build_remote_checksum_cmd(remotepath: str, filenames: typing.List[str]) -> str:
+    """
+    构造批量获取远程文件大小及 md5 的命令，一次交互获取全部文件，每行输出：文件名 大小 md5
+    :param remotepath: 远程目录
+    :param filenames: 文件名列表
+    :return:
+    """
+    quoted_filenames: str = " ".join([shlex.quote(filename) for filename in filenames])
+    return (
+        f"cd {shlex.quote(remotepath)} && for f in {quoted_filenames}; "
+        f'do [ -f "$f" ] && echo "$f $(wc -c < "$f") $(md5sum < "$f")"; done; true'
+    )
+
+
+def parse_remote_checksums(output: typing.Optional[str]) -> typing.Dict[str, typing.Tuple[int, str]]:
+    """
+    解析 build_remote_checksum_cmd 的输出
+    :param output: 命令输出
+    :return: 文件名 - (大小, md5) 映射
+    """
+    filename__checksum_map: typing.Dict[str, typing.Tuple[int, str]] = {}
+    for line in (output or "").splitlines():
+        fields: typing.List[str] = line.split()
+        if len(fields) < 3 or not fields[1].isdigit():
+            continue
+        filename__checksum_map[fields[0]] = (int(fields[1]), fields[2].lower())
+    return filename__checksum_map
+
+
+def get_push_offset(localpath: str, remote_checksum: typing.Optional[typing.Tuple[int, str]]) -> int:
+    """
+    根据远程文件的大小及 md5 计算推送起始位置
+    :param localpath: 本地文件路径
+    :param remote_checksum: 远程文件 (大小, md5)，文件不存在时为空
+    :return: 0 表示全量推送，等于本地文件大小表示无需推送，其他值表示从该位置续传
+    """
+    if remote_checksum is None:
+        return 0
+    remote_size, remote_md5 = remote_checksum
+    if remote_size > os.path.getsize(localpath):
+        return 0
+    # 远程文件与本地文件同长度的前缀一致时，远程文件完整或为中断的部分上传
+    if get_local_md5(localpath, remote_size) != remote_md5:
+        return 0
+    return remote_size
@@ -10,7 +10,8 @@ specific language governing permissions and limitations under the License.
 """
 
 from .asyncssh_impl import AsyncsshConn
+from .asyncssh_pool import AsyncsshConnPool
 from .base import RunOutput
 from .paramiko_impl import ParamikoConn
 
-__all__ = ["AsyncsshConn", "ParamikoConn", "RunOutput"]
+__all__ = ["AsyncsshConn", "AsyncsshConnPool", "ParamikoConn", "RunOutput"]
@@ -8,6 +8,7 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import asyncio
 import socket
 import typing
 from concurrent import futures
@@ -18,6 +19,7 @@ from django.utils.translation import ugettext_lazy as _
 from .. import constants, exceptions
 from ..clients import file
 from . import base
+from .asyncssh_pool import AsyncsshConnPool
 
 
 class AsyncsshConn(base.BaseConn):
@@ -30,11 +32,53 @@ class AsyncsshConn(base.BaseConn):
 
     # SSH 客户端连接，具体功能及 api 参考：https://asyncssh.readthedocs.io/en/stable/api.html#sshclientconnection
     _conn: typing.Optional[asyncssh.SSHClientConnection] = None
+    # 连接池，为空时每次新建连接
+    pool: typing.Optional[AsyncsshConnPool] = None
+    # 连接池分组，用于限制分组（接入点、Proxy 等）内的连接数
+    pool_group: typing.Optional[typing.Hashable] = None
+
+    # 抛出以下异常时连接可能已不可用，不归还连接池
+    UNREUSABLE_EXC_TYPES = (
+        exceptions.DisconnectError,
+        exceptions.ConnectionLostError,
+        exceptions.RemoteTimeoutError,
+        exceptions.SessionError,
+        asyncssh.Error,
+        asyncio.CancelledError,
+        asyncio.TimeoutError,
+        OSError,
+    )
+
+    def __init__(
+        self,
+        *args,
+        pool: typing.Optional[AsyncsshConnPool] = None,
+        pool_group: typing.Optional[typing.Hashable] = None,
+        **kwargs,
+    ):
+        """
+        :param pool: 连接池，为空时每次新建连接
+        :param pool_group: 连接池分组
+        """
+        super().__init__(*args, **kwargs)
+        self.pool = pool
+        self.pool_group = pool_group
 
     def close(self):
         pass
 
     async def connect(self):
+        if self.pool is None:
+            self._conn = await self._connect()
+        else:
+            self._conn = await self.pool.acquire(
+                key=self.pool.get_key(self.host, self.port, self.username, self.password, self.client_key_strings),
+                group=self.pool_group,
+                connect_func=self._connect,
+            )
+        return self._conn
+
+    async def _connect(self) -> asyncssh.SSHClientConnection:
         client_keys = []
         for client_key_string in self.client_key_strings:
             try:
@@ -49,7 +93,7 @@ class AsyncsshConn(base.BaseConn):
             # https://asyncssh.readthedocs.io/en/stable/api.html#asyncssh.SSHClientConnectionOptions
             # 认证顺序：👇 可以显式传入 preferred_auth 进行控制
             # gssapi-keyex -> gssapi-with-mic -> hostbased -> [ publickey -> keyboard-interactive -> password ]
-            self._conn = await asyncssh.connect(
+            return await asyncssh.connect(
                 host=self.host,
                 port=self.port,
                 username=self.username,
@@ -60,7 +104,7 @@ class AsyncsshConn(base.BaseConn):
                 encryption_algs=constants.ENCRYPTION_ALGS,
                 known_hosts=None,
                 connect_timeout=self.connect_timeout,
-                **self.options
+                **self.options,
             )
         except asyncssh.KeyExchangeFailed as e:
             raise exceptions.KeyExchangeError({"err_msg": e}) from e
@@ -69,12 +113,10 @@ class AsyncsshConn(base.BaseConn):
         except asyncssh.ConnectionLost as e:
             raise exceptions.ConnectionLostError({"err_msg": e}) from e
         except futures.TimeoutError as e:
-            raise exceptions.RemoteTimeoutError(_("连接超时：{err_msg}").format(err_msg=e)) from e
+            raise exceptions.ConnectTimeoutError(_("连接超时：{err_msg}").format(err_msg=e)) from e
         except (asyncssh.DisconnectError, socket.error, Exception) as e:
             raise exceptions.DisconnectError({"err_msg": e}) from e
 
-        return self._conn
-
     async def _run(
         self, command: str, check: bool = False, timeout: typing.Optional[typing.Union[int, float]] = None, **kwargs
     ) -> base.RunOutput:
@@ -124,5 +166,10 @@ class AsyncsshConn(base.BaseConn):
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文支持"""
-        await self._conn.__aexit__(exc_type, exc_val, exc_tb)
+        if self.pool is None:
+            await self._conn.__aexit__(exc_type, exc_val, exc_tb)
+        else:
+            await self.pool.release(
+                self._conn, reusable=exc_type is None or not issubclass(exc_type, self.UNREUSABLE_EXC_TYPES)
+            )
         self._conn = None
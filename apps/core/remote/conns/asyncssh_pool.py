@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import asyncio
+import hashlib
+import logging
+import typing
+
+import asyncssh
+
+from .. import constants
+
+logger = logging.getLogger("app")
+
+PoolKey = typing.Tuple[str, int, str, str]
+
+
+class PooledConn:
+    """连接池中的连接"""
+
+    def __init__(self, key: PoolKey, group: typing.Optional[typing.Hashable], conn: asyncssh.SSHClientConnection):
+        self.key = key
+        self.group = group
+        self.conn = conn
+        self.last_used_at: float = 0
+
+
+class AsyncsshConnPool:
+    """
+    asyncssh 连接池
+    - 以 主机、端口、用户、认证信息 作为键复用已认证的连接，同一主机在连接池生命周期内的多次连接仅需一次握手及认证
+    - 按分组（如接入点、Proxy）限制连接数，达到上限时优先关闭该分组内其他主机的空闲连接，否则等待连接释放
+    - 空闲超过 max_idle_time 的连接被淘汰，空闲超过 health_check_interval 的连接复用前执行探测命令检查可用性
+    - asyncssh 连接绑定在创建时的事件循环上，连接池持有一个事件循环，通过连接池的批量调用均在该循环上执行
+    - 连接池不跨线程、进程共享，生命周期由调用方管理（如单次安装原子执行），使用完毕后需调用 close 关闭
+    """
+
+    # 健康检查命令，需兼容 Linux 及 Windows（cygwin / OpenSSH）
+    HEALTH_CHECK_COMMAND = "echo"
+
+    def __init__(
+        self,
+        limit_per_group: typing.Optional[int] = None,
+        max_idle_time: float = constants.DEFAULT_POOL_MAX_IDLE_TIME,
+        health_check_interval: float = constants.DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+        health_check_timeout: float = constants.DEFAULT_POOL_HEALTH_CHECK_TIMEOUT,
+    ):
+        """
+        :param limit_per_group: 单个分组的最大连接数，为空时不限制
+        :param max_idle_time: 连接最大空闲时间（秒）
+        :param health_check_interval: 空闲超过该时间（秒）的连接复用前需进行健康检查
+        :param health_check_timeout: 健康检查超时时间（秒）
+        """
+        self.limit_per_group = limit_per_group
+        self.max_idle_time = max_idle_time
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+
+        self.key__idle_conns_map: typing.Dict[PoolKey, typing.List[PooledConn]] = {}
+        self.conn_id__pooled_conn_map: typing.Dict[int, PooledConn] = {}
+        self.group__conn_num_map: typing.Dict[typing.Hashable, int] = {}
+        # 统计信息：新建连接数、复用连接数
+        self.created_num: int = 0
+        self.reused_num: int = 0
+        self._cond: typing.Optional[asyncio.Condition] = None
+
+    @staticmethod
+    def get_key(
+        host: str, port: int, username: str, password: typing.Optional[str], client_key_strings: typing.List[str]
+    ) -> PoolKey:
+        """
+        连接池键，认证信息仅保留摘要
+        """
+        credential: str = "\n".join([password or ""] + list(client_key_strings))
+        return host, port, username, hashlib.sha256(credential.encode()).hexdigest()
+
+    @property
+    def cond(self) -> asyncio.Condition:
+        # Condition 需在事件循环内创建
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def is_healthy(self, pooled_conn: PooledConn) -> bool:
+        if self.loop.time() - pooled_conn.last_used_at < self.health_check_interval:
+            return True
+        try:
+            await pooled_conn.conn.run(self.HEALTH_CHECK_COMMAND, check=True, timeout=self.health_check_timeout)
+        except Exception as e:
+            logger.info(f"[AsyncsshConnPool] health check failed: host -> {pooled_conn.key[0]}, err -> {e}")
+            return False
+        return True
+
+    def _discard(self, pooled_conn: PooledConn):
+        self.conn_id__pooled_conn_map.pop(id(pooled_conn.conn), None)
+        if pooled_conn.group is not None:
+            self.group__conn_num_map[pooled_conn.group] -= 1
+        pooled_conn.conn.close()
+
+    def _pop_idle(self, pooled_conn: PooledConn):
+        idle_conns: typing.List[PooledConn] = self.key__idle_conns_map[pooled_conn.key]
+        idle_conns.remove(pooled_conn)
+        if not idle_conns:
+            self.key__idle_conns_map.pop(pooled_conn.key)
+
+    def evict_idle(self, group: typing.Optional[typing.Hashable] = None, force: bool = False) -> int:
+        """
+        淘汰空闲连接
+        :param group: 仅淘汰该分组内的空闲连接
+        :param force: 是否淘汰未超过最大空闲时间的连接，强制淘汰时仅淘汰最久未使用的一个
+        :return: 淘汰的连接数
+        """
+        now: float = self.loop.time()
+        idle_conns: typing.List[PooledConn] = [
+            pooled_conn
+            for pooled_conns in self.key__idle_conns_map.values()
+            for pooled_conn in pooled_conns
+            if group is None or pooled_conn.group == group
+        ]
+        if force:
+            idle_conns = sorted(idle_conns, key=lambda pooled_conn: pooled_conn.last_used_at)[:1]
+        else:
+            idle_conns = [
+                pooled_conn for pooled_conn in idle_conns if now - pooled_conn.last_used_at >= self.max_idle_time
+            ]
+        for pooled_conn in idle_conns:
+            self._pop_idle(pooled_conn)
+            self._discard(pooled_conn)
+        return len(idle_conns)
+
+    async def acquire(
+        self,
+        key: PoolKey,
+        group: typing.Optional[typing.Hashable],
+        connect_func: typing.Callable[[], typing.Awaitable[asyncssh.SSHClientConnection]],
+    ) -> asyncssh.SSHClientConnection:
+        """
+        获取连接，优先复用空闲连接
+        :param key: 连接池键
+        :param group: 分组
+        :param connect_func: 新建连接的方法
+        :return:
+        """
+        while True:
+            idle_conn: typing.Optional[PooledConn] = None
+            async with self.cond:
+                self.evict_idle()
+                while True:
+                    idle_conns: typing.List[PooledConn] = self.key__idle_conns_map.get(key, [])
+                    if idle_conns:
+                        idle_conn = idle_conns[-1]
+                        self._pop_idle(idle_conn)
+                        break
+                    if (
+                        group is None
+                        or self.limit_per_group is None
+                        or self.group__conn_num_map.get(group, 0) < self.limit_per_group
+                    ):
+                        if group is not None:
+                            self.group__conn_num_map[group] = self.group__conn_num_map.get(group, 0) + 1
+                        break
+                    # 分组连接数达到上限，关闭分组内最久未使用的空闲连接腾出名额，否则等待其他连接释放
+                    if not self.evict_idle(group=group, force=True):
+                        await self.cond.wait()
+
+            if idle_conn is None:
+                break
+            # 健康检查涉及网络交互，在锁外进行
+            if await self.is_healthy(idle_conn):
+                self.reused_num += 1
+                return idle_conn.conn
+            async with self.cond:
+                self._discard(idle_conn)
+                self.cond.notify_all()
+
+        try:
+            conn: asyncssh.SSHClientConnection = await connect_func()
+        except BaseException:
+            async with self.cond:
+                if group is not None:
+                    self.group__conn_num_map[group] -= 1
+                self.cond.notify_all()
+            raise
+
+        self.created_num += 1
+        self.conn_id__pooled_conn_map[id(conn)] = PooledConn(key=key, group=group, conn=conn)
+        return conn
+
+    async def release(self, conn: asyncssh.SSHClientConnection, reusable: bool = True):
+        """
+        归还连接
+        :param conn: 连接
+        :param reusable: 是否可复用，连接异常时不可复用，直接关闭
+        """
+        async with self.cond:
+            pooled_conn: typing.Optional[PooledConn] = self.conn_id__pooled_conn_map.get(id(conn))
+            if pooled_conn is None:
+                conn.close()
+                return
+            if reusable:
+                pooled_conn.last_used_at = self.loop.time()
+                self.key__idle_conns_map.setdefault(pooled_conn.key, []).append(pooled_conn)
+            else:
+                self._discard(pooled_conn)
+            self.cond.notify_all()
+
+    async def aclose(self):
+        """关闭全部连接"""
+        pooled_conns: typing.List[PooledConn] = list(self.conn_id__pooled_conn_map.values())
+        for pooled_conn in pooled_conns:
+            self._discard(pooled_conn)
+        self.key__idle_conns_map.clear()
+        await asyncio.gather(*[pooled_conn.conn.wait_closed() for pooled_conn in pooled_conns], return_exceptions=True)
+
+    def close(self):
+        """关闭全部连接及事件循环"""
+        if self.loop.is_closed():
+            return
+        self.loop.run_until_complete(self.aclose())
+        self.loop.close()
+        logger.info(f"[AsyncsshConnPool] closed: created -> {self.created_num}, reused -> {self.reused_num}")
+
+    def __enter__(self) -> "AsyncsshConnPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -55,3 +55,12 @@ DEFAULT_CONNECT_TIMEOUT = 30
 
 # 默认的命令执行最长等待时间
 DEFAULT_CMD_RUN_TIMEOUT = 30
+
+# 连接池：默认的连接最大空闲时间
+DEFAULT_POOL_MAX_IDLE_TIME = 60
+
+# 连接池：空闲超过该时间的连接复用前需进行健康检查
+DEFAULT_POOL_HEALTH_CHECK_INTERVAL = 10
+
+# 连接池：默认的健康检查最长等待时间
+DEFAULT_POOL_HEALTH_CHECK_TIMEOUT = 5
@@ -49,6 +49,10 @@ class RemoteTimeoutError(RemoteBaseException):
     ERROR_CODE = 6
 
 
+class ConnectTimeoutError(RemoteTimeoutError):
+    MESSAGE = _("连接超时")
+
+
 class ProcessError(RemoteBaseException):
     MESSAGE_TPL = _("命令返回非零值：{err_msg}")
     ERROR_CODE = 7
@@ -110,6 +110,12 @@ class AsyncSSHMockClient(FileMockClientMixin):
     async def start_sftp_client(self, *args, **kwargs):
         return self.create_file_mock_client()
 
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
 
 class ParamikoSSHMockClient(FileMockClientMixin):
 
@@ -16,7 +16,7 @@ from apps.utils import concurrent
 from apps.utils.encrypt import rsa
 from apps.utils.unittest import testcase
 
-from .. import conns
+from .. import conns, exceptions
 from . import base
 
 
@@ -48,6 +48,63 @@ class AsyncsshConnTestCase(testcase.CustomBaseTestCase):
             self.assertTrue(isinstance(output, conns.RunOutput))
 
 
+class AsyncsshConnPoolTestCase(testcase.CustomBaseTestCase):
+    class AsyncSSHCountingMockClient(base.AsyncSSHMockClient):
+        created_num = 0
+
+        def __init__(self):
+            type(self).created_num += 1
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.AsyncSSHCountingMockClient.created_num = 0
+        base.get_asyncssh_connect_mock_patch(self.AsyncSSHCountingMockClient).start()
+
+    @staticmethod
+    async def run_async(pool: conns.AsyncsshConnPool, host: str, group: int = 1):
+        async with conns.AsyncsshConn(
+            host=host, port=22, username=utils.DEFAULT_USERNAME, password="123", pool=pool, pool_group=group
+        ) as conn:
+            async with await conn.file_client() as file_client:
+                await file_client.put(localpaths=[], remotepath="/tmp")
+            return await conn.run("echo hello", check=True)
+
+    def test_reuse(self):
+        with conns.AsyncsshConnPool() as pool:
+            for __ in range(3):
+                concurrent.batch_call_coroutine(
+                    func=self.run_async, params_list=[{"pool": pool, "host": utils.DEFAULT_IP}], loop=pool.loop
+                )
+            self.assertEqual(pool.created_num, 1)
+            self.assertEqual(pool.reused_num, 2)
+        self.assertEqual(self.AsyncSSHCountingMockClient.created_num, 1)
+
+    def test_limit_per_group(self):
+        with conns.AsyncsshConnPool(limit_per_group=2) as pool:
+            params_list = [{"pool": pool, "host": f"127.0.0.{idx}"} for idx in range(5)]
+            outputs = concurrent.batch_call_coroutine(func=self.run_async, params_list=params_list, loop=pool.loop)
+            for output in outputs:
+                self.assertTrue(isinstance(output, conns.RunOutput))
+            # 达到分组上限时，关闭其他主机的空闲连接腾出名额
+            self.assertEqual(pool.created_num, 5)
+            self.assertLessEqual(pool.group__conn_num_map[1], 2)
+
+    def test_not_reuse_broken_conn(self):
+        async def _run_broken(pool: conns.AsyncsshConnPool):
+            async with conns.AsyncsshConn(
+                host=utils.DEFAULT_IP, port=22, username=utils.DEFAULT_USERNAME, password="123", pool=pool
+            ):
+                raise exceptions.ConnectionLostError({"err_msg": "reset by peer"})
+
+        with conns.AsyncsshConnPool() as pool:
+            concurrent.batch_call_coroutine(func=_run_broken, params_list=[{"pool": pool}], loop=pool.loop)
+            concurrent.batch_call_coroutine(
+                func=self.run_async, params_list=[{"pool": pool, "host": utils.DEFAULT_IP}], loop=pool.loop
+            )
+            self.assertEqual(pool.created_num, 2)
+            self.assertEqual(pool.reused_num, 0)
+
+
 class ParamikoConnTestCase(testcase.CustomBaseTestCase):
     def setUp(self) -> None:
         super().setUp()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import hashlib
+import os
+import subprocess
+import tempfile
+
+from apps.utils.unittest import testcase
+
+from ..clients import file
+
+
+class RemoteChecksumTestCase(testcase.CustomBaseTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.local_dir = tempfile.mkdtemp()
+        self.remote_dir = tempfile.mkdtemp()
+        self.content = os.urandom(file.CHUNK_SIZE * 2 + 100)
+        self.localpath = os.path.join(self.local_dir, "dep.bin")
+        with open(self.localpath, "wb") as fs:
+            fs.write(self.content)
+
+    def write_remote(self, filename: str, content: bytes):
+        with open(os.path.join(self.remote_dir, filename), "wb") as fs:
+            fs.write(content)
+
+    def get_remote_checksums(self, filenames):
+        cmd = file.build_remote_checksum_cmd(self.remote_dir + "/", filenames)
+        output = subprocess.run(["bash", "-c", cmd], stdout=subprocess.PIPE, check=True).stdout.decode()
+        return file.parse_remote_checksums(output)
+
+    def test_remote_checksums(self):
+        self.write_remote("dep.bin", self.content[:100])
+        checksums = self.get_remote_checksums(["dep.bin", "not_exist.bin"])
+        self.assertEqual(checksums, {"dep.bin": (100, hashlib.md5(self.content[:100]).hexdigest())})
+
+    def test_get_push_offset(self):
+        # 远程文件不存在
+        self.assertEqual(file.get_push_offset(self.localpath, None), 0)
+        # 远程文件完整
+        self.write_remote("dep.bin", self.content)
+        offset = file.get_push_offset(self.localpath, self.get_remote_checksums(["dep.bin"])["dep.bin"])
+        self.assertEqual(offset, len(self.content))
+        # 中断的部分上传，从断点续传
+        self.write_remote("dep.bin", self.content[: file.CHUNK_SIZE + 1])
+        offset = file.get_push_offset(self.localpath, self.get_remote_checksums(["dep.bin"])["dep.bin"])
+        self.assertEqual(offset, file.CHUNK_SIZE + 1)
+        # 内容不一致，全量推送
+        self.write_remote("dep.bin", b"x" + self.content[1:])
+        self.assertEqual(file.get_push_offset(self.localpath, self.get_remote_checksums(["dep.bin"])["dep.bin"]), 0)
@@ -60,6 +60,19 @@ COLLECT_AUTO_TRIGGER_JOB_INTERVAL = 5 * TimeUnit.MINUTE
 SYNC_CMDB_CLOUD_AREA_INTERVAL = 10 * TimeUnit.SECOND
 SYNC_AGENT_STATUS_TASK_INTERVAL = 10 * TimeUnit.MINUTE
 SYNC_PROC_STATUS_TASK_INTERVAL = 20 * TimeUnit.MINUTE
+# 增量同步 Agent 状态：每隔多少轮进行一次全量同步，其余轮次仅同步近期变更及订阅执行中的主机
+# 其余主机的状态变化（如 Agent 异常离线）最迟在下一次全量同步时发现，即最长延迟 轮数 * 同步周期（默认 60 分钟）
+SYNC_AGENT_STATUS_FULL_ROUND_INTERVAL = 6
+# 增量同步 Agent 状态：状态快照过期时间，过期后下一次同步将全量对比 DB，兜底快照与 DB 不一致的情况
+AGENT_STATE_SNAPSHOT_EXPIRE = SYNC_AGENT_STATUS_FULL_ROUND_INTERVAL * SYNC_AGENT_STATUS_TASK_INTERVAL
+# 增量同步 Agent 状态：状态变更后，主机在多长时间内被优先同步
+AGENT_STATE_RECENTLY_CHANGED_WINDOW = 3 * SYNC_AGENT_STATUS_TASK_INTERVAL
+# Agent 状态缓存：缓存超过该时间后，读取时触发异步刷新
+AGENT_STATE_CACHE_REFRESH_INTERVAL = 30 * TimeUnit.SECOND
+# Agent 状态缓存：过期时间，过期后回退为 DB 记录的状态
+AGENT_STATE_CACHE_EXPIRE = 10 * TimeUnit.MINUTE
+# 业务主机拓扑缓存：过期时间，主机关系由资源监听事件增量更新，拓扑节点变更（如重命名）由过期兜底
+BIZ_HOST_TOPO_CACHE_EXPIRE = 30 * TimeUnit.MINUTE
 
 CLEAN_EXPIRED_INFO_INTERVAL = 6 * TimeUnit.HOUR
 
@@ -541,6 +554,9 @@ QUERY_PROC_STATUS_HOST_LENS = 2000
 QUERY_CMDB_LIMIT = 500
 WRITE_CMDB_LIMIT = 500
 QUERY_CMDB_MODULE_LIMIT = 500
+# 分页请求最大并发页数及单页最大重试次数
+BATCH_REQUEST_MAX_CONCURRENCY = 20
+BATCH_REQUEST_MAX_RETRIES = 2
 QUERY_CLOUD_LIMIT = 200
 QUERY_HOST_SERVICE_TEMPLATE_LIMIT = 200
 VERSION_PATTERN = re.compile(r"[vV]?(\d+\.){1,5}\d+(-rc\d)?$")
@@ -554,6 +570,8 @@ WINDOWS_PORT = 445
 WINDOWS_ACCOUNT = "Administrator"
 LINUX_ACCOUNT = "root"
 APPLY_RESOURCE_WATCH_EVENT_LENS = 2000
+# 订阅实例日志批量写入的每批次条数
+SUBSCRIPTION_INSTANCE_LOG_BATCH_SIZE = 1000
 
 BIZ_CACHE_SUFFIX = "_biz_cache"
 BIZ_CUSTOM_PROPERTY_CACHE_SUFFIX = "_property_cache"
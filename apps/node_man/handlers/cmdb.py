@@ -206,6 +206,20 @@ class CmdbHandler(APIModel):
         }
         """
 
+        # tools 依赖 handlers，此处延迟导入避免循环引用
+        from apps.node_man.tools.biz_host_topo import BizHostTopoCache
+
+        if BizHostTopoCache.is_enabled():
+            # 按业务共享的主机拓扑缓存，不区分用户及分页
+            topology = {}
+            with ThreadPoolExecutor(max_workers=settings.CONCURRENT_NUMBER) as ex:
+                tasks = [
+                    ex.submit(self.find_host_topo_from_cache, biz, biz_host_id_map[biz], topology, user_biz)
+                    for biz in biz_host_id_map
+                ]
+                as_completed(tasks)
+            return topology
+
         user_page_topology_cache = cache.get(username + "_" + str(biz_host_id_map) + "_topo_cache")
 
         if user_page_topology_cache:
@@ -295,6 +309,15 @@ class CmdbHandler(APIModel):
                         topology[topos["host"]["bk_host_id"]].append(topo_str + " / " + module["bk_module_name"])
         return topology
 
+    @staticmethod
+    def find_host_topo_from_cache(bk_biz_id: int, bk_host_ids: list, topology: dict, user_biz: dict):
+        from apps.node_man.tools.biz_host_topo import BizHostTopoCache
+
+        host_id__topo_paths_map = BizHostTopoCache.get_host_topo_paths(bk_biz_id, bk_host_ids)
+        for bk_host_id, topo_paths in host_id__topo_paths_map.items():
+            topology[bk_host_id] = [user_biz.get(bk_biz_id) + " / " + topo_path for topo_path in topo_paths]
+        return topology
+
     def check_biz_permission(self, bk_biz_scope: list, action: str):
         """
         校验业务权限
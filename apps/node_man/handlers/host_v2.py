@@ -13,6 +13,7 @@ from typing import Any, Dict
 
 from apps.core.ipchooser import core_ipchooser_constants
 from apps.core.ipchooser.tools.base import HostQueryHelper, HostQuerySqlHelper
+from apps.core.ipchooser.tools.host_tool import HostTool
 from apps.node_man import models, tools
 from apps.node_man.constants import DEFAULT_CLOUD_NAME, IamActionType
 from apps.node_man.handlers.cmdb import CmdbHandler
@@ -101,6 +102,8 @@ class HostV2Handler:
             host["bk_cloud_name"] = cloud_name.get(host["bk_cloud_id"])
             host["bk_biz_name"] = user_biz.get(host["bk_biz_id"], "")
 
+        HostTool.fill_cached_agent_state_info_to_hosts(host_infos=hosts)
+
         host_page = {"total": hosts_sql.count(), "list": hosts}
 
         if with_agent_status_counter:
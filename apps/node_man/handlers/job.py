@@ -182,15 +182,23 @@ class JobHandler(APIModel):
         if not biz_scope:
             return {"total": 0, "list": []}
 
+        enable_search_index: bool = models.GlobalSettings.get_config(
+            key=models.GlobalSettings.KeyEnum.ENABLE_JOB_SEARCH_INDEX.value, default=False
+        )
+
         if set(biz_scope) & all_biz_ids == all_biz_ids:
             # 查询全部业务且拥有全部业务权限
             biz_scope_query_q = Q()
         else:
-            biz_scope_query_q = reduce(
-                operator.or_,
-                [Q(bk_biz_scope__contains=bk_biz_id) for bk_biz_id in biz_scope],
-                Q()
-            )
+            if enable_search_index:
+                # 通过业务索引子查询过滤，避免对 bk_biz_scope 逐个 JSON 匹配
+                biz_scope_query_q = Q(
+                    id__in=models.JobBizIndex.objects.filter(bk_biz_id__in=biz_scope).values("job_id")
+                )
+            else:
+                biz_scope_query_q = reduce(
+                    operator.or_, [Q(bk_biz_scope__contains=bk_biz_id) for bk_biz_id in biz_scope], Q()
+                )
             # 仅查询所有业务时，自身创建的 job 可见
             if not search_biz_ids:
                 biz_scope_query_q |= Q(created_by=username)
@@ -216,7 +224,12 @@ class JobHandler(APIModel):
             if not task_id_list:
                 return {"total": 0, "list": []}
 
-            inner_ip_query_q = reduce(operator.or_, [Q(task_id_list__contains=task_id) for task_id in task_id_list])
+            if enable_search_index:
+                inner_ip_query_q = Q(
+                    id__in=models.JobTaskIndex.objects.filter(task_id__in=set(task_id_list)).values("job_id")
+                )
+            else:
+                inner_ip_query_q = reduce(operator.or_, [Q(task_id_list__contains=task_id) for task_id in task_id_list])
 
         # 过滤None值并筛选Job
         # 此处不过滤空列表（filter_empty=False），job_id, job_type 存在二次解析，若全部值非法得到的是空列表，期望应是查不到数据
@@ -228,7 +241,11 @@ class JobHandler(APIModel):
         # 排序
         if params.get("sort"):
             sort_head = params["sort"]["head"]
-            job_result = job_result.extra(select={sort_head: f"JSON_EXTRACT(statistics, '$.{sort_head}')"})
+            if not enable_search_index:
+                # 统计字段已冗余为同名列，JSON 提取值需使用别名，避免与模型字段冲突
+                json_sort_head = f"statistics_{sort_head}"
+                job_result = job_result.extra(select={json_sort_head: f"JSON_EXTRACT(statistics, '$.{sort_head}')"})
+                sort_head = json_sort_head
             if params["sort"]["sort_type"] == constants.SortType.DEC:
                 job_result = job_result.order_by(str("-") + sort_head)
             else:
@@ -0,0 +1,43 @@
+# coding: utf-8
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import typing
+
+from django.core.management.base import BaseCommand
+
+from apps.node_man import models
+
+
+class Command(BaseCommand):
+    help = "Backfill job search index and promoted statistic columns for historical jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-b", "--batch_size", type=int, default=1000, help="Number of jobs per batch")
+
+    def handle(self, **kwargs):
+        batch_size: int = kwargs["batch_size"]
+        last_job_id: int = 0
+        while True:
+            # 按主键分段遍历，避免深分页
+            jobs: typing.List[models.Job] = list(
+                models.Job.objects.filter(id__gt=last_job_id)
+                .order_by("id")
+                .only("id", "bk_biz_scope", "task_id_list", "statistics")[:batch_size]
+            )
+            if not jobs:
+                break
+
+            for job in jobs:
+                job.promote_statistics()
+            models.Job.objects.bulk_update(jobs, fields=["total_count", "success_count", "failed_count"])
+            models.Job.sync_search_index(jobs)
+
+            last_job_id = jobs[-1].id
+            print(f"sync job search index: last_job_id -> {last_job_id}")
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("node_man", "0075_subscriptioninstancelog_node_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="failed_count",
+            field=models.IntegerField(db_index=True, default=0, verbose_name="失败数"),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="success_count",
+            field=models.IntegerField(db_index=True, default=0, verbose_name="成功数"),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="total_count",
+            field=models.IntegerField(db_index=True, default=0, verbose_name="总数"),
+        ),
+        migrations.CreateModel(
+            name="JobBizIndex",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("job_id", models.IntegerField(db_index=True, verbose_name="任务ID")),
+                ("bk_biz_id", models.IntegerField(verbose_name="业务ID")),
+            ],
+            options={
+                "verbose_name": "任务业务索引",
+                "verbose_name_plural": "任务业务索引",
+                "unique_together": {("bk_biz_id", "job_id")},
+            },
+        ),
+        migrations.CreateModel(
+            name="JobTaskIndex",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("job_id", models.IntegerField(db_index=True, verbose_name="任务ID")),
+                ("task_id", models.IntegerField(verbose_name="订阅任务ID")),
+            ],
+            options={
+                "verbose_name": "任务订阅任务索引",
+                "verbose_name_plural": "任务订阅任务索引",
+                "unique_together": {("task_id", "job_id")},
+            },
+        ),
+    ]
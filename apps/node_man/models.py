@@ -24,7 +24,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from distutils.dir_util import copy_tree
 from enum import Enum
 from functools import cmp_to_key, reduce
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
 
 import requests
 import six
@@ -39,11 +39,10 @@ from django.utils.functional import Promise
 from django.utils.translation import get_language
 from django.utils.translation import ugettext_lazy as _
 from django_mysql.models import JSONField
-from jinja2 import Template
 
 from apps.backend.subscription.errors import PipelineExecuteFailed, SubscriptionNotExist
 from apps.backend.subscription.render_functions import get_hosts_by_node
-from apps.backend.utils.data_renderer import nested_render_data
+from apps.backend.utils.data_renderer import JINJA_TEMPLATE_CACHE, nested_render_data
 from apps.core.files.storage import get_storage
 from apps.exceptions import ValidationError
 from apps.node_man import constants
@@ -61,6 +60,7 @@ from apps.prometheus.models import (
     export_subscription_prometheus_mixin,
 )
 from apps.utils import basic, files, orm, translation
+from apps.utils.artifact_cache import get_artifact_cache, link_tree
 from common.log import logger
 from env.constants import GseVersion
 from pipeline.parser import PipelineParser
@@ -138,6 +138,20 @@ class GlobalSettings(models.Model):
         ENABLE_AGENT_PKG_MANAGE = "ENABLE_AGENT_PKG_MANAGE"
         # 云梯策略相关配置
         YUNTI_POLICY_CONFIGS = "YUNTI_POLICY_CONFIGS"
+        # 是否开启 Agent 状态增量同步
+        ENABLE_INCREMENTAL_SYNC_AGENT_STATUS = "ENABLE_INCREMENTAL_SYNC_AGENT_STATUS"
+        # 安装调度是否仅处理有新上报日志的订阅实例
+        ENABLE_INSTALL_CALLBACK_NOTIFY = "ENABLE_INSTALL_CALLBACK_NOTIFY"
+        # 自动巡检是否仅对订阅范围内发生变化的实例进行配置变更检查
+        ENABLE_INCREMENTAL_SCOPE_DIFF = "ENABLE_INCREMENTAL_SCOPE_DIFF"
+        # 订阅统计是否从后台预计算的快照读取
+        ENABLE_SUBSCRIPTION_STATISTIC_SNAPSHOT = "ENABLE_SUBSCRIPTION_STATISTIC_SNAPSHOT"
+        # 主机列表是否从缓存读取 Agent 状态，并异步刷新
+        ENABLE_AGENT_STATE_CACHE = "ENABLE_AGENT_STATE_CACHE"
+        # 任务历史列表是否通过任务检索索引（JobBizIndex / JobTaskIndex）过滤及排序
+        ENABLE_JOB_SEARCH_INDEX = "ENABLE_JOB_SEARCH_INDEX"
+        # 主机拓扑是否从按业务共享的主机拓扑缓存读取
+        ENABLE_BIZ_HOST_TOPO_CACHE = "ENABLE_BIZ_HOST_TOPO_CACHE"
 
     key = models.CharField(_("键"), max_length=255, db_index=True, primary_key=True)
     v_json = JSONField(_("值"))
@@ -802,12 +816,101 @@ class Job(export_job_prometheus_mixin(), models.Model):
     error_hosts = JSONField(_("发生错误的主机"))
     is_auto_trigger = models.BooleanField(_("是否为自动触发"), default=False)
 
+    # 冗余 statistics 中用于排序的统计字段，避免任务历史列表通过 JSON_EXTRACT 全表排序
+    total_count = models.IntegerField(_("总数"), default=0, db_index=True)
+    success_count = models.IntegerField(_("成功数"), default=0, db_index=True)
+    failed_count = models.IntegerField(_("失败数"), default=0, db_index=True)
+
+    # 变更后需同步任务检索索引的字段
+    SEARCH_INDEX_FIELDS: Set[str] = {"bk_biz_scope", "task_id_list"}
+
+    def save(self, *args, **kwargs):
+        update_fields: Optional[Iterable[str]] = kwargs.get("update_fields")
+        self.promote_statistics()
+        if update_fields is not None and "statistics" in update_fields:
+            kwargs["update_fields"] = list(set(update_fields) | set(constants.HEAD_TUPLE))
+
+        super().save(*args, **kwargs)
+
+        if update_fields is None or self.SEARCH_INDEX_FIELDS & set(update_fields):
+            self.sync_search_index([self])
+
+    def promote_statistics(self):
+        """将排序所需的统计数据冗余到独立字段"""
+        statistics: Dict[str, Any] = self.statistics or {}
+        for head in constants.HEAD_TUPLE:
+            setattr(self, head, statistics.get(head) or 0)
+
+    @classmethod
+    def sync_search_index(cls, jobs: Iterable["Job"]):
+        """
+        根据 bk_biz_scope / task_id_list 同步任务检索索引，仅增删有差异的记录
+        :param jobs: 任务列表
+        """
+        jobs: List[Job] = [job for job in jobs if job.id]
+        if not jobs:
+            return
+
+        job_ids: List[int] = [job.id for job in jobs]
+        for index_model, value_field, job_field in [
+            (JobBizIndex, "bk_biz_id", "bk_biz_scope"),
+            (JobTaskIndex, "task_id", "task_id_list"),
+        ]:
+            expect_job_id_value_pairs: Set[tuple] = {
+                # bk_biz_scope 存在为空字典的历史数据，统一视为无关联
+                (job.id, value)
+                for job in jobs
+                for value in (getattr(job, job_field) or [])
+            }
+            exist_job_id_value_pairs: Set[tuple] = set(
+                index_model.objects.filter(job_id__in=job_ids).values_list("job_id", value_field)
+            )
+
+            job_id__values_to_be_deleted: Dict[int, List[int]] = defaultdict(list)
+            for job_id, value in exist_job_id_value_pairs - expect_job_id_value_pairs:
+                job_id__values_to_be_deleted[job_id].append(value)
+            for job_id, values in job_id__values_to_be_deleted.items():
+                index_model.objects.filter(job_id=job_id, **{f"{value_field}__in": values}).delete()
+
+            index_model.objects.bulk_create(
+                [
+                    index_model(job_id=job_id, **{value_field: value})
+                    for job_id, value in expect_job_id_value_pairs - exist_job_id_value_pairs
+                ],
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+
     class Meta:
         verbose_name = _("任务信息（Job）")
         verbose_name_plural = _("任务信息（Job）")
         ordering = ["-id"]
 
 
+class JobBizIndex(models.Model):
+    """任务业务范围索引，由 Job.bk_biz_scope 展开，用于任务历史按业务过滤"""
+
+    job_id = models.IntegerField(_("任务ID"), db_index=True)
+    bk_biz_id = models.IntegerField(_("业务ID"))
+
+    class Meta:
+        unique_together = [["bk_biz_id", "job_id"]]
+        verbose_name = _("任务业务索引")
+        verbose_name_plural = _("任务业务索引")
+
+
+class JobTaskIndex(models.Model):
+    """任务订阅任务索引，由 Job.task_id_list 展开，用于任务历史按 IP 过滤"""
+
+    job_id = models.IntegerField(_("任务ID"), db_index=True)
+    task_id = models.IntegerField(_("订阅任务ID"))
+
+    class Meta:
+        unique_together = [["task_id", "job_id"]]
+        verbose_name = _("任务订阅任务索引")
+        verbose_name_plural = _("任务订阅任务索引")
+
+
 class JobTask(models.Model):
     """主机和任务关联表，存储任务详情及结果"""
 
@@ -1037,6 +1140,68 @@ class Packages(models.Model):
             )
             raise ValueError(_("找不到可导出插件，请确认后重试"))
 
+        artifact_cache = get_artifact_cache()
+        if artifact_cache:
+            # 导出产物由插件包内容决定，插件包未变更时直接复用已构建的产物
+            export_key = hashlib.md5(
+                "|".join(
+                    sorted(
+                        f"{package_obj.id}-{package_obj.project}-{package_obj.os}-"
+                        f"{package_obj.cpu_arch}-{package_obj.md5}"
+                        for package_obj in package_objs
+                    )
+                ).encode()
+            ).hexdigest()
+            export_dir = artifact_cache.get_or_create(
+                namespace="plugin_export",
+                key=export_key,
+                create_func=lambda _dir: cls.build_export_archive(project, version, package_objs, _dir),
+            )
+        else:
+            export_dir = files.mk_and_return_tmpdir()
+            cls.build_export_archive(project, version, package_objs, export_dir)
+
+        # 4. 将导出的插件上传到存储源
+        export_file_name = os.listdir(export_dir)[0]
+        plugin_export_target_path = os.path.join(settings.EXPORT_PATH, export_file_name)
+        storage = get_storage()
+        if artifact_cache and storage.exists(plugin_export_target_path):
+            # 导出文件名包含产物 MD5，同名文件内容一致，无需重复上传
+            storage_path = plugin_export_target_path
+        else:
+            with open(os.path.join(export_dir, export_file_name), mode="rb") as tf:
+                storage_path = storage.save(plugin_export_target_path, tf)
+
+        logger.info(
+            "export done: plugin-> {plugin_name} version -> {version} export file -> {storage_path}".format(
+                plugin_name=project, version=version, storage_path=storage_path
+            )
+        )
+
+        # 清除临时文件
+        if not artifact_cache:
+            shutil.rmtree(export_dir)
+
+        logger.info(
+            "plugin -> {plugin_name} version -> {version} export job success.".format(
+                plugin_name=project, version=version
+            )
+        )
+
+        return {"file_path": storage_path}
+
+    @classmethod
+    def build_export_archive(
+        cls, project: str, version: str, package_objs: Iterable["Packages"], export_dir: str
+    ) -> str:
+        """
+        将插件包解压合并后打包为导出产物
+        :param project: 导出的插件名
+        :param version: 导出的插件版本
+        :param package_objs: 需要导出的插件包
+        :param export_dir: 产物存放目录，产物名为 {project}-{version}-{md5}.tgz
+        :return: 产物路径
+        """
         # 临时的解压目录
         local_unzip_target_dir = files.mk_and_return_tmpdir()
         # 暂存导出插件的文件路径
@@ -1069,30 +1234,10 @@ class Packages(models.Model):
             )
         )
 
-        # 4. 将导出的插件上传到存储源
-        plugin_export_target_path = os.path.join(
-            settings.EXPORT_PATH, f"{project}-{version}-{files.md5sum(name=export_plugin_tmp_path)}.tgz"
-        )
-        with open(export_plugin_tmp_path, mode="rb") as tf:
-            storage_path = get_storage().save(plugin_export_target_path, tf)
-
-        logger.info(
-            "export done: plugin-> {plugin_name} version -> {version} export file -> {storage_path}".format(
-                plugin_name=project, version=version, storage_path=storage_path
-            )
-        )
-
-        # 清除临时文件
-        os.remove(export_plugin_tmp_path)
+        export_path = os.path.join(export_dir, f"{project}-{version}-{files.md5sum(name=export_plugin_tmp_path)}.tgz")
+        shutil.move(export_plugin_tmp_path, export_path)
         shutil.rmtree(local_unzip_target_dir)
-
-        logger.info(
-            "plugin -> {plugin_name} version -> {version} export job success.".format(
-                plugin_name=project, version=version
-            )
-        )
-
-        return {"file_path": storage_path}
+        return export_path
 
     def unzip(self, local_target_dir: str) -> None:
         """
@@ -1113,12 +1258,20 @@ class Packages(models.Model):
             )
             raise ValueError(_("插件包不存在，请联系管理员处理"))
 
-        # 将插件包解压到临时目录中
-        package_tmp_dir = files.mk_and_return_tmpdir()
-        # 文件的读取是从指定数据源（NFS或对象存储），可切换源模式，不直接使用原生open
-        with storage.open(name=file_path, mode="rb") as tf_from_storage:
-            with tarfile.open(fileobj=tf_from_storage) as tf:
-                tf.extractall(path=package_tmp_dir)
+        def _extract(_package_dir: str):
+            # 文件的读取是从指定数据源（NFS或对象存储），可切换源模式，不直接使用原生open
+            with storage.open(name=file_path, mode="rb") as tf_from_storage:
+                with tarfile.open(fileobj=tf_from_storage) as tf:
+                    tf.extractall(path=_package_dir)
+
+        artifact_cache = get_artifact_cache() if self.md5 else None
+        if artifact_cache:
+            # 插件包按 MD5 缓存解压结果，通过硬链接取出，避免重复下载及解压
+            package_tmp_dir = artifact_cache.get_or_create(namespace="package_tree", key=self.md5, create_func=_extract)
+        else:
+            # 将插件包解压到临时目录中
+            package_tmp_dir = files.mk_and_return_tmpdir()
+            _extract(package_tmp_dir)
 
         # 遍历插件包的一级目录，找出 PluginExternalTypePrefix 匹配的文件夹并加入到指定的解压目录
         # 一般来说，插件包是具体到机器操作系统类型的，所以 package_tmp_dir 下基本只有一个目录
@@ -1133,13 +1286,17 @@ class Packages(models.Model):
 
             # 将匹配的目录拷贝并格式化命名
             # 关于拷贝目录，参考：https://stackoverflow.com/questions/1868714/
-            copy_tree(
-                src=os.path.join(package_tmp_dir, external_type_prefix),
-                dst=os.path.join(*dst_shims),
-            )
+            if artifact_cache:
+                link_tree(src=os.path.join(package_tmp_dir, external_type_prefix), dst=os.path.join(*dst_shims))
+            else:
+                copy_tree(
+                    src=os.path.join(package_tmp_dir, external_type_prefix),
+                    dst=os.path.join(*dst_shims),
+                )
 
-        # 移除临时解压目录
-        shutil.rmtree(package_tmp_dir)
+        # 移除临时解压目录，缓存目录由缓存自行淘汰
+        if not artifact_cache:
+            shutil.rmtree(package_tmp_dir)
 
         logger.info(
             "package-> {pkg_name} os -> {os} cpu_arch -> {cpu_arch} unzip to "
@@ -1604,7 +1761,7 @@ class PluginConfigTemplate(models.Model):
         # 如果是拨测或远程采集，需要渲染ip，此时需要注入函数
         context = self.render_function(context)
 
-        rendered_config = nested_render_data(self.content, context)
+        rendered_config = nested_render_data(self.content, context, template_id=self.id)
         return rendered_config
 
     def render_function(self, context):
@@ -1634,7 +1791,7 @@ class PluginConfigInstance(models.Model):
         :param name: 名称参数
         :return: 渲染后的结果
         """
-        template = Template(name)
+        template = JINJA_TEMPLATE_CACHE.get_template(name)
         try:
             render_data = json.loads(self.render_data)
         except BaseException as e:
@@ -1655,7 +1812,8 @@ class PluginConfigInstance(models.Model):
         render_data = nested_render_data(render_data, extra_context)
 
         # 先用 extra_context 去渲染 render_data 本身
-        context = copy.deepcopy(extra_context)
+        # 渲染过程不会修改嵌套数据，浅拷贝第一层即可
+        context = dict(extra_context)
         context.update(render_data)
 
         # 如果是拨测或远程采集，需要渲染ip，此时需要注入函数
@@ -1675,7 +1833,9 @@ class PluginConfigInstance(models.Model):
     @property
     def jinja_template(self):
         if not hasattr(self, "_jinja_template"):
-            self._jinja_template = Template(self.template.content)
+            self._jinja_template = JINJA_TEMPLATE_CACHE.get_template(
+                self.template.content, template_id=self.plugin_config_template
+            )
         return self._jinja_template
 
     @property
@@ -2273,12 +2433,36 @@ class JobSubscriptionInstanceMap(models.Model):
 
 
 class SubscriptionInstanceLog(models.Model):
+    """
+    订阅实例日志，仅追加写入
+    原子执行过程中的日志按节点缓冲后批量插入，避免对 SubscriptionInstanceStatusDetail.log 反复拼接更新
+    """
+
+    id = models.BigAutoField(primary_key=True)
     subscription_instance_record_id = models.BigIntegerField(_("订阅实例ID"), db_index=True)
+    node_id = models.CharField(_("Pipeline原子ID"), max_length=50, default="", blank=True)
     log = models.TextField(_("日志内容"))
     level_name = models.SlugField(_("日志等级"), max_length=32)
     created_at = models.DateTimeField(_("创建时间"), auto_now_add=True, db_index=True)
 
+    @classmethod
+    def get_node_id_inst_log_map(cls, sub_inst_ids: Iterable[int]) -> Dict[str, str]:
+        """
+        获取订阅实例在各原子下追加的日志
+        :param sub_inst_ids: 订阅实例ID列表
+        :return: f"{node_id}-{subscription_instance_record_id}" - 日志内容 映射，多条日志按写入顺序以换行拼接
+        """
+        node_id_inst_logs_map: Dict[str, List[str]] = defaultdict(list)
+        for log in (
+            cls.objects.filter(subscription_instance_record_id__in=set(sub_inst_ids))
+            .order_by("id")
+            .values("subscription_instance_record_id", "node_id", "log")
+        ):
+            node_id_inst_logs_map[f"{log['node_id']}-{log['subscription_instance_record_id']}"].append(log["log"])
+        return {key: "\n".join(logs) for key, logs in node_id_inst_logs_map.items()}
+
     class Meta:
+        index_together = [["subscription_instance_record_id", "node_id"]]
         verbose_name = _("订阅实例日志")
         verbose_name_plural = _("订阅实例日志")
 
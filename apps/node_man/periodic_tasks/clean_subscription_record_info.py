@@ -8,11 +8,14 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import typing
+
 from celery.schedules import crontab
 from celery.task import periodic_task
 from django.utils import timezone
 
-from apps.node_man import models
+from apps.backend.subscription.lifecycle import scrub_instance_info
+from apps.node_man import constants, models
 from apps.node_man.models import SubscriptionInstanceRecord
 from common.log import logger
 
@@ -27,38 +30,33 @@ def update_subscription_instance_record(task_id):
         last_sub_task_id = 0
         models.GlobalSettings.set_config(KEY, last_sub_task_id)
 
-    last_sub_inst_record = (
-        SubscriptionInstanceRecord.objects.filter(update_time__lte=timezone.now() - timezone.timedelta(days=1))
+    expired_time = timezone.now() - timezone.timedelta(days=1)
+    # 定位清理上界后按主键区间分批扫描并批量更新，避免逐条查询及保存
+    boundary_id: typing.Optional[int] = (
+        SubscriptionInstanceRecord.objects.filter(update_time__lte=expired_time)
         .order_by("-id")
+        .values_list("id", flat=True)
         .first()
     )
-
-    record_query_set = SubscriptionInstanceRecord.objects.filter(
-        id__gte=last_sub_task_id,
-        update_time__lte=timezone.now() - timezone.timedelta(days=1),
-        need_clean=True,
-    )
-
-    last_sub_task_id = last_sub_inst_record.id or 0
-
-    # 结束递归
-    if not record_query_set:
-        models.GlobalSettings.update_config(KEY, last_sub_task_id)
+    if boundary_id is None:
         return
 
-    for record in record_query_set:
-        if isinstance(record.instance_info, dict):
-            try:
-                if record.instance_info["host"].get("password"):
-                    record.instance_info["host"]["password"] = ""
-                if record.instance_info["host"].get("key"):
-                    record.instance_info["host"]["key"] = ""
-            except (KeyError, TypeError):
-                pass
-            record.need_clean = False
-            record.save()
+    while last_sub_task_id < boundary_id:
+        end: int = min(last_sub_task_id + constants.QUERY_EXPIRED_INFO_LENS, boundary_id)
+        records_to_be_updated: typing.List[SubscriptionInstanceRecord] = []
+        for record_id, instance_info in SubscriptionInstanceRecord.objects.filter(
+            id__gt=last_sub_task_id, id__lte=end, update_time__lte=expired_time, need_clean=True
+        ).values_list("id", "instance_info"):
+            scrub_instance_info(instance_info)
+            records_to_be_updated.append(
+                SubscriptionInstanceRecord(id=record_id, instance_info=instance_info, need_clean=False)
+            )
 
-    models.GlobalSettings.update_config(KEY, last_sub_task_id)
+        SubscriptionInstanceRecord.objects.bulk_update(
+            records_to_be_updated, fields=["instance_info", "need_clean"], batch_size=constants.QUERY_EXPIRED_INFO_LENS
+        )
+        last_sub_task_id = end
+        models.GlobalSettings.update_config(KEY, last_sub_task_id)
 
 
 @periodic_task(
@@ -22,6 +22,7 @@ from django.db.utils import IntegrityError
 from apps.component.esbclient import client_v2
 from apps.node_man import constants
 from apps.node_man.models import GlobalSettings, Host, ResourceWatchEvent, Subscription
+from apps.node_man.tools.biz_host_topo import BizHostTopoCache
 from apps.utils.cache import format_cache_key
 
 logger = logging.getLogger("app")
@@ -187,6 +188,13 @@ def _resource_watch(cursor_key, kwargs):
             set_cursor(data, cursor_key)
             continue
 
+        # 事件入库前会按业务收敛，主机关系缓存需使用完整的事件列表更新
+        if kwargs["bk_resource"] == constants.ResourceType.host_relation and BizHostTopoCache.is_enabled():
+            try:
+                BizHostTopoCache.apply_host_relation_events(data["bk_events"])
+            except Exception as e:
+                logger.exception(f"[{cursor_key}] apply host relation events to cache failed: error -> {e}")
+
         event_helper: typing.Type[BaseEventPreprocessHelper] = RESOURCE_TYPE__EVENT_HELPER_MAP[kwargs["bk_resource"]]
 
         objs = [
@@ -19,18 +19,38 @@ from django.db.transaction import atomic
 from apps.adapters.api.gse import get_gse_api_helper
 from apps.core.gray.tools import GrayTools
 from apps.node_man import constants
-from apps.node_man.models import Host, ProcessStatus
+from apps.node_man.models import GlobalSettings, Host, ProcessStatus
 from apps.node_man.periodic_tasks.utils import query_bk_biz_ids
+from apps.node_man.tools.agent_state import AgentStateCache, AgentStateSnapshot
 from apps.utils.periodic_task import calculate_countdown
 from common.log import logger
 
 
+def get_agent_status(agent_state_info: typing.Dict[str, typing.Any], node_from: str) -> str:
+    """
+    根据 GSE Agent 存活状态及主机来源，计算 Agent 进程状态
+    :param agent_state_info: GSE Agent 状态信息
+    :param node_from: 主机来源
+    :return: 进程状态
+    """
+    if agent_state_info["bk_agent_alive"] == constants.BkAgentStatus.ALIVE.value:
+        return constants.ProcStateType.RUNNING
+
+    # Agent 未存活时，细分异常状态
+    if node_from == constants.NodeFrom.CMDB:
+        # 主机来源于 CMDB，标记为未安装
+        return constants.ProcStateType.NOT_INSTALLED
+    # 主机来源于自身，标记为终止
+    return constants.ProcStateType.TERMINATED
+
+
 @task(queue="default", ignore_result=True)
-def update_or_create_host_agent_status(task_id: int, host_queryset: QuerySet):
+def update_or_create_host_agent_status(task_id: int, host_queryset: QuerySet, incremental: bool = False):
     """
     更新 Agent 状态
     :param task_id: 任务 ID
     :param host_queryset: 主机查询条件
+    :param incremental: 是否增量更新，仅对比及写入状态快照发生变化的 Agent
     :return:
     """
     hosts: typing.List[typing.Dict[str, typing.Any]] = list(
@@ -73,10 +93,31 @@ def update_or_create_host_agent_status(task_id: int, host_queryset: QuerySet):
         gse_api_helper = get_gse_api_helper(gse_version)
         agent_id__agent_state_info_map.update(gse_api_helper.list_agent_state(query_hosts))
 
+    agent_id__status_map: typing.Dict[str, str] = {
+        agent_id: get_agent_status(agent_state_info, agent_id__node_from_map[agent_id])
+        for agent_id, agent_state_info in agent_id__agent_state_info_map.items()
+    }
+
+    # 增量模式下，与快照一致的 Agent 无需查询及更新 DB
+    agent_id__encoded_state_map: typing.Dict[str, str] = {}
+    to_be_synced_agent_ids: typing.Set[str] = set(agent_id__agent_state_info_map.keys())
+    if incremental:
+        agent_id__encoded_state_map = {
+            agent_id: AgentStateSnapshot.encode_state(
+                agent_id__status_map[agent_id], agent_id__agent_state_info_map[agent_id]["version"]
+            )
+            for agent_id in agent_id__agent_state_info_map
+        }
+        to_be_synced_agent_ids = AgentStateSnapshot.filter_changed_agent_ids(agent_id__encoded_state_map)
+        logger.info(
+            f"{task_id} | sync_agent_status_task: Unchanged in snapshot "
+            f"count -> {len(agent_id__agent_state_info_map) - len(to_be_synced_agent_ids)}"
+        )
+
     # 查询需要更新主机的ProcessStatus对象
     process_status_infos: typing.List[typing.Dict[str, typing.Any]] = ProcessStatus.objects.filter(
         name=ProcessStatus.GSE_AGENT_PROCESS_NAME,
-        bk_host_id__in=agent_id__host_id_map.values(),
+        bk_host_id__in=[agent_id__host_id_map[agent_id] for agent_id in to_be_synced_agent_ids],
         source_type=ProcessStatus.SourceType.DEFAULT,
     ).values("bk_host_id", "id", "status", "version")
 
@@ -102,37 +143,33 @@ def update_or_create_host_agent_status(task_id: int, host_queryset: QuerySet):
     to_be_updated_process_status_objs: typing.List[ProcessStatus] = []
     to_be_created_process_status_objs: typing.List[ProcessStatus] = []
     host_id__agent_state_info: typing.Dict[int, typing.Dict[str, int]] = {}
+    changed_host_ids: typing.Set[int] = set()
     for agent_id, agent_state_info in agent_id__agent_state_info_map.items():
+        status: str = agent_id__status_map[agent_id]
+        agent_state_info["status_display"] = status
+        host_id__agent_state_info[agent_id__host_id_map[agent_id]] = agent_state_info
+
+        if agent_id not in to_be_synced_agent_ids:
+            not_need_to_be_updated_process_status_count += 1
+            continue
+
         process_status_info: typing.Optional[typing.Dict[str, typing.Any]] = host_id__process_status_info_map.get(
             agent_id__host_id_map[agent_id]
         )
-        is_running: bool = agent_state_info["bk_agent_alive"] == constants.BkAgentStatus.ALIVE.value
         version: str = agent_state_info["version"]
 
-        if is_running:
-            status = constants.ProcStateType.RUNNING
-            if agent_id__node_from_map[agent_id] == constants.NodeFrom.CMDB:
-                # Agent 状态正常的情况下，节点管控权划至节点管理
-                to_be_updated_node_from_host_objs.append(
-                    Host(bk_host_id=agent_id__host_id_map[agent_id], node_from=constants.NodeFrom.NODE_MAN)
-                )
-        else:
-            # Agent 未存活时，细分异常状态
-            if agent_id__node_from_map[agent_id] == constants.NodeFrom.CMDB:
-                # 主机来源于 CMDB，标记为未安装
-                status = constants.ProcStateType.NOT_INSTALLED
-            else:
-                # 主机来源于自身，标记为终止
-                status = constants.ProcStateType.TERMINATED
-
-        agent_state_info["status_display"] = status
-        host_id__agent_state_info[agent_id__host_id_map[agent_id]] = agent_state_info
+        if status == constants.ProcStateType.RUNNING and agent_id__node_from_map[agent_id] == constants.NodeFrom.CMDB:
+            # Agent 状态正常的情况下，节点管控权划至节点管理
+            to_be_updated_node_from_host_objs.append(
+                Host(bk_host_id=agent_id__host_id_map[agent_id], node_from=constants.NodeFrom.NODE_MAN)
+            )
 
         if not process_status_info:
             # 如果不存在 ProcessStatus 对象需要创建
             to_be_created_process_status_objs.append(
                 ProcessStatus(bk_host_id=agent_id__host_id_map[agent_id], status=status, version=version)
             )
+            changed_host_ids.add(agent_id__host_id_map[agent_id])
         else:
             if status == process_status_info["status"] and version == process_status_info["version"]:
                 # 状态信息一致，无需更新
@@ -142,6 +179,7 @@ def update_or_create_host_agent_status(task_id: int, host_queryset: QuerySet):
             to_be_updated_process_status_objs.append(
                 ProcessStatus(id=process_status_info["id"], status=status, version=version)
             )
+            changed_host_ids.add(agent_id__host_id_map[agent_id])
 
     logger.info(
         f"{task_id} | sync_agent_status_task: Not need to update record "
@@ -161,6 +199,17 @@ def update_or_create_host_agent_status(task_id: int, host_queryset: QuerySet):
         if to_be_delete_process_status_ids:
             __, delete_row_count = ProcessStatus.objects.filter(id__in=to_be_delete_process_status_ids).delete()
             logger.info(f"{task_id} | sync_agent_status_task: Deleted {delete_row_count} duplicate records")
+
+    if incremental:
+        # DB 写入成功后再更新快照，避免写入失败导致后续同步被跳过
+        AgentStateSnapshot.save(
+            {agent_id: agent_id__encoded_state_map[agent_id] for agent_id in to_be_synced_agent_ids},
+            changed_host_ids=changed_host_ids,
+        )
+
+    if GlobalSettings.get_config(key=GlobalSettings.KeyEnum.ENABLE_AGENT_STATE_CACHE.value, default=False):
+        AgentStateCache.save(host_id__agent_state_info)
+
     logger.info(
         f"{task_id} | sync_agent_status_task: Complete agent status update, "
         f"start Host ID -> {hosts[0]['bk_host_id']}, count -> {len(hosts)}"
@@ -181,6 +230,15 @@ def sync_agent_status_periodic_task():
     task_id = sync_agent_status_periodic_task.request.id
     logger.info(f"{task_id} | sync_agent_status_task: start to sync agent status")
 
+    enable_incremental: bool = GlobalSettings.get_config(
+        key=GlobalSettings.KeyEnum.ENABLE_INCREMENTAL_SYNC_AGENT_STATUS.value, default=False
+    )
+    if enable_incremental:
+        round_num: int = AgentStateSnapshot.next_round()
+        if not AgentStateSnapshot.is_full_round(round_num):
+            sync_priority_agent_status(task_id, round_num)
+            return
+
     # 查询所有需要同步的业务id
     bk_biz_ids = query_bk_biz_ids(task_id)
     # 若没有指定业务时，也同步资源池主机
@@ -208,7 +266,43 @@ def sync_agent_status_periodic_task():
             )
             logger.info(f"{task_id} | sync_agent_status_task: bk_biz_id -> {bk_biz_id}, sync after {countdown} seconds")
             update_or_create_host_agent_status.apply_async(
-                (task_id, host_queryset[start : start + constants.QUERY_AGENT_STATUS_HOST_LENS]), countdown=countdown
+                (task_id, host_queryset[start : start + constants.QUERY_AGENT_STATUS_HOST_LENS]),
+                kwargs={"incremental": enable_incremental},
+                countdown=countdown,
             )
 
         logger.info(f"{task_id} | sync_agent_status_task: sync agent status complete")
+
+
+def sync_priority_agent_status(task_id: int, round_num: int):
+    """
+    增量同步：仅同步近期状态发生变化及订阅执行中的主机
+    其余主机的状态变化（如 Agent 离线）需等到下一次全量同步才能发现，
+    最长延迟 SYNC_AGENT_STATUS_FULL_ROUND_INTERVAL * SYNC_AGENT_STATUS_TASK_INTERVAL
+    :param task_id: 任务 ID
+    :param round_num: 同步轮次
+    :return:
+    """
+    bk_host_ids: typing.Set[int] = (
+        AgentStateSnapshot.list_recently_changed_host_ids() | AgentStateSnapshot.list_running_subscription_host_ids()
+    )
+    logger.info(
+        f"{task_id} | sync_agent_status_task: incremental round -> {round_num}, "
+        f"priority host_count -> {len(bk_host_ids)}"
+    )
+    if not bk_host_ids:
+        return
+
+    host_queryset = Host.objects.filter(bk_host_id__in=bk_host_ids).order_by("bk_host_id")
+    count = len(bk_host_ids)
+    for start in range(0, count, constants.QUERY_AGENT_STATUS_HOST_LENS):
+        countdown = calculate_countdown(
+            count=count / constants.QUERY_AGENT_STATUS_HOST_LENS,
+            index=start / constants.QUERY_AGENT_STATUS_HOST_LENS,
+            duration=constants.SYNC_AGENT_STATUS_TASK_INTERVAL,
+        )
+        update_or_create_host_agent_status.apply_async(
+            (task_id, host_queryset[start : start + constants.QUERY_AGENT_STATUS_HOST_LENS]),
+            kwargs={"incremental": True},
+            countdown=countdown,
+        )
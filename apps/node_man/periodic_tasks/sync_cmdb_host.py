@@ -21,17 +21,17 @@ from apps.component.esbclient import client_v2
 from apps.exceptions import ComponentCallError
 from apps.node_man import constants, models, tools
 from apps.node_man.periodic_tasks.utils import query_bk_biz_ids
-from apps.utils.batch_request import batch_request
+from apps.utils.batch_request import batch_request_iter
 from apps.utils.concurrent import batch_call
 from common.log import logger
 
 
-def query_biz_hosts(bk_biz_id: int, bk_host_ids: typing.List[int]) -> typing.List[typing.Dict]:
+def iter_query_biz_hosts(bk_biz_id: int, bk_host_ids: typing.List[int]) -> typing.Iterator[typing.List[typing.Dict]]:
     """
-    获取业务下主机
+    分页获取业务下主机
     :param bk_biz_id: 业务ID
     :param bk_host_ids: 主机ID 列表
-    :return: 主机列表
+    :return: 主机分页迭代器
     """
     query_params = {
         "fields": constants.CC_HOST_FIELDS,
@@ -46,8 +46,19 @@ def query_biz_hosts(bk_biz_id: int, bk_host_ids: typing.List[int]) -> typing.Lis
         query_params["bk_biz_id"] = bk_biz_id
         query_hosts_api = client_v2.cc.list_biz_hosts
 
-    hosts = batch_request(query_hosts_api, query_params)
+    return batch_request_iter(query_hosts_api, query_params)
+
 
+def query_biz_hosts(bk_biz_id: int, bk_host_ids: typing.List[int]) -> typing.List[typing.Dict]:
+    """
+    获取业务下主机
+    :param bk_biz_id: 业务ID
+    :param bk_host_ids: 主机ID 列表
+    :return: 主机列表
+    """
+    hosts: typing.List[typing.Dict] = []
+    for page_hosts in iter_query_biz_hosts(bk_biz_id, bk_host_ids):
+        hosts.extend(page_hosts)
     return hosts
 
 
@@ -288,12 +299,11 @@ def sync_biz_incremental_hosts(bk_biz_id: int, expected_bk_host_ids: typing.Iter
     )
     # 计算出对比本地主机缓存，增量的主机 ID
     incremental_host_ids: typing.List[int] = list(expected_bk_host_ids - exists_host_ids)
-    # 尝试获取增量主机信息
-    hosts: typing.List[typing.Dict] = query_biz_hosts(bk_biz_id=bk_biz_id, bk_host_ids=incremental_host_ids)
-    # 更新本地缓存
-    update_or_create_host_base(
-        biz_id=bk_biz_id, task_id=f"differential_sync_biz_hosts_{bk_biz_id}", cmdb_host_data=hosts
-    )
+    # 尝试获取增量主机信息，逐页更新本地缓存，无需等待全部主机返回
+    for page_hosts in iter_query_biz_hosts(bk_biz_id=bk_biz_id, bk_host_ids=incremental_host_ids):
+        update_or_create_host_base(
+            biz_id=bk_biz_id, task_id=f"differential_sync_biz_hosts_{bk_biz_id}", cmdb_host_data=page_hosts
+        )
 
 
 def bulk_differential_sync_biz_hosts(expected_bk_host_ids_gby_bk_biz_id: typing.Dict[int, typing.Iterable[int]]):
@@ -21,10 +21,35 @@ from apps.core.gray.tools import GrayTools
 from apps.node_man import constants, tools
 from apps.node_man.models import Host, ProcessStatus
 from apps.node_man.periodic_tasks.utils import query_bk_biz_ids
+from apps.utils import concurrent
 from apps.utils.periodic_task import calculate_countdown
 from common.log import logger
 
 
+def list_proc_state(
+    proc_name: str, gse_version__query_hosts_map: typing.Dict[str, typing.List[typing.Dict]]
+) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """
+    查询单个插件在各 GSE 版本主机上的进程状态
+    :param proc_name: 插件名称
+    :param gse_version__query_hosts_map: GSE 版本 - 待查询主机列表 映射
+    :return: Agent ID - 进程状态 映射
+    """
+    agent_id__readable_proc_status_map: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+    for gse_version, query_hosts in gse_version__query_hosts_map.items():
+        gse_api_helper = get_gse_api_helper(gse_version)
+        agent_id__readable_proc_status_map.update(
+            gse_api_helper.list_proc_state(
+                namespace=constants.GSE_NAMESPACE,
+                proc_name=proc_name,
+                labels={"proc_name": proc_name},
+                host_info_list=query_hosts,
+                extra_meta_data={},
+            )
+        )
+    return agent_id__readable_proc_status_map
+
+
 @task(queue="default", ignore_result=True)
 def update_or_create_proc_status(
     task_id: int,
@@ -63,47 +88,44 @@ def update_or_create_proc_status(
             }
         )
 
-    for proc_name in proc_names:
-
-        logger.info(f"{task_id} | sync_proc_status_task: Start updating {proc_name} status")
-
-        agent_id__readable_proc_status_map: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
-        for gse_version, query_hosts in gse_version__query_hosts_map.items():
-            gse_api_helper = get_gse_api_helper(gse_version)
-            agent_id__readable_proc_status_map.update(
-                gse_api_helper.list_proc_state(
-                    namespace=constants.GSE_NAMESPACE,
-                    proc_name=proc_name,
-                    labels={"proc_name": proc_name},
-                    host_info_list=query_hosts,
-                    extra_meta_data={},
-                )
-            )
+    # 各插件进程状态并发查询，耗时由插件数量的累加降为单次查询的耗时
+    logger.info(f"{task_id} | sync_proc_status_task: Start querying proc status, proc_names -> {proc_names}")
+    agent_id__readable_proc_status_map_list: typing.List[
+        typing.Dict[str, typing.Dict[str, typing.Any]]
+    ] = concurrent.batch_call(
+        func=list_proc_state,
+        params_list=[
+            {"proc_name": proc_name, "gse_version__query_hosts_map": gse_version__query_hosts_map}
+            for proc_name in proc_names
+        ],
+    )
 
-        process_status_infos = ProcessStatus.objects.filter(
-            name=proc_name,
-            bk_host_id__in=agent_id__host_id_map.values(),
-            source_type=ProcessStatus.SourceType.DEFAULT,
-            proc_type=constants.ProcType.PLUGIN,
-            is_latest=True,
-        ).values("bk_host_id", "id", "name", "status", "is_auto", "version")
-
-        recorded_host_proc_key: typing.Set[str] = set()
-        to_be_delete_process_status_ids: typing.List[int] = []
-        host_proc_key__proc_status_info_map: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
-        for process_status_info in process_status_infos:
-            host_proc_key: str = f"{process_status_info['name']}:{process_status_info['bk_host_id']}"
-            if host_proc_key in recorded_host_proc_key:
-                # 重复进程状态信息，暂存 id 后续删除
-                to_be_delete_process_status_ids.append(process_status_info["id"])
-                continue
-            recorded_host_proc_key.add(host_proc_key)
-            host_proc_key__proc_status_info_map[host_proc_key] = process_status_info
+    # 一次性查询全部插件的进程状态记录
+    process_status_infos = ProcessStatus.objects.filter(
+        name__in=proc_names,
+        bk_host_id__in=agent_id__host_id_map.values(),
+        source_type=ProcessStatus.SourceType.DEFAULT,
+        proc_type=constants.ProcType.PLUGIN,
+        is_latest=True,
+    ).values("bk_host_id", "id", "name", "status", "is_auto", "version")
+
+    recorded_host_proc_key: typing.Set[str] = set()
+    to_be_delete_process_status_ids: typing.List[int] = []
+    host_proc_key__proc_status_info_map: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+    for process_status_info in process_status_infos:
+        host_proc_key: str = f"{process_status_info['name']}:{process_status_info['bk_host_id']}"
+        if host_proc_key in recorded_host_proc_key:
+            # 重复进程状态信息，暂存 id 后续删除
+            to_be_delete_process_status_ids.append(process_status_info["id"])
+            continue
+        recorded_host_proc_key.add(host_proc_key)
+        host_proc_key__proc_status_info_map[host_proc_key] = process_status_info
 
-        not_need_to_be_updated_process_status_count: int = 0
-        to_be_updated_process_status_objs: typing.List[ProcessStatus] = []
-        to_be_created_process_status_objs: typing.List[ProcessStatus] = []
+    not_need_to_be_updated_process_status_count: int = 0
+    to_be_updated_process_status_objs: typing.List[ProcessStatus] = []
+    to_be_created_process_status_objs: typing.List[ProcessStatus] = []
 
+    for agent_id__readable_proc_status_map in agent_id__readable_proc_status_map_list:
         for agent_id, readable_proc_status in agent_id__readable_proc_status_map.items():
             if agent_id not in agent_id__host_id_map:
                 continue
@@ -159,29 +181,23 @@ def update_or_create_proc_status(
                 if obj.status != constants.ProcStateType.UNREGISTER:
                     to_be_created_process_status_objs.append(obj)
 
-        logger.info(
-            f"{task_id} | sync_proc_status_task: Not need to update record "
-            f"count -> {not_need_to_be_updated_process_status_count}"
-        )
-
-        with atomic():
-            if to_be_updated_process_status_objs:
-                ProcessStatus.objects.bulk_update(
-                    to_be_updated_process_status_objs, fields=["status", "version", "is_auto"], batch_size=1000
-                )
-                logger.info(
-                    f"{task_id} | sync_proc_status_task: Updated {len(to_be_updated_process_status_objs)} records"
-                )
-            if to_be_created_process_status_objs:
-                ProcessStatus.objects.bulk_create(to_be_created_process_status_objs, batch_size=1000)
-                logger.info(
-                    f"{task_id} | sync_proc_status_task: Created {len(to_be_created_process_status_objs)} records"
-                )
-            if to_be_delete_process_status_ids:
-                __, delete_row_count = ProcessStatus.objects.filter(id__in=to_be_delete_process_status_ids).delete()
-                logger.info(f"{task_id} | sync_proc_status_task: Deleted {delete_row_count} duplicate records")
+    logger.info(
+        f"{task_id} | sync_proc_status_task: Not need to update record "
+        f"count -> {not_need_to_be_updated_process_status_count}"
+    )
 
-        logger.info(f"{task_id} | sync_proc_status_task: Complete [{proc_name}] status update")
+    with atomic():
+        if to_be_updated_process_status_objs:
+            ProcessStatus.objects.bulk_update(
+                to_be_updated_process_status_objs, fields=["status", "version", "is_auto"], batch_size=1000
+            )
+            logger.info(f"{task_id} | sync_proc_status_task: Updated {len(to_be_updated_process_status_objs)} records")
+        if to_be_created_process_status_objs:
+            ProcessStatus.objects.bulk_create(to_be_created_process_status_objs, batch_size=1000)
+            logger.info(f"{task_id} | sync_proc_status_task: Created {len(to_be_created_process_status_objs)} records")
+        if to_be_delete_process_status_ids:
+            __, delete_row_count = ProcessStatus.objects.filter(id__in=to_be_delete_process_status_ids).delete()
+            logger.info(f"{task_id} | sync_proc_status_task: Deleted {delete_row_count} duplicate records")
 
     logger.info(
         f"{task_id} | sync_proc_status_task: Complete proc status update, "
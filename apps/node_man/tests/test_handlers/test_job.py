@@ -26,7 +26,13 @@ from apps.node_man.exceptions import (
     MixedOperationError,
 )
 from apps.node_man.handlers.job import JobHandler
-from apps.node_man.models import Host, Job, SubscriptionInstanceRecord
+from apps.node_man.models import (
+    GlobalSettings,
+    Host,
+    Job,
+    JobTaskIndex,
+    SubscriptionInstanceRecord,
+)
 from apps.node_man.tests.utils import (
     SEARCH_BUSINESS,
     MockClient,
@@ -190,6 +196,39 @@ class TestJob(TestCase):
         )
         self.assertEqual(multiple_ip_result["total"], 2)
 
+    @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
+    def test_job_list_with_search_index(self):
+        """测试 通过任务检索索引过滤及排序"""
+        GlobalSettings.set_config(GlobalSettings.KeyEnum.ENABLE_JOB_SEARCH_INDEX.value, True)
+        create_host(1, bk_cloud_id=0, ip="127.0.0.1")
+
+        create_job(1, bk_biz_scope=[SEARCH_BUSINESS[0]["bk_biz_id"]], task_id_list=[1], created_by="blueking")
+        create_job(1, id=2, bk_biz_scope=[999], task_id_list=[1, 2], created_by="admin")
+        # 批量创建的任务不经过 save，需手动同步索引
+        Job.sync_search_index(Job.objects.all())
+
+        job = Job.objects.get(id=2)
+        job.statistics = {"success_count": 1, "failed_count": 0, "total_count": 1}
+        job.task_id_list = [2]
+        job.save(update_fields=["statistics", "task_id_list"])
+        self.assertEqual(Job.objects.get(id=2).total_count, 1)
+        self.assertEqual(set(JobTaskIndex.objects.filter(job_id=2).values_list("task_id", flat=True)), {2})
+
+        SubscriptionInstanceRecord.objects.create(
+            task_id=1, subscription_id=1, instance_id="host|instance|host|127.0.0.1-0-0", is_latest=True
+        )
+
+        result = JobHandler().list({"page": 1, "pagesize": 10, "bk_biz_id": [SEARCH_BUSINESS[0]["bk_biz_id"]]}, "admin")
+        self.assertEqual([job["id"] for job in result["list"]], [1])
+
+        result = JobHandler().list(
+            {"page": 1, "pagesize": 10, "sort": {"sort_type": constants.SortType.DEC, "head": "total_count"}}, "admin"
+        )
+        self.assertEqual([job["id"] for job in result["list"]], [2, 1])
+
+        result = JobHandler().list({"page": 1, "pagesize": 10, "inner_ip_list": ["127.0.0.1"]}, "admin")
+        self.assertEqual([job["id"] for job in result["list"]], [1])
+
     @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
     def test_job_list_spend_time(self):
         """测试查询时间"""
@@ -13,6 +13,7 @@ from unittest.mock import patch
 from django.conf import settings
 from django.test import override_settings
 
+from apps.backend.utils.redis import REDIS_INST
 from apps.mock_data.api_mkd.gse.unit import GSE_PROCESS_VERSION
 from apps.mock_data.api_mkd.gse.utils import GseApiMockClient, get_gse_api_helper
 from apps.mock_data.common_unit.host import (
@@ -20,12 +21,13 @@ from apps.mock_data.common_unit.host import (
     HOST_MODEL_DATA_WITH_AGENT_ID,
 )
 from apps.node_man import constants
-from apps.node_man.models import Host, ProcessStatus
+from apps.node_man.models import GlobalSettings, Host, ProcessStatus
 from apps.node_man.periodic_tasks.sync_agent_status_task import (
     sync_agent_status_periodic_task,
     update_or_create_host_agent_status,
 )
 from apps.node_man.tests.test_pericdic_tasks.utils import MockClient
+from apps.node_man.tools.agent_state import AgentStateCache, AgentStateSnapshot
 from apps.utils.unittest.testcase import CustomBaseTestCase
 from env.constants import GseVersion
 
@@ -101,3 +103,50 @@ class TestSyncAgentStatus(CustomBaseTestCase):
         update_or_create_host_agent_status(None, Host.objects.all())
         process_status = ProcessStatus.objects.get(bk_host_id=host.bk_host_id)
         self.assertEqual(process_status.status, constants.ProcStateType.NOT_INSTALLED)
+
+    @patch(
+        "apps.node_man.periodic_tasks.sync_agent_status_task.get_gse_api_helper",
+        get_gse_api_helper(settings.GSE_VERSION, GseApiMockClient()),
+    )
+    def test_update_or_create_host_agent_status_incremental(self):
+        REDIS_INST.delete(AgentStateSnapshot.SNAPSHOT_KEY, AgentStateSnapshot.RECENTLY_CHANGED_KEY)
+        host = Host.objects.create(**HOST_MODEL_DATA)
+        update_or_create_host_agent_status(None, Host.objects.all(), incremental=True)
+        self.assertEqual(ProcessStatus.objects.get(bk_host_id=host.bk_host_id).status, constants.ProcStateType.RUNNING)
+        self.assertEqual(AgentStateSnapshot.list_recently_changed_host_ids(), {host.bk_host_id})
+
+        # 状态与快照一致，不再查询及写入 DB
+        ProcessStatus.objects.filter(bk_host_id=host.bk_host_id).delete()
+        host_id__agent_state_info = update_or_create_host_agent_status(None, Host.objects.all(), incremental=True)
+        self.assertEqual(ProcessStatus.objects.filter(bk_host_id=host.bk_host_id).count(), 0)
+        self.assertEqual(host_id__agent_state_info[host.bk_host_id]["status_display"], constants.ProcStateType.RUNNING)
+
+        # 快照失效后，重新对比 DB
+        REDIS_INST.delete(AgentStateSnapshot.SNAPSHOT_KEY)
+        update_or_create_host_agent_status(None, Host.objects.all(), incremental=True)
+        self.assertEqual(ProcessStatus.objects.get(bk_host_id=host.bk_host_id).status, constants.ProcStateType.RUNNING)
+        REDIS_INST.delete(AgentStateSnapshot.SNAPSHOT_KEY, AgentStateSnapshot.RECENTLY_CHANGED_KEY)
+
+    @patch(
+        "apps.node_man.periodic_tasks.sync_agent_status_task.get_gse_api_helper",
+        get_gse_api_helper(settings.GSE_VERSION, GseApiMockClient()),
+    )
+    def test_update_agent_state_cache(self):
+        host = Host.objects.create(**HOST_MODEL_DATA)
+        REDIS_INST.delete(
+            AgentStateCache.CACHE_KEY_TPL.format(bk_host_id=host.bk_host_id),
+            AgentStateCache.REFRESH_LOCK_KEY_TPL.format(bk_host_id=host.bk_host_id),
+        )
+        # 缓存缺失，需要刷新
+        host_id__agent_state_map, to_be_refreshed_host_ids = AgentStateCache.get_many([host.bk_host_id])
+        self.assertEqual((host_id__agent_state_map, to_be_refreshed_host_ids), ({}, {host.bk_host_id}))
+        # 同一刷新间隔内仅允许触发一次刷新
+        self.assertEqual(AgentStateCache.acquire_refresh([host.bk_host_id]), {host.bk_host_id})
+        self.assertEqual(AgentStateCache.acquire_refresh([host.bk_host_id]), set())
+
+        GlobalSettings.set_config(GlobalSettings.KeyEnum.ENABLE_AGENT_STATE_CACHE.value, True)
+        update_or_create_host_agent_status(None, Host.objects.all())
+        host_id__agent_state_map, to_be_refreshed_host_ids = AgentStateCache.get_many([host.bk_host_id])
+        self.assertEqual(host_id__agent_state_map[host.bk_host_id]["status_display"], constants.ProcStateType.RUNNING)
+        self.assertEqual(host_id__agent_state_map[host.bk_host_id]["version"], GSE_PROCESS_VERSION)
+        self.assertEqual(to_be_refreshed_host_ids, set())
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import mock
+
+from apps.backend.utils.redis import REDIS_INST
+from apps.node_man.tools import BizHostTopoCache
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class BizHostTopoCacheTestCase(CustomBaseTestCase):
+    BK_BIZ_ID = 2
+
+    def setUp(self) -> None:
+        REDIS_INST.delete(
+            BizHostTopoCache.RELATION_KEY_TPL.format(bk_biz_id=self.BK_BIZ_ID),
+            BizHostTopoCache.TOPO_NODE_KEY_TPL.format(bk_biz_id=self.BK_BIZ_ID),
+        )
+        self.fetch_host_topo_relations = mock.patch.object(
+            BizHostTopoCache,
+            "fetch_host_topo_relations",
+            return_value=[
+                {"bk_biz_id": self.BK_BIZ_ID, "bk_host_id": 1, "bk_set_id": 3, "bk_module_id": 4},
+                {"bk_biz_id": self.BK_BIZ_ID, "bk_host_id": 2, "bk_set_id": 3, "bk_module_id": 4},
+            ],
+        ).start()
+        mock.patch.object(
+            BizHostTopoCache,
+            "fetch_topo_nodes",
+            return_value={
+                "module_to_topo": {"module|4": ["biz|2", "set|3", "module|4"]},
+                "node_id__name_map": {"set|3": "set", "module|4": "module"},
+            },
+        ).start()
+        super().setUp()
+
+    def test_get_host_topo_paths(self):
+        self.assertEqual(BizHostTopoCache.get_host_topo_paths(self.BK_BIZ_ID, [1, 3]), {1: ["set / module"]})
+        # 命中缓存，不再请求 CMDB
+        self.assertEqual(len(BizHostTopoCache.get_host_topo_relations(self.BK_BIZ_ID)), 2)
+        self.assertEqual(self.fetch_host_topo_relations.call_count, 1)
+
+    def test_apply_host_relation_events(self):
+        BizHostTopoCache.get_host_topo_relations(self.BK_BIZ_ID)
+        BizHostTopoCache.apply_host_relation_events(
+            [
+                {
+                    "bk_event_type": "delete",
+                    "bk_detail": {"bk_biz_id": self.BK_BIZ_ID, "bk_host_id": 1, "bk_set_id": 3, "bk_module_id": 4},
+                },
+                {
+                    "bk_event_type": "create",
+                    "bk_detail": {"bk_biz_id": self.BK_BIZ_ID, "bk_host_id": 1, "bk_set_id": 3, "bk_module_id": 5},
+                },
+                {
+                    "bk_event_type": "delete",
+                    "bk_detail": {"bk_biz_id": self.BK_BIZ_ID, "bk_host_id": 2, "bk_set_id": 3, "bk_module_id": 4},
+                },
+            ]
+        )
+        self.assertEqual(
+            BizHostTopoCache.get_host_topo_relations(self.BK_BIZ_ID, [1, 2]),
+            [{"bk_biz_id": self.BK_BIZ_ID, "bk_host_id": 1, "bk_set_id": 3, "bk_module_id": 5}],
+        )
+        self.assertEqual(self.fetch_host_topo_relations.call_count, 1)
@@ -14,6 +14,8 @@ specific language governing permissions and limitations under the License.
 防止handlers互调导致循环依赖
 """
 
+from .agent_state import AgentStateSnapshot  # noqa
+from .biz_host_topo import BizHostTopoCache  # noqa
 from .host import HostTools  # noqa
 from .host_v2 import HostV2Tools  # noqa
 from .job import JobTools  # noqa
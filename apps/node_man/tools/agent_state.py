@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import time
+import typing
+
+import ujson as json
+from django.conf import settings
+
+from apps.backend.utils.redis import REDIS_INST
+from apps.node_man import constants, models
+
+
+class AgentStateSnapshot:
+    """
+    Agent 状态快照
+    以 Redis Hash 记录每个 Agent 最近一次落库的状态（agent_id -> "status|version"），
+    同步时仅对状态发生变化的 Agent 查询及写入 DB，并记录近期状态变更的主机，供增量同步优先处理
+    """
+
+    SNAPSHOT_KEY: str = f"{settings.APP_CODE}:node_man:agent_state:snapshot:hash"
+    RECENTLY_CHANGED_KEY: str = f"{settings.APP_CODE}:node_man:agent_state:recently_changed:zset"
+    ROUND_KEY: str = f"{settings.APP_CODE}:node_man:agent_state:round:str"
+
+    @staticmethod
+    def encode_state(status: str, version: typing.Optional[str]) -> str:
+        return f"{status}|{version or ''}"
+
+    @classmethod
+    def filter_changed_agent_ids(cls, agent_id__state_map: typing.Dict[str, str]) -> typing.Set[str]:
+        """
+        过滤出与快照不一致的 Agent
+        :param agent_id__state_map: Agent ID - 编码后的状态 映射
+        :return: 状态变化（含快照中不存在）的 Agent ID 集合
+        """
+        if not agent_id__state_map:
+            return set()
+        agent_ids: typing.List[str] = list(agent_id__state_map.keys())
+        snapshot_states: typing.List[typing.Optional[bytes]] = REDIS_INST.hmget(cls.SNAPSHOT_KEY, agent_ids)
+        return {
+            agent_id
+            for agent_id, snapshot_state in zip(agent_ids, snapshot_states)
+            if snapshot_state is None or snapshot_state.decode() != agent_id__state_map[agent_id]
+        }
+
+    @classmethod
+    def save(cls, agent_id__state_map: typing.Dict[str, str], changed_host_ids: typing.Iterable[int]):
+        """
+        更新快照，需在 DB 写入成功后调用
+        :param agent_id__state_map: Agent ID - 编码后的状态 映射
+        :param changed_host_ids: 状态发生变化的主机 ID
+        :return:
+        """
+        if not agent_id__state_map:
+            return
+        changed_host_ids: typing.List[int] = list(changed_host_ids)
+        pipeline = REDIS_INST.pipeline()
+        pipeline.hset(cls.SNAPSHOT_KEY, mapping=agent_id__state_map)
+        pipeline.ttl(cls.SNAPSHOT_KEY)
+        if changed_host_ids:
+            now: float = time.time()
+            pipeline.zadd(cls.RECENTLY_CHANGED_KEY, {bk_host_id: now for bk_host_id in changed_host_ids})
+        ttl: int = pipeline.execute()[1]
+        # 仅在快照创建时设置过期时间，保证快照到期后整体失效，触发一次全量对比
+        if ttl < 0:
+            REDIS_INST.expire(cls.SNAPSHOT_KEY, constants.AGENT_STATE_SNAPSHOT_EXPIRE)
+
+    @classmethod
+    def list_recently_changed_host_ids(
+        cls, window: int = constants.AGENT_STATE_RECENTLY_CHANGED_WINDOW
+    ) -> typing.Set[int]:
+        """
+        获取近期状态发生变化的主机，并清理过期记录
+        :param window: 时间窗口（秒）
+        :return: 主机 ID 集合
+        """
+        min_score: float = time.time() - window
+        pipeline = REDIS_INST.pipeline()
+        pipeline.zremrangebyscore(cls.RECENTLY_CHANGED_KEY, "-inf", f"({min_score}")
+        pipeline.zrangebyscore(cls.RECENTLY_CHANGED_KEY, min_score, "+inf")
+        __, bk_host_ids = pipeline.execute()
+        return {int(bk_host_id) for bk_host_id in bk_host_ids}
+
+    @classmethod
+    def next_round(cls) -> int:
+        """推进并返回同步轮次"""
+        return REDIS_INST.incr(cls.ROUND_KEY)
+
+    @classmethod
+    def is_full_round(cls, round_num: int) -> bool:
+        return (round_num - 1) % constants.SYNC_AGENT_STATUS_FULL_ROUND_INTERVAL == 0
+
+    @staticmethod
+    def list_running_subscription_host_ids() -> typing.Set[int]:
+        """获取订阅执行中的主机"""
+        instance_ids: typing.Iterable[str] = models.SubscriptionInstanceRecord.objects.filter(
+            is_latest=True, status__in=[constants.JobStatusType.PENDING, constants.JobStatusType.RUNNING]
+        ).values_list("instance_id", flat=True)
+
+        # apps.backend.subscription.tools 依赖 apps.node_man.tools，延迟导入避免循环引用
+        from apps.backend.subscription import tools
+
+        bk_host_ids: typing.Set[int] = set()
+        for instance_id in instance_ids:
+            node: typing.Dict[str, typing.Any] = tools.parse_node_id(instance_id)
+            if node["type"] != "host":
+                continue
+            host_key: typing.Dict[str, typing.Any] = tools.parse_host_key(node["id"])
+            if "bk_host_id" in host_key:
+                bk_host_ids.add(host_key["bk_host_id"])
+        return bk_host_ids
+
+
+class AgentStateCache:
+    """
+    Agent 状态缓存
+    以主机为粒度缓存最近一次从 GSE 查询到的 Agent 状态，各 Web 进程共享，
+    主机列表等页面直接读取缓存，缺失或超过刷新间隔的主机交由后台任务异步查询及落库
+    """
+
+    CACHE_KEY_TPL: str = f"{settings.APP_CODE}:node_man:agent_state:cache:str:" + "{bk_host_id}"
+    REFRESH_LOCK_KEY_TPL: str = f"{settings.APP_CODE}:node_man:agent_state:refresh_lock:str:" + "{bk_host_id}"
+
+    @classmethod
+    def get_many(
+        cls, bk_host_ids: typing.Iterable[int]
+    ) -> typing.Tuple[typing.Dict[int, typing.Dict[str, typing.Any]], typing.Set[int]]:
+        """
+        批量获取 Agent 状态
+        :param bk_host_ids: 主机 ID 列表
+        :return: 主机 ID - Agent 状态 映射，需要刷新的主机 ID 集合（缓存缺失或超过刷新间隔）
+        """
+        bk_host_ids: typing.List[int] = list(bk_host_ids)
+        if not bk_host_ids:
+            return {}, set()
+
+        cached_states: typing.List[typing.Optional[bytes]] = REDIS_INST.mget(
+            [cls.CACHE_KEY_TPL.format(bk_host_id=bk_host_id) for bk_host_id in bk_host_ids]
+        )
+        now: float = time.time()
+        host_id__agent_state_map: typing.Dict[int, typing.Dict[str, typing.Any]] = {}
+        to_be_refreshed_host_ids: typing.Set[int] = set()
+        for bk_host_id, cached_state in zip(bk_host_ids, cached_states):
+            if cached_state is None:
+                to_be_refreshed_host_ids.add(bk_host_id)
+                continue
+            agent_state: typing.Dict[str, typing.Any] = json.loads(cached_state)
+            host_id__agent_state_map[bk_host_id] = agent_state
+            if now - agent_state["cached_at"] > constants.AGENT_STATE_CACHE_REFRESH_INTERVAL:
+                to_be_refreshed_host_ids.add(bk_host_id)
+        return host_id__agent_state_map, to_be_refreshed_host_ids
+
+    @classmethod
+    def save(cls, host_id__agent_state_info: typing.Dict[int, typing.Dict[str, typing.Any]]):
+        """
+        写入 Agent 状态
+        :param host_id__agent_state_info: 主机 ID - GSE Agent 状态信息（需包含 status_display）
+        :return:
+        """
+        if not host_id__agent_state_info:
+            return
+        now: float = time.time()
+        pipeline = REDIS_INST.pipeline()
+        for bk_host_id, agent_state_info in host_id__agent_state_info.items():
+            pipeline.set(
+                cls.CACHE_KEY_TPL.format(bk_host_id=bk_host_id),
+                json.dumps(
+                    {
+                        "status_display": agent_state_info["status_display"],
+                        "version": agent_state_info["version"],
+                        "cached_at": now,
+                    }
+                ),
+                ex=constants.AGENT_STATE_CACHE_EXPIRE,
+            )
+        pipeline.execute()
+
+    @classmethod
+    def acquire_refresh(cls, bk_host_ids: typing.Iterable[int]) -> typing.Set[int]:
+        """
+        抢占刷新权，同一刷新间隔内同一主机仅由一个请求触发刷新
+        :param bk_host_ids: 待刷新的主机 ID
+        :return: 抢占成功的主机 ID 集合
+        """
+        bk_host_ids: typing.List[int] = list(bk_host_ids)
+        if not bk_host_ids:
+            return set()
+        pipeline = REDIS_INST.pipeline()
+        for bk_host_id in bk_host_ids:
+            pipeline.set(
+                cls.REFRESH_LOCK_KEY_TPL.format(bk_host_id=bk_host_id),
+                1,
+                nx=True,
+                ex=constants.AGENT_STATE_CACHE_REFRESH_INTERVAL,
+            )
+        return {bk_host_id for bk_host_id, is_acquired in zip(bk_host_ids, pipeline.execute()) if is_acquired}
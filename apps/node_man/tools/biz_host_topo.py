@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+import typing
+from collections import defaultdict
+
+import ujson as json
+from django.conf import settings
+
+from apps.backend.utils.redis import REDIS_INST
+from apps.component.esbclient import client_v2
+from apps.node_man import constants, models
+from apps.utils.basic import chunk_lists
+from apps.utils.batch_request import batch_request
+
+logger = logging.getLogger("app")
+
+
+class BizHostTopoCache:
+    """
+    业务主机拓扑缓存
+    - 按业务缓存主机所属的集群 / 模块（bk_host_id -> [[bk_set_id, bk_module_id], ...]）及拓扑节点信息，多用户、多页面共享
+    - 缓存缺失时通过 find_host_topo_relation / search_biz_inst_topo 整业务批量加载
+    - 主机关系由 host_relation 资源监听事件增量更新，拓扑节点变更（如重命名）由缓存过期兜底
+    """
+
+    RELATION_KEY_TPL: str = f"{settings.APP_CODE}:node_man:biz_host_topo:relation:hash:" + "{bk_biz_id}"
+    TOPO_NODE_KEY_TPL: str = f"{settings.APP_CODE}:node_man:biz_host_topo:topo_node:str:" + "{bk_biz_id}"
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return models.GlobalSettings.get_config(
+            key=models.GlobalSettings.KeyEnum.ENABLE_BIZ_HOST_TOPO_CACHE.value, default=False
+        )
+
+    @staticmethod
+    def fetch_host_topo_relations(bk_biz_id: int) -> typing.List[typing.Dict[str, int]]:
+        return batch_request(
+            func=client_v2.cc.find_host_topo_relation, params={"bk_biz_id": bk_biz_id}, get_data=lambda x: x["data"]
+        )
+
+    @staticmethod
+    def fetch_topo_nodes(bk_biz_id: int) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        """
+        查询业务拓扑节点
+        :param bk_biz_id: 业务ID
+        :return: {
+            "module_to_topo": {"module|1": ["biz|2", "set|3", "module|1"]},
+            "node_id__name_map": {"set|3": "set_name", "module|1": "module_name"}
+        }
+        """
+        topo_tree: typing.List[typing.Dict] = client_v2.cc.search_biz_inst_topo(
+            {"bk_username": "admin", "bk_biz_id": bk_biz_id}
+        )
+        internal_module: typing.Dict = client_v2.cc.get_biz_internal_module({"bk_biz_id": bk_biz_id})
+
+        module_to_topo: typing.Dict[str, typing.List[str]] = {}
+        node_id__name_map: typing.Dict[str, str] = {}
+
+        # 空闲机池不在业务拓扑树中，需单独补充
+        internal_set_node_id: str = f"set|{internal_module.get('bk_set_id')}"
+        node_id__name_map[internal_set_node_id] = internal_module.get("bk_set_name")
+        for _internal_module in internal_module.get("module") or []:
+            module_node_id: str = f"module|{_internal_module['bk_module_id']}"
+            node_id__name_map[module_node_id] = _internal_module["bk_module_name"]
+            module_to_topo[module_node_id] = [f"biz|{bk_biz_id}", internal_set_node_id, module_node_id]
+
+        stack: typing.List[typing.Tuple[typing.Dict, typing.List[str]]] = [(topo_node, []) for topo_node in topo_tree]
+        while stack:
+            topo_node, parent_node_ids = stack.pop()
+            topo_node_id: str = f"{topo_node['bk_obj_id']}|{topo_node['bk_inst_id']}"
+            topo_node_ids: typing.List[str] = parent_node_ids + [topo_node_id]
+            node_id__name_map[topo_node_id] = topo_node["bk_inst_name"]
+            if topo_node["bk_obj_id"] == "module":
+                module_to_topo[topo_node_id] = topo_node_ids
+            stack.extend([(child, topo_node_ids) for child in topo_node.get("child") or []])
+
+        return {"module_to_topo": module_to_topo, "node_id__name_map": node_id__name_map}
+
+    @classmethod
+    def get_topo_nodes(cls, bk_biz_id: int) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        """获取业务拓扑节点，缓存缺失时从 CMDB 加载，返回结构同 fetch_topo_nodes"""
+        topo_node_key: str = cls.TOPO_NODE_KEY_TPL.format(bk_biz_id=bk_biz_id)
+        cached_topo_nodes: typing.Optional[bytes] = REDIS_INST.get(topo_node_key)
+        if cached_topo_nodes is not None:
+            return json.loads(cached_topo_nodes)
+
+        topo_nodes: typing.Dict[str, typing.Dict[str, typing.Any]] = cls.fetch_topo_nodes(bk_biz_id)
+        REDIS_INST.set(topo_node_key, json.dumps(topo_nodes), ex=constants.BIZ_HOST_TOPO_CACHE_EXPIRE)
+        return topo_nodes
+
+    @classmethod
+    def load_host_topo_relations(cls, bk_biz_id: int) -> typing.Dict[int, typing.List[typing.List[int]]]:
+        """从 CMDB 加载整个业务的主机关系并写入缓存"""
+        host_id__relations_map: typing.Dict[int, typing.List[typing.List[int]]] = defaultdict(list)
+        for host_topo_relation in cls.fetch_host_topo_relations(bk_biz_id):
+            host_id__relations_map[host_topo_relation["bk_host_id"]].append(
+                [host_topo_relation["bk_set_id"], host_topo_relation["bk_module_id"]]
+            )
+
+        relation_key: str = cls.RELATION_KEY_TPL.format(bk_biz_id=bk_biz_id)
+        pipeline = REDIS_INST.pipeline()
+        pipeline.delete(relation_key)
+        for bk_host_ids in chunk_lists(list(host_id__relations_map.keys()), 500):
+            pipeline.hset(
+                relation_key,
+                mapping={bk_host_id: json.dumps(host_id__relations_map[bk_host_id]) for bk_host_id in bk_host_ids},
+            )
+        pipeline.expire(relation_key, constants.BIZ_HOST_TOPO_CACHE_EXPIRE)
+        pipeline.execute()
+        return host_id__relations_map
+
+    @classmethod
+    def get_host_topo_relations(
+        cls, bk_biz_id: int, bk_host_ids: typing.Optional[typing.Iterable[int]] = None
+    ) -> typing.List[typing.Dict[str, int]]:
+        """
+        获取主机拓扑关系，缓存缺失时整业务加载
+        :param bk_biz_id: 业务ID
+        :param bk_host_ids: 主机ID列表，为 None 时返回整个业务
+        :return: 同 find_host_topo_relation，[{"bk_biz_id": 2, "bk_host_id": 1, "bk_set_id": 3, "bk_module_id": 4}]
+        """
+        relation_key: str = cls.RELATION_KEY_TPL.format(bk_biz_id=bk_biz_id)
+        if not REDIS_INST.exists(relation_key):
+            host_id__relations_map = cls.load_host_topo_relations(bk_biz_id)
+            if bk_host_ids is not None:
+                host_id__relations_map = {
+                    bk_host_id: host_id__relations_map[bk_host_id]
+                    for bk_host_id in set(bk_host_ids)
+                    if bk_host_id in host_id__relations_map
+                }
+        elif bk_host_ids is None:
+            host_id__relations_map = {
+                int(bk_host_id): json.loads(relations)
+                for bk_host_id, relations in REDIS_INST.hgetall(relation_key).items()
+            }
+        else:
+            bk_host_ids: typing.List[int] = list(set(bk_host_ids))
+            host_id__relations_map = {
+                bk_host_id: json.loads(relations)
+                for bk_host_id, relations in zip(bk_host_ids, REDIS_INST.hmget(relation_key, bk_host_ids))
+                if relations is not None
+            }
+
+        return [
+            {"bk_biz_id": bk_biz_id, "bk_host_id": bk_host_id, "bk_set_id": bk_set_id, "bk_module_id": bk_module_id}
+            for bk_host_id, relations in host_id__relations_map.items()
+            for bk_set_id, bk_module_id in relations
+        ]
+
+    @classmethod
+    def get_host_topo_paths(
+        cls, bk_biz_id: int, bk_host_ids: typing.Iterable[int]
+    ) -> typing.Dict[int, typing.List[str]]:
+        """
+        获取主机所属的 集群 / 模块 路径
+        :param bk_biz_id: 业务ID
+        :param bk_host_ids: 主机ID列表
+        :return: {bk_host_id: ["集群 / 模块", ...]}
+        """
+        node_id__name_map: typing.Dict[str, str] = cls.get_topo_nodes(bk_biz_id)["node_id__name_map"]
+        host_id__topo_paths_map: typing.Dict[int, typing.List[str]] = defaultdict(list)
+        for relation in cls.get_host_topo_relations(bk_biz_id, bk_host_ids):
+            host_id__topo_paths_map[relation["bk_host_id"]].append(
+                " / ".join(
+                    [
+                        node_id__name_map.get(f"set|{relation['bk_set_id']}") or "",
+                        node_id__name_map.get(f"module|{relation['bk_module_id']}") or "",
+                    ]
+                )
+            )
+        return host_id__topo_paths_map
+
+    @classmethod
+    def apply_host_relation_events(cls, events: typing.List[typing.Dict[str, typing.Any]]):
+        """
+        按 host_relation 资源监听事件增量更新已缓存的主机关系，未缓存的业务在下次读取时整体加载
+        :param events: 资源监听事件，按游标顺序排列
+        """
+        events_gby_biz_id: typing.Dict[int, typing.List[typing.Dict]] = defaultdict(list)
+        for event in events:
+            bk_biz_id: typing.Optional[int] = event["bk_detail"].get("bk_biz_id")
+            if bk_biz_id is not None:
+                events_gby_biz_id[bk_biz_id].append(event)
+
+        for bk_biz_id, biz_events in events_gby_biz_id.items():
+            relation_key: str = cls.RELATION_KEY_TPL.format(bk_biz_id=bk_biz_id)
+            if not REDIS_INST.exists(relation_key):
+                continue
+
+            bk_host_ids: typing.List[int] = list({event["bk_detail"]["bk_host_id"] for event in biz_events})
+            host_id__relations_map: typing.Dict[int, typing.List[typing.List[int]]] = {
+                bk_host_id: json.loads(relations) if relations is not None else []
+                for bk_host_id, relations in zip(bk_host_ids, REDIS_INST.hmget(relation_key, bk_host_ids))
+            }
+
+            is_topo_node_changed: bool = False
+            module_to_topo: typing.Optional[typing.Dict[str, typing.List[str]]] = None
+            for event in biz_events:
+                relations: typing.List[typing.List[int]] = host_id__relations_map[event["bk_detail"]["bk_host_id"]]
+                relation: typing.List[int] = [event["bk_detail"]["bk_set_id"], event["bk_detail"]["bk_module_id"]]
+                if event["bk_event_type"] == "delete":
+                    if relation in relations:
+                        relations.remove(relation)
+                    continue
+
+                if relation not in relations:
+                    relations.append(relation)
+                if module_to_topo is None:
+                    cached_topo_nodes: typing.Optional[bytes] = REDIS_INST.get(
+                        cls.TOPO_NODE_KEY_TPL.format(bk_biz_id=bk_biz_id)
+                    )
+                    module_to_topo = json.loads(cached_topo_nodes)["module_to_topo"] if cached_topo_nodes else {}
+                # 主机转移到新建的模块，拓扑节点缓存已过时
+                if f"module|{relation[1]}" not in module_to_topo:
+                    is_topo_node_changed = True
+
+            pipeline = REDIS_INST.pipeline()
+            to_be_deleted_host_ids: typing.List[int] = [
+                bk_host_id for bk_host_id, relations in host_id__relations_map.items() if not relations
+            ]
+            if to_be_deleted_host_ids:
+                pipeline.hdel(relation_key, *to_be_deleted_host_ids)
+            to_be_updated_host_id__relations_map: typing.Dict[int, str] = {
+                bk_host_id: json.dumps(relations)
+                for bk_host_id, relations in host_id__relations_map.items()
+                if relations
+            }
+            if to_be_updated_host_id__relations_map:
+                pipeline.hset(relation_key, mapping=to_be_updated_host_id__relations_map)
+            if is_topo_node_changed:
+                pipeline.delete(cls.TOPO_NODE_KEY_TPL.format(bk_biz_id=bk_biz_id))
+            pipeline.execute()
+
+            logger.info(
+                f"[BizHostTopoCache] apply host relation events: bk_biz_id -> {bk_biz_id}, "
+                f"events -> {len(biz_events)}, is_topo_node_changed -> {is_topo_node_changed}"
+            )
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import typing
+
+try:
+    from apps.prometheus import models
+except Exception:
+    # 非 Django 环境（如 SDK 单独使用）下不上报指标
+    models = None
+
+
+def inc_counter(counter_name: str, labels: typing.Iterable[str], value: int = 1):
+    """
+    累加 apps.prometheus.models 中定义的 Counter，指标不可用时忽略
+    :param counter_name: Counter 变量名
+    :param labels: 标签值，顺序与 Counter 定义的 labelnames 一致
+    :param value: 累加值
+    """
+    if models is None:
+        return
+    getattr(models, counter_name).labels(*labels).inc(value)
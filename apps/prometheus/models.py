@@ -30,6 +30,22 @@ subscriptions_by_object_node_category = Counter(
 )
 
 
+http_session_pool_events_by_domain = Counter(
+    "django_app_http_session_pool_events_by_domain",
+    "Count of http session pool events by domain, event.",
+    ["domain", "event"],
+    namespace=NAMESPACE,
+)
+
+
+jinja_template_cache_events = Counter(
+    "django_app_jinja_template_cache_events",
+    "Count of jinja template cache events by event.",
+    ["event"],
+    namespace=NAMESPACE,
+)
+
+
 def export_job_prometheus_mixin():
     """任务模型埋点"""
 
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import logging
+import os
+import shutil
+import typing
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger("app")
+
+
+def link_tree(src: str, dst: str):
+    """
+    将目录树以硬链接的方式合并到目标目录，跨文件系统无法硬链接时退化为拷贝
+    与 distutils.dir_util.copy_tree 行为保持一致：目标目录已存在时合并，同名文件覆盖，符号链接按实际内容处理
+    :param src: 源目录
+    :param dst: 目标目录
+    """
+    for dir_path, __, file_names in os.walk(src, followlinks=True):
+        dst_dir_path = os.path.join(dst, os.path.relpath(dir_path, src))
+        os.makedirs(dst_dir_path, exist_ok=True)
+        for file_name in file_names:
+            src_file_path = os.path.join(dir_path, file_name)
+            dst_file_path = os.path.join(dst_dir_path, file_name)
+            if os.path.lexists(dst_file_path):
+                os.remove(dst_file_path)
+            try:
+                os.link(src_file_path, dst_file_path)
+            except OSError:
+                shutil.copy2(src_file_path, dst_file_path)
+
+
+def get_dir_size(dir_path: str) -> int:
+    size = 0
+    for child_dir_path, __, file_names in os.walk(dir_path):
+        for file_name in file_names:
+            file_path = os.path.join(child_dir_path, file_name)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
+
+
+class ArtifactCache:
+    """
+    本地制品缓存，以内容摘要（如 MD5）为键缓存解压后的目录树及构建产物
+    - 每个缓存项为一个目录，在临时目录生成完成后原子重命名，读取方不会看到不完整的缓存项
+    - 命中时刷新缓存项的 mtime，总大小超过上限时按 mtime 淘汰最久未使用的缓存项
+    - 缓存项只读，使用方需通过 link_tree 取出后再修改（删除文件不影响缓存）
+    """
+
+    # 生成中的缓存项所在目录
+    BUILDING_DIR_NAME = ".building"
+
+    def __init__(self, root_dir: str, max_size: int):
+        """
+        :param root_dir: 缓存根目录
+        :param max_size: 缓存总大小上限（Byte）
+        """
+        self.root_dir = root_dir
+        self.max_size = max_size
+
+    def get_entry_dir(self, namespace: str, key: str) -> str:
+        return os.path.join(self.root_dir, namespace, key)
+
+    def get_or_create(self, namespace: str, key: str, create_func: typing.Callable[[str], None]) -> str:
+        """
+        获取缓存项目录，不存在时调用 create_func 生成
+        :param namespace: 命名空间，区分不同类型的制品
+        :param key: 缓存键，一般为制品内容的 MD5
+        :param create_func: 生成函数，接收一个空目录并在其中写入制品
+        :return: 缓存项目录
+        """
+        entry_dir = self.get_entry_dir(namespace, key)
+        if os.path.isdir(entry_dir):
+            os.utime(entry_dir)
+            logger.info(f"[ArtifactCache] hit: namespace -> {namespace}, key -> {key}")
+            return entry_dir
+
+        building_dir = os.path.join(self.root_dir, self.BUILDING_DIR_NAME, uuid.uuid4().hex)
+        os.makedirs(building_dir)
+        try:
+            create_func(building_dir)
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            try:
+                os.rename(building_dir, entry_dir)
+            except OSError:
+                # 并发生成同一缓存项，以先完成的为准
+                if not os.path.isdir(entry_dir):
+                    raise
+        finally:
+            shutil.rmtree(building_dir, ignore_errors=True)
+
+        logger.info(f"[ArtifactCache] miss: namespace -> {namespace}, key -> {key}, entry_dir -> {entry_dir}")
+        self.evict(excluded_entry_dirs={entry_dir})
+        return entry_dir
+
+    def evict(self, excluded_entry_dirs: typing.Optional[typing.Set[str]] = None):
+        """
+        淘汰最久未使用的缓存项，直到总大小不超过上限
+        :param excluded_entry_dirs: 不参与淘汰的缓存项，一般为刚生成的缓存项
+        """
+        excluded_entry_dirs = excluded_entry_dirs or set()
+        entries: typing.List[typing.Tuple[float, int, str]] = []
+        for namespace in os.listdir(self.root_dir):
+            namespace_dir = os.path.join(self.root_dir, namespace)
+            if namespace == self.BUILDING_DIR_NAME or not os.path.isdir(namespace_dir):
+                continue
+            for key in os.listdir(namespace_dir):
+                entry_dir = os.path.join(namespace_dir, key)
+                entries.append((os.path.getmtime(entry_dir), get_dir_size(entry_dir), entry_dir))
+
+        total_size = sum(size for __, size, __ in entries)
+        for __, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if entry_dir in excluded_entry_dirs:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            logger.info(f"[ArtifactCache] evict: entry_dir -> {entry_dir}, size -> {size}")
+
+
+def get_artifact_cache() -> typing.Optional[ArtifactCache]:
+    """
+    获取本地制品缓存，未配置缓存目录时返回 None
+    """
+    root_dir: str = getattr(settings, "ARTIFACT_CACHE_DIR", "")
+    if not root_dir:
+        return None
+    return ArtifactCache(root_dir=root_dir, max_size=settings.ARTIFACT_CACHE_MAX_SIZE_MB * 1024 * 1024)
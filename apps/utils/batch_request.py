@@ -8,40 +8,187 @@ Unless required by applicable law or agreed to in writing, software distributed
 an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from copy import deepcopy
-from multiprocessing.pool import ThreadPool
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from copy import copy, deepcopy
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
 
+import requests
 from django.conf import settings
 from django.utils.translation import get_language
 
-from apps.exceptions import AppBaseException
+from apps.exceptions import ApiError, AppBaseException, ComponentCallError
 from apps.node_man import constants
 from apps.utils.local import get_request
 
 from . import translation
 from .concurrent import inject_request
 
+logger = logging.getLogger("app")
 
-def format_params(params, get_count, func):
-    # 拆分params适配bk_module_id大于500情况
-    request_params = []
+# 分页请求可重试的异常：接口调用异常、接口结果异常及网络请求异常，其余异常（如代码错误）直接抛出
+RETRYABLE_REQUEST_EXCEPTIONS = (ApiError, ComponentCallError, requests.exceptions.RequestException)
 
-    bk_module_ids = params.pop("bk_module_ids", [])
 
-    # 请求第一次获取总数
+def split_module_params(params: Dict) -> List[Dict]:
+    """
+    拆分参数，适配 bk_module_ids 大于 QUERY_CMDB_MODULE_LIMIT 的情况
+    :param params: 请求参数
+    :return: 拆分后的参数列表
+    """
+    params = copy(params)
+    bk_module_ids = params.pop("bk_module_ids", [])
     if not bk_module_ids:
-        request_params.append({"count": get_count(func(page={"start": 0, "limit": 1}, **params)), "params": params})
+        return [params]
 
+    split_params_list = []
     for s_index in range(0, len(bk_module_ids), constants.QUERY_CMDB_MODULE_LIMIT):
         single_params = deepcopy(params)
+        single_params["bk_module_ids"] = bk_module_ids[s_index : s_index + constants.QUERY_CMDB_MODULE_LIMIT]
+        split_params_list.append(single_params)
+    return split_params_list
+
+
+_page_executor: Optional[ThreadPoolExecutor] = None
+_page_executor_lock = threading.Lock()
+
+
+def get_page_executor() -> ThreadPoolExecutor:
+    """获取分页请求共享的有界线程池，避免每次分页请求都创建线程池"""
+    global _page_executor
+    if _page_executor is None:
+        with _page_executor_lock:
+            if _page_executor is None:
+                _page_executor = ThreadPoolExecutor(
+                    max_workers=settings.CONCURRENT_NUMBER, thread_name_prefix="batch_request"
+                )
+    return _page_executor
+
+
+class AdaptiveConcurrency:
+    """
+    加性增、乘性减（AIMD）的并发窗口
+    请求成功时窗口 +1，请求失败时窗口减半，避免在接口限流或抖动时继续放大请求压力
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.maximum = max(maximum, minimum)
+        self.minimum = minimum
+        self.current = min(max(initial, minimum), self.maximum)
+
+    def on_success(self):
+        self.current = min(self.current + 1, self.maximum)
+
+    def on_failure(self):
+        self.current = max(self.current // 2, self.minimum)
+
+
+def iter_pages(
+    func: Callable,
+    params: Dict,
+    get_data: Callable = lambda x: x["info"],
+    get_count: Callable = lambda x: x["count"],
+    limit: int = constants.QUERY_CMDB_LIMIT,
+    sort: Optional[str] = None,
+    max_concurrency: int = constants.BATCH_REQUEST_MAX_CONCURRENCY,
+    max_retries: int = constants.BATCH_REQUEST_MAX_RETRIES,
+) -> Iterator[List]:
+    """
+    流式分页请求，按页序逐页返回数据
+    首页请求直接携带 limit，同时获取数据与总数，剩余页以有界窗口并发请求，内存中最多保留窗口大小的页数据
+    :param func: 请求方法
+    :param params: 请求参数
+    :param get_data: 获取数据函数
+    :param get_count: 获取总数函数
+    :param limit: 一次请求数量
+    :param sort: 排序
+    :param max_concurrency: 最大并发页数
+    :param max_retries: 单页最大重试次数，仅对 RETRYABLE_REQUEST_EXCEPTIONS 重试
+    :return: 分页数据迭代器
+    """
+
+    def _build_page_params(_start: int) -> Dict:
+        _page_params = {"page": {"limit": limit, "start": _start}}
+        if sort:
+            _page_params["page"]["sort"] = sort
+        _page_params.update(params)
+        return _page_params
 
-        single_params.update({"bk_module_ids": bk_module_ids[s_index : s_index + constants.QUERY_CMDB_MODULE_LIMIT]})
-        request_params.append(
-            {"count": get_count(func(page={"start": 0, "limit": 1}, **single_params)), "params": single_params}
+    def _submit(_start: int) -> Future:
+        return executor.submit(
+            translation.RespectsLanguage(language=get_language())(inject_request(func)), _build_page_params(_start)
         )
 
-    return request_params
+    executor = get_page_executor()
+    first_page_result = func(_build_page_params(0))
+    yield get_data(first_page_result)
+
+    count = get_count(first_page_result)
+    pending_starts = deque(range(limit, count, limit))
+    # 按提交顺序排列的在途请求：(start, future, 已重试次数)
+    in_flight: Deque[Tuple[int, Future, int]] = deque()
+    concurrency = AdaptiveConcurrency(initial=min(4, max_concurrency), maximum=max_concurrency)
+
+    try:
+        while pending_starts or in_flight:
+            while pending_starts and len(in_flight) < concurrency.current:
+                start = pending_starts.popleft()
+                in_flight.append((start, _submit(start), 0))
+
+            start, future, retries = in_flight.popleft()
+            try:
+                result = future.result()
+            except RETRYABLE_REQUEST_EXCEPTIONS:
+                concurrency.on_failure()
+                if retries >= max_retries:
+                    raise
+                logger.warning(
+                    f"[iter_pages] func -> {getattr(func, '__name__', func)}, page start -> {start} failed, "
+                    f"retry -> {retries + 1}, concurrency -> {concurrency.current}"
+                )
+                in_flight.appendleft((start, _submit(start), retries + 1))
+                continue
+
+            concurrency.on_success()
+            yield get_data(result)
+    finally:
+        # 异常或调用方提前终止迭代时，取消尚未开始执行的请求
+        for __, in_flight_future, __ in in_flight:
+            in_flight_future.cancel()
+
+
+def batch_request_iter(
+    func: Callable,
+    params: Dict,
+    get_data: Callable = lambda x: x["info"],
+    get_count: Callable = lambda x: x["count"],
+    limit: int = constants.QUERY_CMDB_LIMIT,
+    sort: Optional[str] = None,
+    split_params: bool = False,
+    max_concurrency: int = constants.BATCH_REQUEST_MAX_CONCURRENCY,
+) -> Iterator[List]:
+    """
+    流式并发请求接口，参数同 batch_request，逐页返回数据，调用方可边取边处理，无需等待全部数据返回
+    :return: 分页数据迭代器
+    """
+    # 如果该接口没有返回count参数，只能同步请求
+    if not get_count:
+        yield from sync_batch_request_iter(func, params, get_data, limit)
+        return
+
+    params_list = split_module_params(params) if split_params else [params]
+    for single_params in params_list:
+        yield from iter_pages(
+            func,
+            single_params,
+            get_data=get_data,
+            get_count=get_count,
+            limit=limit,
+            sort=sort,
+            max_concurrency=max_concurrency,
+        )
 
 
 def batch_request(
@@ -64,69 +211,47 @@ def batch_request(
     :param split_params: 是否拆分参数
     :return: 请求结果
     """
-
-    # 如果该接口没有返回count参数，只能同步请求
-    if not get_count:
-        return sync_batch_request(func, params, get_data, limit)
-
-    if not split_params:
-        final_request_params = [
-            {"count": get_count(func(dict(page={"start": 0, "limit": 1}, **params))), "params": params}
-        ]
-    else:
-        final_request_params = format_params(params, get_count, func)
-
     data = []
-
-    # 根据请求总数并发请求
-    pool = ThreadPool(20)
-    futures = []
-
-    for req in final_request_params:
-        start = 0
-        while start < req["count"]:
-            request_params = {"page": {"limit": limit, "start": start}}
-            if sort:
-                request_params["page"]["sort"] = sort
-            request_params.update(req["params"])
-            futures.append(pool.apply_async(inject_request(func), args=(request_params,)))
-
-            start += limit
-
-    pool.close()
-    pool.join()
-
-    # 取值
-    for future in futures:
-        data.extend(get_data(future.get()))
-
+    for page_data in batch_request_iter(
+        func, params, get_data=get_data, get_count=get_count, limit=limit, sort=sort, split_params=split_params
+    ):
+        data.extend(page_data)
     return data
 
 
-def sync_batch_request(func, params, get_data=lambda x: x["info"], limit=500):
+def sync_batch_request_iter(func, params, get_data=lambda x: x["info"], limit=500) -> Iterator[List]:
     """
-    同步请求接口
+    同步分页请求接口，逐页返回数据
     :param func: 请求方法
     :param params: 请求参数
     :param get_data: 获取数据函数
     :param limit: 一次请求数量
-    :return: 请求结果
+    :return: 分页数据迭代器
     """
-    # 如果该接口没有返回count参数，只能同步请求
-    data = []
     start = 0
-
-    # 根据请求总数并发请求
     while True:
         request_params = {"page": {"limit": limit, "start": start}}
         request_params.update(params)
         result = get_data(func(request_params))
-        data.extend(result)
+        yield result
         if len(result) < limit:
             break
         else:
             start += limit
 
+
+def sync_batch_request(func, params, get_data=lambda x: x["info"], limit=500):
+    """
+    同步请求接口
+    :param func: 请求方法
+    :param params: 请求参数
+    :param get_data: 获取数据函数
+    :param limit: 一次请求数量
+    :return: 请求结果
+    """
+    data = []
+    for page_data in sync_batch_request_iter(func, params, get_data, limit):
+        data.extend(page_data)
     return data
 
 
@@ -9,7 +9,7 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 from functools import wraps
-from typing import Callable, Optional
+from typing import Any, Callable, Optional
 
 import ujson as json
 from django.core.cache import cache
@@ -50,10 +50,16 @@ def format_cache_key(func: Callable, *args, **kwargs):
     return f"{func.__name__}_{count_md5(kwargs)}"
 
 
-def func_cache_decorator(cache_time: int = DEFAULT_CACHE_TIME):
+def func_cache_decorator(
+    cache_time: int = DEFAULT_CACHE_TIME,
+    encoder: Callable[[Any], Any] = json.dumps,
+    decoder: Callable[[Any], Any] = json.loads,
+):
     """
     函数缓存装饰器
     :param cache_time: 缓存时间
+    :param encoder: 函数结果写入缓存前的编码方法，默认为 JSON
+    :param decoder: 缓存读取后的解码方法，需与 encoder 对应
     """
 
     def decorate(func):
@@ -68,9 +74,9 @@ def func_cache_decorator(cache_time: int = DEFAULT_CACHE_TIME):
             # 若无需从缓存中获取数据或者缓存中没有数据，则执行函数得到结果，并设置缓存
             if func_result is None:
                 func_result = func(*args, **kwargs)
-                cache.set(cache_key, json.dumps(func_result), cache_time)
+                cache.set(cache_key, encoder(func_result), cache_time)
             else:
-                func_result = json.loads(func_result)
+                func_result = decoder(func_result)
             return func_result
 
         return wrapper
@@ -12,10 +12,23 @@ import asyncio
 import inspect
 import sys
 import time
+from collections import deque
 from concurrent.futures import as_completed
 from concurrent.futures.thread import ThreadPoolExecutor
 from multiprocessing import cpu_count, get_context
-from typing import Callable, Coroutine, Dict, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Deque,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 from asgiref.sync import async_to_sync
 from django.conf import settings
@@ -110,12 +123,221 @@ def batch_call_serial(
     return result
 
 
+class KeyLimit:
+    """按调用参数分组的并发限制"""
+
+    def __init__(self, get_key: Callable[[Dict], Hashable], limit: int):
+        """
+        :param get_key: 从调用参数中获取分组键的方法，例如按接入点、管控区域分组
+        :param limit: 单个分组的最大并发数
+        """
+        self.get_key = get_key
+        self.limit = limit
+
+
+class AdaptiveLimiter:
+    """
+    自适应并发限制：失败时并发上限减半并按连续失败次数指数退避，成功后并发上限逐步恢复
+    """
+
+    def __init__(self, max_limit: int, base_backoff: float, max_backoff: float, max_total_backoff: float):
+        """
+        :param max_limit: 最大并发数
+        :param base_backoff: 首次失败的退避秒数
+        :param max_backoff: 单次最大退避秒数
+        :param max_total_backoff: 累计最大退避秒数，超出后不再退避，避免分组持续失败时执行时长无限拉长
+        """
+        self.max_limit = max_limit
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_total_backoff = max_total_backoff
+        self.limit = max_limit
+        self.running = 0
+        self.failures = 0
+        self.total_backoff = 0.0
+        self.resume_at = 0.0
+
+    def is_available(self, now: float) -> bool:
+        return self.running < self.limit and now >= self.resume_at
+
+    def on_success(self):
+        self.failures = 0
+        self.limit = min(self.max_limit, self.limit + 1)
+
+    def on_failure(self, now: float):
+        self.failures += 1
+        self.limit = max(1, self.limit // 2)
+        backoff: float = min(
+            self.max_backoff,
+            self.base_backoff * 2 ** (self.failures - 1),
+            max(self.max_total_backoff - self.total_backoff, 0),
+        )
+        self.total_backoff += backoff
+        self.resume_at = max(self.resume_at, now + backoff)
+
+
+class CoroutineExecutor:
+    """
+    有界并发协程执行器
+    - 全局并发及按分组（如接入点、管控区域）并发均不超过上限，避免同时建立大量连接耗尽文件描述符及带宽
+    - 分组内出现连接层异常时，降低该分组并发并退避，避免持续冲击异常的接入点；
+      单个任务自身的失败（如认证失败、命令执行失败）不代表分组异常，不触发退避
+    - 通过 as_completed / iter_results 按完成顺序逐个返回结果
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        key_limits: Optional[List[KeyLimit]] = None,
+        should_backoff: Optional[Callable[[Any], bool]] = None,
+        base_backoff: float = 1,
+        max_backoff: float = 30,
+        max_total_backoff: float = 60,
+    ):
+        """
+        :param limit: 全局最大并发数
+        :param key_limits: 分组并发限制
+        :param should_backoff: 根据执行结果判断分组是否需要退避，默认抛出 OSError 或超时异常时退避
+        :param base_backoff: 分组首次退避秒数
+        :param max_backoff: 分组单次最大退避秒数
+        :param max_total_backoff: 分组累计最大退避秒数
+        """
+        self.limit = limit
+        self.key_limits = key_limits or []
+        self.should_backoff = should_backoff or (lambda result: isinstance(result, (OSError, asyncio.TimeoutError)))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_total_backoff = max_total_backoff
+        self.key__limiter_map: Dict[Tuple[int, Hashable], AdaptiveLimiter] = {}
+
+    def get_limiters(self, params: Dict) -> Tuple[Tuple, List[AdaptiveLimiter]]:
+        """
+        获取调用参数所属分组的限制
+        :param params: 调用参数
+        :return: 分组键, 分组限制列表
+        """
+        keys: List[Tuple[int, Hashable]] = []
+        for idx, key_limit in enumerate(self.key_limits):
+            key: Tuple[int, Hashable] = (idx, key_limit.get_key(params))
+            if key not in self.key__limiter_map:
+                self.key__limiter_map[key] = AdaptiveLimiter(
+                    key_limit.limit, self.base_backoff, self.max_backoff, self.max_total_backoff
+                )
+            keys.append(key)
+        return tuple(keys), [self.key__limiter_map[key] for key in keys]
+
+    @staticmethod
+    async def call(func: Callable[..., Coroutine], params: Dict) -> Any:
+        # 与 asyncio.gather(return_exceptions=True) 一致，异常作为结果返回
+        try:
+            return await func(**params)
+        except Exception as e:
+            return e
+
+    async def as_completed(
+        self, func: Callable[..., Coroutine], params_list: List[Dict]
+    ) -> AsyncIterator[Tuple[Dict, Any]]:
+        """
+        并发执行，按完成顺序返回结果
+        :param func: 返回协程对象的方法
+        :param params_list: 参数列表
+        :return: (调用参数, 执行结果)
+        """
+        loop = asyncio.get_event_loop()
+        # 按分组排队，每次仅需检查各分组的队首，而不是遍历全部待执行任务
+        key__pending_map: Dict[Tuple, Tuple[List[AdaptiveLimiter], Deque[Dict]]] = {}
+        for params in params_list:
+            keys, limiters = self.get_limiters(params)
+            key__pending_map.setdefault(keys, (limiters, deque()))[1].append(params)
+
+        future__call_map: Dict[asyncio.Future, Tuple[Dict, List[AdaptiveLimiter]]] = {}
+        try:
+            while key__pending_map or future__call_map:
+                now: float = loop.time()
+                for keys in list(key__pending_map.keys()):
+                    limiters, pending = key__pending_map[keys]
+                    while (
+                        pending
+                        and len(future__call_map) < self.limit
+                        and all(limiter.is_available(now) for limiter in limiters)
+                    ):
+                        params = pending.popleft()
+                        for limiter in limiters:
+                            limiter.running += 1
+                        future__call_map[asyncio.ensure_future(self.call(func, params))] = (params, limiters)
+                    if not pending:
+                        key__pending_map.pop(keys)
+
+                # 存在退避中的分组时，最迟在退避结束时重新尝试执行
+                resume_ats: List[float] = [
+                    max([limiter.resume_at for limiter in limiters])
+                    for limiters, __ in key__pending_map.values()
+                    if limiters
+                ]
+                timeout: Optional[float] = None
+                if resume_ats and min(resume_ats) > now:
+                    timeout = min(resume_ats) - now
+                if not future__call_map:
+                    await asyncio.sleep(timeout or 0)
+                    continue
+
+                done, __ = await asyncio.wait(
+                    list(future__call_map.keys()), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    params, limiters = future__call_map.pop(future)
+                    result = future.result()
+                    should_backoff: bool = self.should_backoff(result)
+                    for limiter in limiters:
+                        limiter.running -= 1
+                        if should_backoff:
+                            limiter.on_failure(loop.time())
+                        else:
+                            limiter.on_success()
+                    yield params, result
+        finally:
+            # 调用方提前结束消费时，取消未完成的任务
+            for future in future__call_map:
+                future.cancel()
+            if future__call_map:
+                await asyncio.gather(*future__call_map.keys(), return_exceptions=True)
+
+    def iter_results(
+        self,
+        func: Callable[..., Coroutine],
+        params_list: List[Dict],
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> Iterator[Tuple[Dict, Any]]:
+        """
+        在事件循环中并发执行，供同步代码按完成顺序流式消费结果
+        :param func: 返回协程对象的方法
+        :param params_list: 参数列表
+        :param loop: 事件循环，为空时使用新的事件循环并在结束后关闭
+        :return: (调用参数, 执行结果)
+        """
+        is_new_loop: bool = loop is None
+        loop = loop or asyncio.new_event_loop()
+        results: AsyncIterator[Tuple[Dict, Any]] = self.as_completed(func, params_list)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            if is_new_loop:
+                loop.close()
+
+
 def batch_call_coroutine(
     func: Callable[..., Coroutine],
     params_list: List[Dict],
     get_data: Callable = lambda x: x,
     extend_result: bool = False,
     interval: float = 0,
+    executor: Optional[CoroutineExecutor] = None,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
     **kwargs
 ):
     """
@@ -125,6 +347,9 @@ def batch_call_coroutine(
     :param get_data: 获取数据函数
     :param extend_result: 是否展开结果
     :param interval: 暂不支持
+    :param executor: 有界并发协程执行器，指定时限制并发且结果按完成顺序排列，否则全部协程同时执行
+        全部协程执行完成后才返回，需逐个处理已完成结果时直接使用 executor.iter_results
+    :param loop: 事件循环，用于复用绑定在事件循环上的资源（如连接池），为空时使用新的事件循环并在结束后关闭
     :param kwargs:
     :return:
     """
@@ -132,10 +357,15 @@ def batch_call_coroutine(
     async def _batch_call_coroutine(_coros: List[Coroutine]):
         return await asyncio.gather(*_coros, return_exceptions=True)
 
-    coros: List[Coroutine] = [func(**params) for params in params_list]
-    loop = asyncio.new_event_loop()
-    coro_results = loop.run_until_complete(_batch_call_coroutine(coros))
-    loop.close()
+    if executor is not None:
+        coro_results = [coro_result for __, coro_result in executor.iter_results(func, params_list, loop=loop)]
+    elif loop is not None:
+        coro_results = loop.run_until_complete(_batch_call_coroutine([func(**params) for params in params_list]))
+    else:
+        coros: List[Coroutine] = [func(**params) for params in params_list]
+        loop = asyncio.new_event_loop()
+        coro_results = loop.run_until_complete(_batch_call_coroutine(coros))
+        loop.close()
 
     result = []
     for coro_result in coro_results:
@@ -166,7 +396,8 @@ def batch_call_multi_proc(
     result = []
 
     pool = ctx.Pool(processes=cpu_count())
-    futures = [pool.apply_async(func=inject_request(func), kwds=params) for params in params_list]
+    # 提交到进程池的任务需要序列化，闭包无法序列化，且 request 上下文无法跨进程传递，直接提交原函数
+    futures = [pool.apply_async(func=func, kwds=params) for params in params_list]
 
     pool.close()
     pool.join()
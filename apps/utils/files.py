@@ -68,6 +68,30 @@ class FileOpen:
             self.file_obj.close()
 
 
+class DigestWriter:
+    """
+    写入时同步计算 MD5 及大小的文件包装器
+    用于流式生成文件的场景，避免生成后再次读取整个文件计算摘要
+    """
+
+    def __init__(self, file_obj: IO[Any]):
+        self.file_obj = file_obj
+        self.size: int = 0
+        self._md5 = hashlib.md5()
+
+    def write(self, data: bytes) -> int:
+        self._md5.update(data)
+        self.size += len(data)
+        return self.file_obj.write(data)
+
+    def flush(self):
+        self.file_obj.flush()
+
+    @property
+    def md5(self) -> str:
+        return self._md5.hexdigest()
+
+
 def md5sum(name: str = None, file_obj: Optional[IO[Any]] = None, mode: str = "rb", closed: bool = True) -> str:
     """
     计算文件md5
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import threading
+import time
+import typing
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from urllib import parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from apps.prometheus import helper as prometheus_helper
+
+
+class SessionPoolStats:
+    """会话池计数器，线程安全"""
+
+    # 从池中取到空闲会话
+    HIT = "hit"
+    # 池中无可用会话，新建
+    MISS = "miss"
+    # 会话因过期 / 超出池容量被关闭
+    DISCARD = "discard"
+    # 经由会话池发出的请求数
+    REQUEST = "request"
+    # 新建的底层连接数（即 TCP / TLS 握手次数）
+    NEW_CONNECTION = "new_connection"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: typing.Dict[str, int] = defaultdict(int)
+
+    def incr(self, event: str, domain: str = "", value: int = 1):
+        with self._lock:
+            self._counters[event] += value
+        prometheus_helper.inc_counter(
+            "http_session_pool_events_by_domain", labels=[domain or "unknown", event], value=value
+        )
+
+    def snapshot(self) -> typing.Dict[str, int]:
+        with self._lock:
+            counters = {
+                event: self._counters[event]
+                for event in [self.HIT, self.MISS, self.DISCARD, self.REQUEST, self.NEW_CONNECTION]
+            }
+        # 复用连接数 = 请求数 - 新建连接数
+        counters["reused_connection"] = max(counters[self.REQUEST] - counters[self.NEW_CONNECTION], 0)
+        return counters
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = SessionPoolStats()
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        stats.incr(SessionPoolStats.NEW_CONNECTION, domain=self.host)
+        return super()._new_conn()
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        stats.incr(SessionPoolStats.NEW_CONNECTION, domain=self.host)
+        return super()._new_conn()
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """统计新建连接数的 HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+class _IdleSession:
+    __slots__ = ("session", "released_at")
+
+    def __init__(self, session: requests.Session, released_at: float):
+        self.session = session
+        self.released_at = released_at
+
+
+class SessionPool:
+    """
+    进程级 HTTP 会话池
+    按目标域名（scheme + netloc）缓存 requests.Session，复用底层 TCP / TLS 连接，避免每次请求都重新握手
+    - 会话在使用期间被单个线程独占，归还时清理 cookies，防止不同用户的请求互相污染
+    - 空闲时间超过 keepalive 的会话会被丢弃，避免复用已被服务端关闭的连接
+    """
+
+    def __init__(
+        self,
+        max_idle_per_domain: int = 50,
+        keepalive_timeout: float = 60,
+        pool_connections: int = 4,
+        pool_maxsize: int = 4,
+    ):
+        """
+        :param max_idle_per_domain: 每个域名最多保留的空闲会话数
+        :param keepalive_timeout: 会话最大空闲时间（秒），小于等于 0 表示不复用会话
+        :param pool_connections: 单个会话缓存的连接池数量（按 host 区分）
+        :param pool_maxsize: 单个会话每个连接池保留的最大连接数
+        """
+        self.max_idle_per_domain = max_idle_per_domain
+        self.keepalive_timeout = keepalive_timeout
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+
+        self._lock = threading.Lock()
+        self._idle_sessions: typing.Dict[str, typing.Deque[_IdleSession]] = defaultdict(deque)
+
+    @staticmethod
+    def get_domain(url: str) -> str:
+        parsed = parse.urlsplit(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+    def new_session(self) -> requests.Session:
+        session = requests.session()
+        adapter_kwargs = {"pool_connections": self.pool_connections, "pool_maxsize": self.pool_maxsize}
+        session.mount("http://", CountingHTTPAdapter(**adapter_kwargs))
+        session.mount("https://", CountingHTTPAdapter(**adapter_kwargs))
+        return session
+
+    def acquire(self, url: str) -> requests.Session:
+        domain = self.get_domain(url)
+        expired_sessions: typing.List[requests.Session] = []
+        session: typing.Optional[requests.Session] = None
+
+        now = time.time()
+        with self._lock:
+            idle_sessions = self._idle_sessions[domain]
+            while idle_sessions:
+                # LIFO：优先取最近归还的会话，其连接存活的概率最高
+                idle_session = idle_sessions.pop()
+                if now - idle_session.released_at <= self.keepalive_timeout:
+                    session = idle_session.session
+                    break
+                expired_sessions.append(idle_session.session)
+
+        for expired_session in expired_sessions:
+            expired_session.close()
+            stats.incr(SessionPoolStats.DISCARD, domain=domain)
+
+        if session is not None:
+            stats.incr(SessionPoolStats.HIT, domain=domain)
+            return session
+
+        stats.incr(SessionPoolStats.MISS, domain=domain)
+        return self.new_session()
+
+    def release(self, url: str, session: requests.Session):
+        domain = self.get_domain(url)
+        # 会话会记录响应设置的 cookies，归还前清理，避免带到其他用户的请求中
+        session.cookies.clear()
+
+        if self.keepalive_timeout > 0:
+            with self._lock:
+                idle_sessions = self._idle_sessions[domain]
+                if len(idle_sessions) < self.max_idle_per_domain:
+                    idle_sessions.append(_IdleSession(session, time.time()))
+                    return
+
+        session.close()
+        stats.incr(SessionPoolStats.DISCARD, domain=domain)
+
+    @contextmanager
+    def session(self, url: str) -> typing.Iterator[requests.Session]:
+        session = self.acquire(url)
+        try:
+            yield session
+        except Exception:
+            # 请求异常时连接状态不可信，直接关闭
+            session.close()
+            stats.incr(SessionPoolStats.DISCARD, domain=self.get_domain(url))
+            raise
+        else:
+            self.release(url, session)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        with self.session(url) as session:
+            stats.incr(SessionPoolStats.REQUEST, domain=self.get_domain(url))
+            return session.request(method=method, url=url, **kwargs)
+
+    def idle_count(self, url: typing.Optional[str] = None) -> int:
+        with self._lock:
+            if url is not None:
+                return len(self._idle_sessions.get(self.get_domain(url), []))
+            return sum(len(idle_sessions) for idle_sessions in self._idle_sessions.values())
+
+    def clear(self):
+        with self._lock:
+            idle_sessions_list = list(self._idle_sessions.values())
+            self._idle_sessions.clear()
+        for idle_sessions in idle_sessions_list:
+            for idle_session in idle_sessions:
+                idle_session.session.close()
+
+
+_session_pool: typing.Optional[SessionPool] = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """获取进程级会话池，配置项在首次调用时读取"""
+    global _session_pool
+    if _session_pool is not None:
+        return _session_pool
+
+    with _session_pool_lock:
+        if _session_pool is None:
+            try:
+                from django.conf import settings
+
+                max_idle_per_domain = settings.HTTP_SESSION_POOL_SIZE
+                keepalive_timeout = settings.HTTP_SESSION_POOL_KEEPALIVE
+            except Exception:
+                max_idle_per_domain, keepalive_timeout = 50, 60
+            _session_pool = SessionPool(max_idle_per_domain=max_idle_per_domain, keepalive_timeout=keepalive_timeout)
+    return _session_pool
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """经由进程级会话池发送请求，参数同 requests.request"""
+    return get_session_pool().request(method, url, **kwargs)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import os
+import shutil
+
+from apps.utils import files
+from apps.utils.artifact_cache import ArtifactCache, link_tree
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class TestArtifactCache(CustomBaseTestCase):
+    def setUp(self) -> None:
+        self.root_dir = files.mk_and_return_tmpdir()
+        self.create_times = 0
+        super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root_dir, ignore_errors=True)
+        super().tearDown()
+
+    def create_func(self, entry_dir: str):
+        self.create_times += 1
+        os.makedirs(os.path.join(entry_dir, "plugins"))
+        with open(os.path.join(entry_dir, "plugins", "file"), "w") as fs:
+            fs.write("x" * 10)
+
+    def test_get_or_create(self):
+        cache = ArtifactCache(root_dir=self.root_dir, max_size=1024)
+        entry_dir = cache.get_or_create("package_tree", "md5", self.create_func)
+        # 命中缓存时不再生成
+        self.assertEqual(cache.get_or_create("package_tree", "md5", self.create_func), entry_dir)
+        self.assertEqual(self.create_times, 1)
+
+        target_dir = files.mk_and_return_tmpdir()
+        link_tree(entry_dir, target_dir)
+        # 删除取出的文件不影响缓存
+        os.remove(os.path.join(target_dir, "plugins", "file"))
+        self.assertTrue(os.path.exists(os.path.join(entry_dir, "plugins", "file")))
+        shutil.rmtree(target_dir)
+
+    def test_evict(self):
+        cache = ArtifactCache(root_dir=self.root_dir, max_size=15)
+        old_entry_dir = cache.get_or_create("package_tree", "old", self.create_func)
+        os.utime(old_entry_dir, (0, 0))
+        new_entry_dir = cache.get_or_create("package_tree", "new", self.create_func)
+        # 超过大小上限，最久未使用的缓存项被淘汰
+        self.assertFalse(os.path.exists(old_entry_dir))
+        self.assertTrue(os.path.exists(new_entry_dir))
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import threading
+import typing
+
+from apps.exceptions import ApiRequestError
+from apps.node_man import constants
+from apps.utils import batch_request
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class MockPagedApi:
+    def __init__(
+        self,
+        total: int,
+        fail_starts: typing.Optional[typing.Set[int]] = None,
+        fail_exc_class: typing.Type[Exception] = ApiRequestError,
+    ):
+        self.total = total
+        self.fail_starts = set(fail_starts or [])
+        self.fail_exc_class = fail_exc_class
+        self.calls: typing.List[typing.Dict] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, params: typing.Dict) -> typing.Dict:
+        with self._lock:
+            self.calls.append(params)
+        start, limit = params["page"]["start"], params["page"]["limit"]
+        if start in self.fail_starts:
+            # 仅失败一次，用于验证重试
+            self.fail_starts.remove(start)
+            raise self.fail_exc_class(f"mock failed: start -> {start}")
+        return {"count": self.total, "info": list(range(start, min(start + limit, self.total)))}
+
+
+class TestBatchRequest(CustomBaseTestCase):
+    def test_batch_request(self):
+        api = MockPagedApi(total=1234)
+        self.assertEqual(batch_request.batch_request(api, {"bk_biz_id": 1}, limit=100), list(range(1234)))
+        # 首页即携带 limit，不再额外请求总数
+        self.assertEqual(len(api.calls), 13)
+        self.assertTrue(all(call["page"]["limit"] == 100 for call in api.calls))
+
+    def test_iter_pages_in_order(self):
+        api = MockPagedApi(total=1000)
+        pages = list(batch_request.batch_request_iter(api, {}, limit=100, sort="bk_host_id"))
+        self.assertEqual(len(pages), 10)
+        self.assertEqual([page[0] for page in pages], list(range(0, 1000, 100)))
+        self.assertTrue(all(call["page"]["sort"] == "bk_host_id" for call in api.calls))
+
+    def test_iter_pages_retry(self):
+        api = MockPagedApi(total=500, fail_starts={200})
+        self.assertEqual(batch_request.batch_request(api, {}, limit=100), list(range(500)))
+
+    def test_iter_pages_not_retry_unexpected_error(self):
+        api = MockPagedApi(total=500, fail_starts={200}, fail_exc_class=KeyError)
+        with self.assertRaises(KeyError):
+            batch_request.batch_request(api, {}, limit=100)
+        # 非接口请求异常不重试
+        self.assertEqual(len([call for call in api.calls if call["page"]["start"] == 200]), 1)
+
+    def test_iter_pages_early_stop(self):
+        api = MockPagedApi(total=100000)
+        pages_iter = batch_request.batch_request_iter(api, {}, limit=100, max_concurrency=2)
+        self.assertEqual(next(pages_iter), list(range(100)))
+        pages_iter.close()
+        # 提前终止时，仅请求了首页及窗口内的页
+        self.assertLess(len(api.calls), 10)
+
+    def test_split_module_params(self):
+        bk_module_ids = list(range(constants.QUERY_CMDB_MODULE_LIMIT + 1))
+        params = {"bk_biz_id": 1, "bk_module_ids": bk_module_ids}
+        split_params_list = batch_request.split_module_params(params)
+        self.assertEqual(len(split_params_list), 2)
+        self.assertEqual(split_params_list[1]["bk_module_ids"], [constants.QUERY_CMDB_MODULE_LIMIT])
+        # 不修改调用方的参数
+        self.assertEqual(params["bk_module_ids"], bk_module_ids)
+
+    def test_adaptive_concurrency(self):
+        concurrency = batch_request.AdaptiveConcurrency(initial=4, maximum=5)
+        concurrency.on_success()
+        concurrency.on_success()
+        self.assertEqual(concurrency.current, 5)
+        concurrency.on_failure()
+        self.assertEqual(concurrency.current, 2)
+        concurrency.on_failure()
+        concurrency.on_failure()
+        self.assertEqual(concurrency.current, 1)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Dict, Optional, Type
+
+from apps.utils import concurrent
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class TestCoroutineExecutor(CustomBaseTestCase):
+    def setUp(self) -> None:
+        self.running = 0
+        self.max_running = 0
+        self.key__running_map: Dict[int, int] = defaultdict(int)
+        self.key__max_running_map: Dict[int, int] = defaultdict(int)
+        super().setUp()
+
+    async def run_async(self, key: int, cost: float = 0.01, exc_class: Optional[Type[Exception]] = None):
+        self.running += 1
+        self.key__running_map[key] += 1
+        self.max_running = max(self.max_running, self.running)
+        self.key__max_running_map[key] = max(self.key__max_running_map[key], self.key__running_map[key])
+        await asyncio.sleep(cost)
+        self.running -= 1
+        self.key__running_map[key] -= 1
+        if exc_class is not None:
+            raise exc_class("failed")
+        return key
+
+    def test_limit(self):
+        executor = concurrent.CoroutineExecutor(
+            limit=6, key_limits=[concurrent.KeyLimit(get_key=lambda params: params["key"], limit=2)]
+        )
+        params_list = [{"key": idx % 5} for idx in range(50)]
+        results = concurrent.batch_call_coroutine(func=self.run_async, params_list=params_list, executor=executor)
+
+        self.assertEqual(sorted(results), sorted([params["key"] for params in params_list]))
+        self.assertEqual(self.max_running, 6)
+        self.assertEqual(max(self.key__max_running_map.values()), 2)
+
+    def test_iter_results_as_completed(self):
+        executor = concurrent.CoroutineExecutor(limit=10)
+        params_list = [{"key": 1, "cost": 0.2}, {"key": 2, "cost": 0.01}]
+        # 先完成的结果先返回
+        results = [result for __, result in executor.iter_results(self.run_async, params_list)]
+        self.assertEqual(results, [2, 1])
+
+    def test_backoff(self):
+        executor = concurrent.CoroutineExecutor(
+            limit=10,
+            key_limits=[concurrent.KeyLimit(get_key=lambda params: params["key"], limit=4)],
+            base_backoff=0.05,
+        )
+        params_list = [{"key": 1, "exc_class": ConnectionError} for __ in range(4)] + [{"key": 2} for __ in range(4)]
+        results = concurrent.batch_call_coroutine(func=self.run_async, params_list=params_list, executor=executor)
+
+        self.assertEqual(len([result for result in results if isinstance(result, ConnectionError)]), 4)
+        # 分组失败后并发上限减半，且不影响其他分组
+        self.assertEqual(self.key__max_running_map[1], 4)
+        self.assertEqual(executor.key__limiter_map[(0, 1)].limit, 1)
+        self.assertEqual(executor.key__limiter_map[(0, 2)].limit, 4)
+
+    def test_not_backoff_on_task_failure(self):
+        executor = concurrent.CoroutineExecutor(
+            limit=10,
+            key_limits=[concurrent.KeyLimit(get_key=lambda params: params["key"], limit=4)],
+            base_backoff=10,
+        )
+        params_list = [{"key": 1, "exc_class": RuntimeError} for __ in range(8)]
+        results = concurrent.batch_call_coroutine(func=self.run_async, params_list=params_list, executor=executor)
+
+        self.assertEqual(len([result for result in results if isinstance(result, RuntimeError)]), 8)
+        # 任务自身失败（如认证失败、命令执行失败）不降低分组并发，也不退避
+        limiter: concurrent.AdaptiveLimiter = executor.key__limiter_map[(0, 1)]
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.total_backoff, 0)
+
+    def test_max_total_backoff(self):
+        limiter = concurrent.AdaptiveLimiter(max_limit=4, base_backoff=1, max_backoff=30, max_total_backoff=10)
+        for __ in range(10):
+            limiter.on_failure(now=0)
+        # 累计退避不超过上限
+        self.assertEqual(limiter.total_backoff, 10)
+        self.assertEqual(limiter.limit, 1)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making 蓝鲸智云-节点管理(BlueKing-BK-NODEMAN) available.
+Copyright (C) 2017-2022 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at https://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from apps.utils import session_pool
+from apps.utils.unittest.testcase import CustomBaseTestCase
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"result": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "bk_token=mock")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+class TestSessionPool(CustomBaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/api/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        session_pool.stats.reset()
+
+    def test_reuse_connection(self):
+        pool = session_pool.SessionPool(max_idle_per_domain=2, keepalive_timeout=60)
+        for __ in range(10):
+            self.assertEqual(pool.request("GET", self.url).status_code, 200)
+
+        stats = session_pool.stats.snapshot()
+        self.assertEqual(stats[session_pool.SessionPoolStats.MISS], 1)
+        self.assertEqual(stats[session_pool.SessionPoolStats.HIT], 9)
+        # 10 次请求只发生了一次握手
+        self.assertEqual(stats[session_pool.SessionPoolStats.NEW_CONNECTION], 1)
+        self.assertEqual(stats["reused_connection"], 9)
+        pool.clear()
+
+    def test_cookies_not_shared(self):
+        pool = session_pool.SessionPool(max_idle_per_domain=2, keepalive_timeout=60)
+        pool.request("GET", self.url)
+        with pool.session(self.url) as session:
+            self.assertEqual(len(session.cookies), 0)
+        pool.clear()
+
+    def test_keepalive_expired(self):
+        pool = session_pool.SessionPool(max_idle_per_domain=2, keepalive_timeout=0)
+        pool.request("GET", self.url)
+        pool.request("GET", self.url)
+
+        stats = session_pool.stats.snapshot()
+        self.assertEqual(stats[session_pool.SessionPoolStats.MISS], 2)
+        self.assertEqual(stats[session_pool.SessionPoolStats.DISCARD], 2)
+        self.assertEqual(pool.idle_count(), 0)
+
+    def test_max_idle_per_domain(self):
+        pool = session_pool.SessionPool(max_idle_per_domain=1, keepalive_timeout=60)
+        first_session, second_session = pool.acquire(self.url), pool.acquire(self.url)
+        pool.release(self.url, first_session)
+        pool.release(self.url, second_session)
+        self.assertEqual(pool.idle_count(self.url), 1)
+        pool.clear()
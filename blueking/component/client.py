@@ -30,6 +30,12 @@ except Exception:
 
 logger = logging.getLogger("component")
 
+try:
+    # 复用进程级会话池，同域名请求共享 TCP / TLS 连接
+    from apps.utils.session_pool import request as pooled_request
+except ImportError:
+    pooled_request = requests.request
+
 
 class BaseComponentClient(object):
     """Base client class for component"""
@@ -112,7 +118,7 @@ class BaseComponentClient(object):
 
         params, data = self.merge_params_data_with_common_args(method, params, data, enable_app_secret=True)
         logger.debug("Calling %s %s with params=%s, data=%s, headers=%s", method, url, params, data, headers)
-        return requests.request(method, url, params=params, data=data, verify=False, headers=headers, **kwargs)
+        return pooled_request(method, url, params=params, data=data, verify=False, headers=headers, **kwargs)
 
     def __getattr__(self, key):
         if key not in self.available_collections:
@@ -151,7 +157,7 @@ class ComponentClientWithSignature(BaseComponentClient):
         params["bk_signature"] = get_signature(method, url_path, self.app_secret, params=params, data=data)
 
         logger.debug("Calling %s %s with params=%s, data=%s", method, url, params, data)
-        return requests.request(method, url, params=params, data=data, verify=False, headers=headers, **kwargs)
+        return pooled_request(method, url, params=params, data=data, verify=False, headers=headers, **kwargs)
 
 
 # 根据是否开启signature来判断使用的Client版本
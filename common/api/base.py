@@ -23,7 +23,7 @@ from django.utils.module_loading import import_string
 from django.utils.translation import ugettext as _
 
 from apps.exceptions import ApiRequestError, ApiResultError, AppBaseException
-from apps.utils import remove_auth_args
+from apps.utils import remove_auth_args, session_pool
 from apps.utils.local import get_request, get_request_id
 from apps.utils.time_handler import timestamp_to_datetime
 
@@ -356,9 +356,8 @@ class DataAPI(object):
         """
 
         # 增加request id
-        session = requests.session()
-        session.headers.update(headers)
-        session.headers.update(
+        request_headers = dict(headers)
+        request_headers.update(
             {
                 "X-Bkapi-Request-Id": self.request_id,
                 "X-Bkapi-App-Code": params.get("bk_app_code"),
@@ -377,44 +376,44 @@ class DataAPI(object):
         except AppBaseException:
             local_request = None
 
+        cookies = {}
         if local_request and local_request.COOKIES and not use_admin:
-            session.cookies.update(local_request.COOKIES)
+            cookies.update(local_request.COOKIES)
             # 用于跨服务调用透传国际化设置
-            session.cookies.set("blueking_language", translation.get_language())
+            cookies["blueking_language"] = translation.get_language()
 
         # headers 申明重载请求方法
         if self.method_override is not None:
-            session.headers.update({"X-METHOD-OVERRIDE": self.method_override})
+            request_headers.update({"X-METHOD-OVERRIDE": self.method_override})
 
         url = self.build_actual_url(params)
         # 发出请求并返回结果
         non_file_data, file_data = self._split_file_data(params)
         request_method = self.method.upper()
+        request_kwargs = {"method": self.method, "url": url, "verify": False, "timeout": self.timeout}
         if request_method == "GET":
-            result = session.request(method=self.method, url=url, params=params, verify=False, timeout=self.timeout)
+            request_kwargs["params"] = params
         elif request_method == "DELETE":
-            session.headers.update({"Content-Type": "application/json; charset=utf-8"})
-            result = session.request(
-                method=self.method, url=url, data=json.dumps(non_file_data), verify=False, timeout=self.timeout
-            )
+            request_headers.update({"Content-Type": "application/json; charset=utf-8"})
+            request_kwargs["data"] = json.dumps(non_file_data)
         elif request_method in ["PUT", "PATCH", "POST"]:
             if not file_data:
-                session.headers.update({"Content-Type": "application/json; charset=utf-8"})
+                request_headers.update({"Content-Type": "application/json; charset=utf-8"})
                 params = json.dumps(non_file_data)
             else:
                 params = non_file_data
 
             # PUT 方法上传文件时，data需作为
             if request_method == "PUT" and file_data:
-                data = list(file_data.values())[0]
-                result = session.request(method=self.method, url=url, data=data, verify=False, timeout=self.timeout)
+                request_kwargs["data"] = list(file_data.values())[0]
             else:
-                result = session.request(
-                    method=self.method, url=url, data=params, files=file_data, verify=False, timeout=self.timeout
-                )
+                request_kwargs.update(data=params, files=file_data)
         else:
             raise ApiRequestError("异常请求方式，{method}".format(method=self.method))
 
+        # 复用进程级会话池中同域名的会话，避免每次请求都重新建立 TCP / TLS 连接
+        result = session_pool.request(headers=request_headers, cookies=cookies, **request_kwargs)
+
         return result
 
     def build_actual_url(self, params):
@@ -350,6 +350,41 @@ SHOW_EXCEPTION_DETAIL = False
 # 并发数
 CONCURRENT_NUMBER = int(os.getenv("CONCURRENT_NUMBER", 50) or 50)
 
+# HTTP 会话池：每个域名保留的最大空闲会话数，默认与并发数一致，保证并发请求时均可复用连接
+HTTP_SESSION_POOL_SIZE = get_type_env("BKAPP_HTTP_SESSION_POOL_SIZE", _type=int, default=CONCURRENT_NUMBER)
+# HTTP 会话池：会话最大空闲时间（秒），小于等于 0 时不复用会话
+HTTP_SESSION_POOL_KEEPALIVE = get_type_env("BKAPP_HTTP_SESSION_POOL_KEEPALIVE", _type=int, default=60)
+
+# SSH 安装：使用有界并发协程执行器，按全局、接入点、管控区域限制并发，失败时自适应退避
+SSH_COROUTINE_EXECUTOR_ENABLED = get_type_env("BKAPP_SSH_COROUTINE_EXECUTOR_ENABLED", _type=bool, default=False)
+# SSH 安装：全局最大并发数
+SSH_CONCURRENT_LIMIT = get_type_env("BKAPP_SSH_CONCURRENT_LIMIT", _type=int, default=500)
+# SSH 安装：单个接入点最大并发数
+SSH_CONCURRENT_LIMIT_PER_AP = get_type_env("BKAPP_SSH_CONCURRENT_LIMIT_PER_AP", _type=int, default=200)
+# SSH 安装：单个管控区域最大并发数
+SSH_CONCURRENT_LIMIT_PER_CLOUD = get_type_env("BKAPP_SSH_CONCURRENT_LIMIT_PER_CLOUD", _type=int, default=200)
+# SSH 安装：使用连接池，Windows 主机 SSH 通道检测后的安装复用已认证的连接，需同时启用协程执行器
+SSH_CONN_POOL_ENABLED = get_type_env("BKAPP_SSH_CONN_POOL_ENABLED", _type=bool, default=False)
+# SSH 连接池：单个接入点最大连接数
+SSH_CONN_POOL_LIMIT_PER_AP = get_type_env("BKAPP_SSH_CONN_POOL_LIMIT_PER_AP", _type=int, default=200)
+# SSH 连接池：连接最大空闲时间（秒）
+SSH_CONN_POOL_MAX_IDLE_TIME = get_type_env("BKAPP_SSH_CONN_POOL_MAX_IDLE_TIME", _type=int, default=60)
+# SSH 安装：推送依赖文件前比对远程文件大小及 md5，跳过已存在的文件并续传中断的文件
+SSH_DEPENDENCY_CHECKSUM_ENABLED = get_type_env("BKAPP_SSH_DEPENDENCY_CHECKSUM_ENABLED", _type=bool, default=False)
+
+# Jinja 模板缓存：进程内最多缓存的已编译模板数量
+JINJA_TEMPLATE_CACHE_SIZE = get_type_env("BKAPP_JINJA_TEMPLATE_CACHE_SIZE", _type=int, default=2000)
+# Jinja 模板缓存：字节码缓存目录，为空时不启用磁盘缓存
+JINJA_BYTECODE_CACHE_DIR = get_type_env("BKAPP_JINJA_BYTECODE_CACHE_DIR", _type=str, default="")
+
+# 本地制品缓存：缓存插件包解压目录及导出产物，为空时不启用
+ARTIFACT_CACHE_DIR = get_type_env("BKAPP_ARTIFACT_CACHE_DIR", _type=str, default="")
+# 本地制品缓存：缓存总大小上限（MB）
+ARTIFACT_CACHE_MAX_SIZE_MB = get_type_env("BKAPP_ARTIFACT_CACHE_MAX_SIZE_MB", _type=int, default=2048)
+
+# 订阅执行历史冷数据归档目录，清理前将过期记录压缩归档，为空时不归档
+SUBSCRIPTION_DATA_ARCHIVE_DIR = get_type_env("BKAPP_SUBSCRIPTION_DATA_ARCHIVE_DIR", _type=str, default="")
+
 # 敏感参数
 SENSITIVE_PARAMS = ["app_code", "app_secret", "bk_app_code", "bk_app_secret", "auth_info"]
 
@@ -574,6 +609,12 @@ BK_SCRIPTS_PATH = os.path.join(PROJECT_ROOT, "script_tools")
 
 PIPELINE_DATA_BACKEND = "pipeline.engine.core.data.mysql_backend.MySQLDataBackend"
 PIPELINE_END_HANDLER = "apps.backend.agent.signals.pipeline_end_handler"
+# Pipeline 调度状态仅持久化相对首次写入的变更部分
+PIPELINE_IO_DELTA_ENABLED = get_type_env("BKAPP_PIPELINE_IO_DELTA_ENABLED", _type=bool, default=False)
+# Pipeline 调度锁，默认使用 ScheduleService.is_scheduling 标记，可切换为 Redis 租约锁
+PIPELINE_SCHEDULE_LOCK = get_type_env(
+    "BKAPP_PIPELINE_SCHEDULE_LOCK", _type=str, default="pipeline.engine.core.data.lock.DBFlagScheduleLock"
+)
 ENGINE_ZOMBIE_PROCESS_DOCTORS = [
     {
         "class": "pipeline.engine.health.zombie.doctors.RunningNodeZombieDoctor",
@@ -41,6 +41,16 @@ PIPELINE_END_HANDLER = getattr(
 PIPELINE_WORKER_STATUS_CACHE_EXPIRES = getattr(settings, "PIPELINE_WORKER_STATUS_CACHE_EXPIRES", 30)
 PIPELINE_RERUN_MAX_TIMES = getattr(settings, "PIPELINE_RERUN_MAX_TIMES", 0)
 PIPELINE_RERUN_INDEX_OFFSET = getattr(settings, "PIPELINE_RERUN_INDEX_OFFSET", -1)
+# schedule lock provider, use pipeline.engine.core.data.lock.RedisLeaseScheduleLock to lock with redis lease
+PIPELINE_SCHEDULE_LOCK = getattr(
+    settings, "PIPELINE_SCHEDULE_LOCK", "pipeline.engine.core.data.lock.DBFlagScheduleLock"
+)
+# lease of redis schedule lock in seconds
+PIPELINE_SCHEDULE_LOCK_LEASE = getattr(settings, "PIPELINE_SCHEDULE_LOCK_LEASE", 300)
+# max seconds to wait for redis schedule lock before retry the schedule later
+PIPELINE_SCHEDULE_LOCK_WAIT_TIMEOUT = getattr(settings, "PIPELINE_SCHEDULE_LOCK_WAIT_TIMEOUT", 2)
+# persist schedule state (ScheduleService.service_act / DataSnapshot.obj) as a stable base plus changed leaves
+PIPELINE_IO_DELTA_ENABLED = getattr(settings, "PIPELINE_IO_DELTA_ENABLED", False)
 
 COMPONENT_AUTO_DISCOVER_PATH = [
     "components.collections",
@@ -24,6 +24,7 @@ logger = logging.getLogger("celery")
 
 _backend = None
 _candidate_backend = None
+_schedule_lock = None
 
 
 def _import_backend(backend_cls_path):
@@ -55,6 +56,9 @@ if not _backend:
 if not _candidate_backend and settings.PIPELINE_DATA_CANDIDATE_BACKEND:
     _candidate_backend = _import_backend(settings.PIPELINE_DATA_CANDIDATE_BACKEND)
 
+if not _schedule_lock:
+    _schedule_lock = _import_backend(settings.PIPELINE_SCHEDULE_LOCK)
+
 
 def _write_operation(method, *args, **kwargs):
     propagate = False
@@ -125,3 +129,26 @@ def get_schedule_parent_data(schedule_id):
 
 def delete_parent_data(schedule_id):
     return del_object("%s_schedule_parent_data" % schedule_id)
+
+
+def acquire_schedule_lock(schedule_id):
+    """
+    :return: (lock token, None if lock failed; whether the lock is granted after waiting for other holder)
+    """
+    return _schedule_lock.acquire_with_wait(schedule_id)
+
+
+def release_schedule_lock(schedule_id, token):
+    return _schedule_lock.release(schedule_id, token)
+
+
+def is_schedule_lock_held(schedule_id, token):
+    return _schedule_lock.is_held(schedule_id, token)
+
+
+def get_schedule_lock_renew_interval():
+    return _schedule_lock.renew_interval
+
+
+def renew_schedule_lock(schedule_id, token):
+    return _schedule_lock.renew(schedule_id, token)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import math
+import time
+from abc import ABCMeta, abstractmethod
+
+from pipeline.conf import settings
+
+
+class BaseScheduleLock(object, metaclass=ABCMeta):
+    @abstractmethod
+    def acquire(self, schedule_id):
+        """
+        :return: lock token, None if lock failed
+        """
+        raise NotImplementedError()
+
+    def acquire_with_wait(self, schedule_id):
+        """
+        :return: (lock token, None if lock failed; whether the lock is granted after waiting for other holder)
+        """
+        return self.acquire(schedule_id), False
+
+    @abstractmethod
+    def release(self, schedule_id, token):
+        raise NotImplementedError()
+
+    def is_held(self, schedule_id, token):
+        return True
+
+    @property
+    def renew_interval(self):
+        """
+        :return: seconds between two renewals while holding the lock, None if the lock has no lease
+        """
+        return None
+
+    def renew(self, schedule_id, token):
+        """
+        extend the lease of the lock
+        :return: whether the lock is still held
+        """
+        return True
+
+
+class DBFlagScheduleLock(BaseScheduleLock):
+    """
+    lock schedule by ScheduleService.is_scheduling
+    """
+
+    def acquire(self, schedule_id):
+        from pipeline.engine.models import ScheduleService
+
+        is_updated = ScheduleService.objects.filter(id=schedule_id, is_scheduling=False).update(is_scheduling=True)
+        return True if is_updated else None
+
+    def release(self, schedule_id, token):
+        from pipeline.engine.models import ScheduleService
+
+        ScheduleService.objects.filter(id=schedule_id, is_scheduling=True).update(is_scheduling=False)
+        return True
+
+
+class RedisLeaseScheduleLock(BaseScheduleLock):
+    """
+    lock schedule by a redis lease key:
+    1) every acquisition gets a fencing token from an increasing counter, the lease key holds the token and expires
+       automatically, so a crashed worker can not hold the lock forever
+    2) release and lease check compare the token, a worker whose lease had expired can neither release the lock
+       of the new holder nor persist its schedule result
+    3) waiters block on a wake list instead of polling, and are woken as soon as the lock is released
+    """
+
+    # hash tag keeps keys of a schedule in the same slot in cluster mode
+    LOCK_KEY = "pipeline:schedule_lock:{{{}}}"
+    FENCE_KEY = "pipeline:schedule_lock:{{{}}}:fence"
+    WAKE_KEY = "pipeline:schedule_lock:{{{}}}:wake"
+    # fence counter must live much longer than the lease, or tokens may be reissued to the new holder
+    FENCE_EXPIRE = 24 * 60 * 60
+    # issue a fencing token and try to take the lease atomically, the fence counter never loses its expiry
+    ACQUIRE_SCRIPT = """
+local token = redis.call("incr", KEYS[1])
+redis.call("expire", KEYS[1], ARGV[1])
+if redis.call("set", KEYS[2], token, "NX", "EX", ARGV[2]) then
+    return token
+end
+return false
+"""
+    # compare token and delete lock atomically, keep at most one wake signal for only one waiter can get the lock
+    RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("del", KEYS[1], KEYS[2])
+redis.call("rpush", KEYS[2], ARGV[1])
+redis.call("expire", KEYS[2], ARGV[2])
+return 1
+"""
+    # compare token and extend the lease atomically
+    RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("expire", KEYS[1], ARGV[2])
+return 1
+"""
+
+    def __init__(self, redis_inst=None, lease=None, wait_timeout=None):
+        """
+        :param redis_inst: redis client, use settings.redis_inst by default
+        :param lease: lease of lock in seconds
+        :param wait_timeout: max seconds to wait for the lock
+        """
+        self._redis_inst = redis_inst
+        self.lease = lease if lease is not None else settings.PIPELINE_SCHEDULE_LOCK_LEASE
+        self.wait_timeout = wait_timeout if wait_timeout is not None else settings.PIPELINE_SCHEDULE_LOCK_WAIT_TIMEOUT
+
+    @property
+    def redis_inst(self):
+        # settings.redis_inst is initialized after app ready
+        return self._redis_inst or settings.redis_inst
+
+    def try_acquire(self, schedule_id):
+        return self.redis_inst.eval(
+            self.ACQUIRE_SCRIPT,
+            2,
+            self.FENCE_KEY.format(schedule_id),
+            self.LOCK_KEY.format(schedule_id),
+            self.FENCE_EXPIRE,
+            self.lease,
+        )
+
+    def acquire(self, schedule_id):
+        return self.acquire_with_wait(schedule_id)[0]
+
+    def acquire_with_wait(self, schedule_id):
+        deadline = time.time() + self.wait_timeout
+        waited = False
+        while True:
+            token = self.try_acquire(schedule_id)
+            if token is not None:
+                return token, waited
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None, waited
+            waited = True
+            self.redis_inst.blpop(self.WAKE_KEY.format(schedule_id), timeout=max(1, int(math.ceil(remaining))))
+
+    def release(self, schedule_id, token):
+        released = self.redis_inst.eval(
+            self.RELEASE_SCRIPT,
+            2,
+            self.LOCK_KEY.format(schedule_id),
+            self.WAKE_KEY.format(schedule_id),
+            token,
+            self.lease,
+        )
+        # lock had been taken by others after lease expired if not released
+        return bool(released)
+
+    def is_held(self, schedule_id, token):
+        return self._token_equal(self.redis_inst.get(self.LOCK_KEY.format(schedule_id)), token)
+
+    @property
+    def renew_interval(self):
+        # renew several times within a lease, so a slow renewal does not let the lease expire
+        return max(self.lease / 3.0, 1)
+
+    def renew(self, schedule_id, token):
+        return bool(self.redis_inst.eval(self.RENEW_SCRIPT, 1, self.LOCK_KEY.format(schedule_id), token, self.lease))
+
+    @staticmethod
+    def _token_equal(value, token):
+        return value is not None and int(value) == token
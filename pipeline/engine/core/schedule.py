@@ -13,13 +13,23 @@ specific language governing permissions and limitations under the License.
 
 import contextlib
 import logging
+import threading
 import traceback
 
 from django.db import transaction
 
 from pipeline.django_signal_valve import valve
 from pipeline.engine import exceptions, signals, states
-from pipeline.engine.core.data import delete_parent_data, get_schedule_parent_data, set_schedule_data
+from pipeline.engine.core.data import (
+    acquire_schedule_lock,
+    delete_parent_data,
+    get_schedule_lock_renew_interval,
+    get_schedule_parent_data,
+    is_schedule_lock_held,
+    release_schedule_lock,
+    renew_schedule_lock,
+    set_schedule_data,
+)
 from pipeline.engine.models import Data, MultiCallbackData, PipelineProcess, ScheduleService, Status
 
 logger = logging.getLogger("celery")
@@ -43,13 +53,46 @@ def schedule_exception_handler(process_id, schedule_id):
 
 
 @contextlib.contextmanager
-def auto_release_schedule_lock(schedule_id):
+def auto_release_schedule_lock(schedule_id, lock_token):
     yield
     # release schedule lock before exit schedule
-    ScheduleService.objects.filter(id=schedule_id, is_scheduling=True).update(is_scheduling=False)
+    release_schedule_lock(schedule_id, lock_token)
     logger.warning("schedule({}) unlock success.".format(schedule_id))
 
 
+@contextlib.contextmanager
+def schedule_lock_heartbeat(schedule_id, lock_token):
+    """
+    renew the lease of schedule lock periodically while the service is scheduling,
+    so that a long schedule does not lose its lock to other workers
+    """
+    interval = get_schedule_lock_renew_interval()
+    if not interval:
+        yield
+        return
+
+    stopped = threading.Event()
+
+    def heartbeat():
+        while not stopped.wait(interval):
+            try:
+                held = renew_schedule_lock(schedule_id, lock_token)
+            except Exception:
+                logger.error("schedule({}) lock renew error: {}".format(schedule_id, traceback.format_exc()))
+                continue
+            if not held:
+                logger.warning("schedule({}) lock lease lost, stop renewing".format(schedule_id))
+                return
+
+    heartbeat_thread = threading.Thread(target=heartbeat, name="schedule_lock_heartbeat", daemon=True)
+    heartbeat_thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        heartbeat_thread.join()
+
+
 def schedule(process_id, schedule_id, data_id=None):
     """
     调度服务主函数
@@ -72,10 +115,10 @@ def schedule(process_id, schedule_id, data_id=None):
             return
 
         # try update lock schedule
-        is_updated = ScheduleService.objects.filter(id=schedule_id, is_scheduling=False).update(is_scheduling=True)
+        lock_token, lock_waited = acquire_schedule_lock(schedule_id)
 
         # lock failed, other worker may locking
-        if is_updated == 0:
+        if lock_token is None:
             # retry lock after seconds
             logger.warning("schedule service lock-{} failed, retry after seconds".format(schedule_id))
             valve.send(
@@ -89,7 +132,18 @@ def schedule(process_id, schedule_id, data_id=None):
             )
             return
 
-        with auto_release_schedule_lock(schedule_id):
+        with auto_release_schedule_lock(schedule_id, lock_token):
+            if lock_waited:
+                # the lock is granted after waiting for the previous holder, reload the schedule to see its result
+                try:
+                    sched_service = ScheduleService.objects.get(id=schedule_id)
+                except ScheduleService.DoesNotExist:
+                    logger.warning("schedule not exist after locked, give up, sched_id: {}".format(schedule_id))
+                    return
+                if sched_service.is_finished:
+                    logger.warning("schedule already finished after locked, give up, sched_id: {}".format(schedule_id))
+                    return
+
             service_act = sched_service.service_act
             act_id = sched_service.activity_id
             version = sched_service.version
@@ -124,18 +178,34 @@ def schedule(process_id, schedule_id, data_id=None):
 
             # schedule
             ex_data, success = None, False
-            try:
-                success = service_act.schedule(parent_data, schedule_data)
-                if success is None:
-                    success = True
-            except Exception:
-                if service_act.error_ignorable:
-                    success = True
-                    service_act.ignore_error()
-                    service_act.finish_schedule()
-
-                ex_data = traceback.format_exc()
-                logging.error(ex_data)
+            with schedule_lock_heartbeat(schedule_id, lock_token):
+                try:
+                    success = service_act.schedule(parent_data, schedule_data)
+                    if success is None:
+                        success = True
+                except Exception:
+                    if service_act.error_ignorable:
+                        success = True
+                        service_act.ignore_error()
+                        service_act.finish_schedule()
+
+                    ex_data = traceback.format_exc()
+                    logging.error(ex_data)
+
+            # lease lost and the schedule may have been taken by other worker, give up the stale result and
+            # schedule again, or the node will stay running if no other worker is scheduling it
+            if not is_schedule_lock_held(schedule_id, lock_token):
+                logger.warning("schedule({}) lock lease lost, give up the result and retry".format(schedule_id))
+                valve.send(
+                    signals,
+                    "schedule_ready",
+                    sender=ScheduleService,
+                    process_id=process_id,
+                    schedule_id=schedule_id,
+                    data_id=data_id,
+                    countdown=2,
+                )
+                return
 
             sched_service.schedule_times += 1
             set_schedule_data(sched_service.id, parent_data)
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.4 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("engine", "0026_auto_20200610_1442"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="history",
+            name="archived_time",
+            field=models.DateTimeField(db_index=True, verbose_name="结束时间"),
+        ),
+    ]
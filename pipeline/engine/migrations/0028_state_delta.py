@@ -0,0 +1,25 @@
+# Generated by Django 3.2.4 on 2026-10-17 10:12
+
+from django.db import migrations
+
+import pipeline.engine.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("engine", "0027_history_archived_time_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scheduleservice",
+            name="service_act_delta",
+            field=pipeline.engine.models.fields.StateDeltaField(default=None, null=True, verbose_name="待调度服务增量"),
+        ),
+        migrations.AddField(
+            model_name="datasnapshot",
+            name="obj_delta",
+            field=pipeline.engine.models.fields.StateDeltaField(default=None, null=True, verbose_name="对象存储字段增量"),
+        ),
+    ]
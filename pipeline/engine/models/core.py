@@ -27,7 +27,8 @@ from pipeline.core.pipeline import Pipeline
 from pipeline.django_signal_valve import valve
 from pipeline.engine import exceptions, signals, states, utils
 from pipeline.engine.core import data as data_service
-from pipeline.engine.models.fields import IOField
+from pipeline.engine.models.delta import StateDeltaMixin
+from pipeline.engine.models.fields import IOField, StateDeltaField
 from pipeline.engine.utils import ActionResult, Stack, calculate_elapsed_time
 from pipeline.log.models import LogEntry
 from pipeline.utils.uniqid import node_uniqid, uniqid
@@ -988,7 +989,7 @@ class History(models.Model):
     id = models.BigAutoField(_("ID"), primary_key=True)
     identifier = models.CharField(_("节点 id"), max_length=32, db_index=True)
     started_time = models.DateTimeField(_("开始时间"))
-    archived_time = models.DateTimeField(_("结束时间"))
+    archived_time = models.DateTimeField(_("结束时间"), db_index=True)
     loop = models.IntegerField(_("循环次数"), default=1)
     skip = models.BooleanField(_("是否跳过"), default=False)
 
@@ -1040,8 +1041,9 @@ class ScheduleServiceManager(models.Manager):
         )
 
 
-class ScheduleService(models.Model):
+class ScheduleService(StateDeltaMixin, models.Model):
     SCHEDULE_ID_SPLIT_DIVISION = 32
+    DELTA_FIELDS = {"service_act": "service_act_delta"}
 
     id = models.CharField(_("ID 节点ID+version"), max_length=NAME_MAX_LENGTH, unique=True, primary_key=True)
     activity_id = models.CharField(_("节点 ID"), max_length=32, db_index=True)
@@ -1051,6 +1053,7 @@ class ScheduleService(models.Model):
     multi_callback_enabled = models.BooleanField(_("是否支持多次回调"), default=False)
     callback_data = IOField(verbose_name=_("回调数据"), default=None)
     service_act = IOField(verbose_name=_("待调度服务"))
+    service_act_delta = StateDeltaField(verbose_name=_("待调度服务增量"))
     is_finished = models.BooleanField(_("是否已完成"), default=False)
     version = models.CharField(_("Activity 的版本"), max_length=32, db_index=True)
     is_scheduling = models.BooleanField(_("是否正在被调度"), default=False, db_index=True)
@@ -14,17 +14,24 @@ specific language governing permissions and limitations under the License.
 from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 
-from pipeline.engine.models.fields import IOField
+from pipeline.engine.models.delta import StateDeltaMixin, make_delta
+from pipeline.engine.models.fields import IOField, StateDeltaField
 
 
 class DataSnapshotManager(models.Manager):
     def set_object(self, key, obj):
         # do not use update_or_create, prevent of deadlock
         with transaction.atomic():
-            if self.get_object(key):
-                self.filter(key=key).update(obj=obj)
+            # only load the delta to check existence, instead of the whole object
+            delta_bases = list(self.filter(key=key).values_list("obj_delta", flat=True))
+            if delta_bases:
+                delta, is_base = make_delta(delta_bases[0], obj)
+                if is_base:
+                    self.filter(key=key).update(obj=obj, obj_delta=delta)
+                else:
+                    self.filter(key=key).update(obj_delta=delta)
             else:
-                self.create(key=key, obj=obj)
+                self.create(key=key, obj=obj, obj_delta=make_delta(None, obj)[0])
         return True
 
     def get_object(self, key):
@@ -41,8 +48,11 @@ class DataSnapshotManager(models.Manager):
             return False
 
 
-class DataSnapshot(models.Model):
+class DataSnapshot(StateDeltaMixin, models.Model):
+    DELTA_FIELDS = {"obj": "obj_delta"}
+
     key = models.CharField(_("对象唯一键"), max_length=255, primary_key=True)
     obj = IOField(verbose_name=_("对象存储字段"))
+    obj_delta = StateDeltaField(verbose_name=_("对象存储字段增量"))
 
     objects = DataSnapshotManager()
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import hashlib
+import io
+import pickle
+
+from pipeline.conf import settings as pipeline_settings
+
+ATTR = "a"
+ITEM = "i"
+
+
+def delta_enabled():
+    return pipeline_settings.PIPELINE_IO_DELTA_ENABLED
+
+
+def _get_state(obj):
+    """
+    get the attributes to be pickled of obj, None if obj is not pickled as its attributes
+    """
+    cls = type(obj)
+    if (
+        isinstance(obj, type)
+        or not hasattr(obj, "__dict__")
+        or hasattr(cls, "__slots__")
+        or cls.__reduce_ex__ is not object.__reduce_ex__
+        or cls.__reduce__ is not object.__reduce__
+    ):
+        return None
+    getstate = getattr(obj, "__getstate__", None)
+    state = getstate() if getstate else obj.__dict__
+    return state if isinstance(state, dict) else None
+
+
+def _children(obj):
+    if isinstance(obj, dict):
+        return [((ITEM, key), value) for key, value in obj.items()]
+    state = _get_state(obj)
+    if state is not None:
+        return [((ATTR, key), value) for key, value in state.items()]
+    return None
+
+
+def _get_child(obj, step):
+    kind, key = step
+    return obj[key] if kind == ITEM else getattr(obj, key)
+
+
+def _set_child(obj, step, value):
+    kind, key = step
+    if kind == ITEM:
+        obj[key] = value
+    else:
+        setattr(obj, key, value)
+
+
+def _del_child(obj, step):
+    kind, key = step
+    if kind == ITEM:
+        del obj[key]
+    else:
+        delattr(obj, key)
+
+
+def _get_node(obj, path):
+    node = obj
+    for step in path:
+        node = _get_child(node, step)
+    return node
+
+
+def _common_path(path, other_path):
+    common_path = ()
+    for step, other_step in zip(path, other_path):
+        if step != other_step:
+            break
+        common_path += (step,)
+    return common_path
+
+
+# mutable objects whose identity should be kept, instances are covered by their __dict__
+SHARED_TYPES = (dict, list, set, bytearray)
+# leaves of these types hold no mutable objects
+ATOMIC_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def flatten(obj, max_depth, max_children):
+    """
+    split obj into pickled leaves, containers deeper than max_depth or with more than max_children children
+    are treated as leaves, to keep the digests small
+    leaves are loaded separately, so the closest common container of the paths referencing a same mutable object
+    is treated as a leaf to keep the identity
+    :return: ({path: container type}, {path: pickled leaf}), None if the common container is obj itself
+    """
+    shapes, leaves, shared_paths = {}, {}, set()
+    # objects referenced by each container / leaf, in the layout of Pickler.memo: {id: (memo index, obj)},
+    # the objects are kept alive until the end, so their ids won't be reused
+    ref_ids, path_refs = set(), []
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+
+    def _add_refs(path, refs):
+        for ref_id in ref_ids.intersection(refs):
+            if isinstance(refs[ref_id][1], SHARED_TYPES):
+                ref_path = next(p for p, r in path_refs if ref_id in r)
+                shared_paths.add(_common_path(ref_path, path))
+        ref_ids.update(refs)
+        path_refs.append((path, refs))
+
+    def _dumps(node):
+        buffer.seek(0)
+        buffer.truncate()
+        pickler.clear_memo()
+        pickler.dump(node)
+        return buffer.getvalue()
+
+    def _walk(node, path):
+        children = _children(node) if len(path) < max_depth else None
+        if children is None or len(children) > max_children:
+            leaves[path] = _dumps(node)
+            if not isinstance(node, ATOMIC_TYPES):
+                _add_refs(path, pickler.memo.copy())
+            return
+        _add_refs(path, {id(ref): (None, ref) for ref in (node, getattr(node, "__dict__", None)) if ref is not None})
+        shapes[path] = type(node)
+        for step, child in children:
+            _walk(child, path + (step,))
+
+    _walk(obj, ())
+    if () in shared_paths:
+        return None
+    for shared_path in shared_paths:
+        if any(shared_path[:i] in shared_paths for i in range(len(shared_path))):
+            continue
+        for nodes in (shapes, leaves):
+            for path in [path for path in nodes if path[: len(shared_path)] == shared_path]:
+                del nodes[path]
+        leaves[shared_path] = _dumps(_get_node(obj, shared_path))
+    return shapes, leaves
+
+
+class StateDelta(object):
+    """
+    delta of an object against a stable base which had been persisted once:
+    the base is split into leaves (attributes / dict items, up to max_depth levels), only the digests of
+    base leaves are kept here, and the pickled leaves which differ from the base are recorded as changes
+    """
+
+    VERSION = 1
+    MAX_DEPTH = 3
+    MAX_CHILDREN = 64
+    # rebase when changes exceed this ratio of the whole object size
+    REBASE_RATIO = 0.5
+
+    def __init__(self, shapes, digests, changes=None, removed=None, version=VERSION):
+        self.shapes = shapes
+        self.digests = digests
+        self.changes = changes or {}
+        self.removed = removed or []
+        self.version = version
+
+    def __getstate__(self):
+        return {
+            "version": self.version,
+            "shapes": self.shapes,
+            "digests": self.digests,
+            "changes": self.changes,
+            "removed": self.removed,
+        }
+
+    def __setstate__(self, state):
+        if state["version"] != self.VERSION:
+            raise ValueError("unsupported state delta version: {}".format(state["version"]))
+        self.__init__(**state)
+
+    @staticmethod
+    def digest(pickled):
+        return hashlib.md5(pickled).digest()
+
+    @classmethod
+    def make_base(cls, obj):
+        """
+        :return: base delta of obj, None if obj can not be split into leaves
+        """
+        flattened = flatten(obj, cls.MAX_DEPTH, cls.MAX_CHILDREN)
+        if flattened is None:
+            return None
+        shapes, leaves = flattened
+        return cls(shapes=shapes, digests={path: cls.digest(pickled) for path, pickled in leaves.items()})
+
+    def diff(self, obj):
+        """
+        calculate the delta of obj against the base
+        :return: new delta, None if obj should be persisted as a new base
+        """
+        flattened = flatten(obj, self.MAX_DEPTH, self.MAX_CHILDREN)
+        if flattened is None:
+            return None
+        shapes, leaves = flattened
+        if shapes.get(()) is not self.shapes.get(()):
+            return None
+
+        # containers which are new or changed their type are recorded as a whole
+        whole_paths = set()
+        for path in sorted(shapes, key=len):
+            if self.shapes.get(path) is not shapes[path] and not any(path[:i] in whole_paths for i in range(len(path))):
+                whole_paths.add(path)
+
+        changes, changed_size, total_size = {}, 0, 0
+        for path in whole_paths:
+            changes[path] = pickle.dumps(_get_node(obj, path), pickle.HIGHEST_PROTOCOL)
+            changed_size += len(changes[path])
+
+        for path, pickled in leaves.items():
+            total_size += len(pickled)
+            if any(path[:i] in whole_paths for i in range(len(path))):
+                continue
+            if self.digests.get(path) != self.digest(pickled):
+                changes[path] = pickled
+                changed_size += len(pickled)
+
+        if changed_size > total_size * self.REBASE_RATIO:
+            return None
+
+        # only the topmost missing path need to be removed
+        removed = [
+            path
+            for path in list(self.digests) + list(self.shapes)
+            if path and path not in leaves and path not in shapes and path[:-1] in shapes
+        ]
+        return StateDelta(shapes=self.shapes, digests=self.digests, changes=changes, removed=removed)
+
+    def apply(self, base):
+        """
+        apply changes on the base object which is loaded from db
+        """
+        for path, pickled in sorted(self.changes.items(), key=lambda item: len(item[0])):
+            value = pickle.loads(pickled)
+            if not path:
+                base = value
+                continue
+            node = base
+            for step in path[:-1]:
+                node = _get_child(node, step)
+            _set_child(node, path[-1], value)
+
+        for path in self.removed:
+            node = base
+            try:
+                for step in path[:-1]:
+                    node = _get_child(node, step)
+                _del_child(node, path[-1])
+            except (KeyError, AttributeError):
+                pass
+        return base
+
+
+def make_delta(delta_base, value):
+    """
+    calculate the delta to persist value
+    :param delta_base: delta of the persisted base
+    :return: (delta, whether value should be persisted as a new base)
+    """
+    if value is None or not delta_enabled():
+        return None, True
+    delta = delta_base.diff(value) if isinstance(delta_base, StateDelta) else None
+    if delta is None:
+        return StateDelta.make_base(value), True
+    return delta, False
+
+
+class StateDeltaMixin(object):
+    """
+    persist IOField of the model as a stable base plus a StateDeltaField which only records changed leaves,
+    fields are declared by DELTA_FIELDS: {io field name: delta field name}
+    """
+
+    DELTA_FIELDS = {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(StateDeltaMixin, cls).from_db(db, field_names, values)
+        instance._delta_bases = {}
+        for field_name, delta_field_name in cls.DELTA_FIELDS.items():
+            delta = instance.__dict__.get(delta_field_name)
+            if delta is None or field_name not in instance.__dict__:
+                continue
+            setattr(instance, field_name, delta.apply(getattr(instance, field_name)))
+            instance._delta_bases[field_name] = delta
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        # unchanged base fields are excluded from the update
+        delta_update = update_fields is None and not self._state.adding and delta_enabled()
+        if delta_update:
+            update_fields = {field.name for field in self._meta.concrete_fields if not field.primary_key}
+        elif update_fields is not None:
+            update_fields = set(update_fields)
+
+        delta_bases = getattr(self, "_delta_bases", {})
+        self._delta_bases = {}
+        for field_name, delta_field_name in self.DELTA_FIELDS.items():
+            if update_fields is not None and field_name not in update_fields:
+                if field_name in delta_bases:
+                    self._delta_bases[field_name] = delta_bases[field_name]
+                continue
+
+            delta, is_base = make_delta(delta_bases.get(field_name), getattr(self, field_name))
+            if delta is not None:
+                self._delta_bases[field_name] = delta
+            if delta_update and not is_base:
+                update_fields.discard(field_name)
+            setattr(self, delta_field_name, delta)
+            if update_fields is not None:
+                update_fields.add(delta_field_name)
+
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
+        return super(StateDeltaMixin, self).save(*args, **kwargs)
@@ -41,3 +41,25 @@ class IOField(models.BinaryField):
 
     def from_db_value(self, value, expression, connection, context=None):
         return self.to_python(value)
+
+
+class StateDeltaField(IOField):
+    """
+    nullable IOField to keep the StateDelta of another IOField, None is stored as NULL
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("null", True)
+        kwargs.setdefault("default", None)
+        super(StateDeltaField, self).__init__(*args, **kwargs)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return super(StateDeltaField, self).get_prep_value(value)
+
+    def to_python(self, value):
+        if value is None:
+            return None
+        # a broken delta must not be ignored, or the stale base would be used
+        return pickle.loads(zlib.decompress(models.BinaryField.to_python(self, value)))
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import threading
+import time
+import unittest
+
+from django.test import TestCase
+
+from pipeline.engine.core.data.lock import RedisLeaseScheduleLock
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class RedisLeaseScheduleLockTestCase(TestCase):
+    def setUp(self):
+        self.redis_inst = fakeredis.FakeStrictRedis()
+        self.lock = RedisLeaseScheduleLock(redis_inst=self.redis_inst, lease=10, wait_timeout=0)
+
+    def test_acquire_and_release(self):
+        token = self.lock.acquire("s1")
+        self.assertIsNotNone(token)
+        self.assertTrue(self.lock.is_held("s1", token))
+        self.assertIsNone(self.lock.acquire("s1"))
+        # lock of other schedule is not affected
+        self.assertIsNotNone(self.lock.acquire("s2"))
+
+        self.assertTrue(self.lock.release("s1", token))
+        self.assertFalse(self.lock.is_held("s1", token))
+        self.assertGreater(self.lock.acquire("s1"), token)
+
+    def test_stale_token(self):
+        stale_token = self.lock.acquire("s1")
+        # lease expired and the lock is taken by other worker
+        self.redis_inst.delete(RedisLeaseScheduleLock.LOCK_KEY.format("s1"))
+        token = self.lock.acquire("s1")
+
+        self.assertFalse(self.lock.is_held("s1", stale_token))
+        self.assertFalse(self.lock.release("s1", stale_token))
+        self.assertTrue(self.lock.is_held("s1", token))
+
+    def test_wake_waiter(self):
+        token = self.lock.acquire("s1")
+        waiter_lock = RedisLeaseScheduleLock(redis_inst=self.redis_inst, lease=10, wait_timeout=5)
+        result = {}
+
+        def wait():
+            result["token"] = waiter_lock.acquire("s1")
+            result["waked_at"] = time.time()
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        time.sleep(0.1)
+        released_at = time.time()
+        self.lock.release("s1", token)
+        waiter.join()
+
+        self.assertIsNotNone(result["token"])
+        # waiter is woken by release instead of waiting until timeout
+        self.assertLess(result["waked_at"] - released_at, 1)
+
+    def test_acquire_with_wait(self):
+        token, waited = self.lock.acquire_with_wait("s1")
+        self.assertIsNotNone(token)
+        self.assertFalse(waited)
+
+        waiter_lock = RedisLeaseScheduleLock(redis_inst=self.redis_inst, lease=10, wait_timeout=1)
+        self.assertEqual(waiter_lock.acquire_with_wait("s1"), (None, True))
+
+    def test_renew(self):
+        lock = RedisLeaseScheduleLock(redis_inst=self.redis_inst, lease=10, wait_timeout=0)
+        token = lock.acquire("s1")
+        lock_key = RedisLeaseScheduleLock.LOCK_KEY.format("s1")
+        self.redis_inst.expire(lock_key, 1)
+
+        self.assertTrue(lock.renew("s1", token))
+        self.assertGreater(self.redis_inst.ttl(lock_key), 1)
+
+        # lease of other holder can not be renewed by a stale token
+        self.redis_inst.delete(lock_key)
+        new_token = lock.acquire("s1")
+        self.assertFalse(lock.renew("s1", token))
+        self.assertTrue(lock.is_held("s1", new_token))
@@ -12,6 +12,7 @@ specific language governing permissions and limitations under the License.
 """
 
 import itertools
+import time
 
 from django.test import TestCase
 from mock import call
@@ -99,6 +100,87 @@ class ScheduleTestCase(TestCase):
             # reset mock
             mock_ss.destroy.reset_mock()
 
+    @mock.patch(PIPELINE_SCHEDULE_SERVICE_FILTER, mock.MagicMock(return_value=MockQuerySet(exists_return=True)))
+    @mock.patch(PIPELINE_STATUS_FILTER, mock.MagicMock(return_value=MockQuerySet(exists_return=True)))
+    @mock.patch(SCHEDULE_DELETE_PARENT_DATA, mock.MagicMock())
+    @mock.patch(SCHEDULE_ACQUIRE_SCHEDULE_LOCK, mock.MagicMock(return_value=(True, True)))
+    def test_schedule__finished_by_previous_lock_holder(self):
+        mock_ss = MockScheduleService()
+        # schedule is finished by the previous lock holder while waiting for the lock
+        finished_ss = MockScheduleService(id=mock_ss.id, is_finished=True)
+        with mock.patch(PIPELINE_SCHEDULE_SERVICE_GET, mock.MagicMock(side_effect=[mock_ss, finished_ss])):
+            process_id = uniqid()
+
+            schedule.schedule(process_id, mock_ss.id)
+
+            mock_ss.service_act.schedule.assert_not_called()
+
+            finished_ss.service_act.schedule.assert_not_called()
+
+            ScheduleService.objects.filter.assert_called_with(id=mock_ss.id, is_scheduling=True)
+
+    @mock.patch(PIPELINE_SCHEDULE_SERVICE_FILTER, mock.MagicMock(return_value=MockQuerySet(exists_return=True)))
+    @mock.patch(PIPELINE_STATUS_TRANSIT, mock.MagicMock(return_value=MockActionResult(result=True)))
+    @mock.patch(PIPELINE_STATUS_FILTER, mock.MagicMock(return_value=MockQuerySet(exists_return=True)))
+    @mock.patch(SCHEDULE_DELETE_PARENT_DATA, mock.MagicMock())
+    @mock.patch(SCHEDULE_GET_SCHEDULE_PARENT_DATA, mock.MagicMock(return_value=PARENT_DATA))
+    @mock.patch(SCHEDULE_SET_SCHEDULE_DATA, mock.MagicMock())
+    @mock.patch(SIGNAL_VALVE_SEND, mock.MagicMock())
+    @mock.patch(SCHEDULE_ACQUIRE_SCHEDULE_LOCK, mock.MagicMock(return_value=(1, False)))
+    @mock.patch(SCHEDULE_IS_SCHEDULE_LOCK_HELD, mock.MagicMock(return_value=False))
+    def test_schedule__lock_lease_lost(self):
+        mock_ss = MockScheduleService(schedule_return=True)
+        with mock.patch(PIPELINE_SCHEDULE_SERVICE_GET, mock.MagicMock(return_value=mock_ss)):
+            process_id = uniqid()
+
+            schedule.schedule(process_id, mock_ss.id)
+
+            # the lock is granted without waiting, schedule service is loaded only once
+            ScheduleService.objects.get.assert_called_once_with(id=mock_ss.id)
+
+            mock_ss.service_act.schedule.assert_called_with(PARENT_DATA, mock_ss.callback_data)
+
+            # lease lost without other holder, give up the result and schedule again
+            self.assertEqual(mock_ss.schedule_times, 0)
+
+            schedule.set_schedule_data.assert_not_called()
+
+            mock_ss.finish.assert_not_called()
+
+            valve.send.assert_called_once_with(
+                signals,
+                "schedule_ready",
+                sender=ScheduleService,
+                process_id=process_id,
+                schedule_id=mock_ss.id,
+                data_id=None,
+                countdown=2,
+            )
+
+    @mock.patch(SCHEDULE_GET_SCHEDULE_LOCK_RENEW_INTERVAL, mock.MagicMock(return_value=0.01))
+    def test_schedule_lock_heartbeat(self):
+        with mock.patch(SCHEDULE_RENEW_SCHEDULE_LOCK, mock.MagicMock(return_value=True)):
+            with schedule.schedule_lock_heartbeat("schedule_id", 1):
+                time.sleep(0.1)
+
+            schedule.renew_schedule_lock.assert_called_with("schedule_id", 1)
+            self.assertGreater(schedule.renew_schedule_lock.call_count, 1)
+
+        # stop renewing after the lease is lost
+        with mock.patch(SCHEDULE_RENEW_SCHEDULE_LOCK, mock.MagicMock(return_value=False)):
+            with schedule.schedule_lock_heartbeat("schedule_id", 1):
+                time.sleep(0.1)
+
+            schedule.renew_schedule_lock.assert_called_once_with("schedule_id", 1)
+
+    @mock.patch(SCHEDULE_GET_SCHEDULE_LOCK_RENEW_INTERVAL, mock.MagicMock(return_value=None))
+    @mock.patch(SCHEDULE_RENEW_SCHEDULE_LOCK, mock.MagicMock())
+    def test_schedule_lock_heartbeat__lock_without_lease(self):
+        with schedule.schedule_lock_heartbeat("schedule_id", True):
+            pass
+
+        schedule.renew_schedule_lock.assert_not_called()
+
     @mock.patch(PIPELINE_SCHEDULE_SERVICE_FILTER, mock.MagicMock(return_value=MockQuerySet(exists_return=True)))
     @mock.patch(PIPELINE_STATUS_FILTER, mock.MagicMock(return_value=MockQuerySet(exists_return=True)))
     @mock.patch(PIPELINE_PROCESS_GET, mock.MagicMock(return_value=MockPipelineProcess()))
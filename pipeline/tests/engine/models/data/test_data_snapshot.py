@@ -11,7 +11,7 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from pipeline.engine.models import DataSnapshot
 
@@ -60,3 +60,20 @@ class DataSnapshotTestCase(TestCase):
         self.assertIsNone(none)
         del_result = DataSnapshot.objects.del_object(self.key_1)
         self.assertFalse(del_result)
+
+    @override_settings(PIPELINE_IO_DELTA_ENABLED=True)
+    def test_set_object__delta(self):
+        obj = {"inputs": {"ids": list(range(1000))}, "outputs": {"polling_time": 0}}
+        DataSnapshot.objects.set_object(self.key_1, obj)
+        for polling_time in range(1, 3):
+            obj["outputs"]["polling_time"] = polling_time
+            DataSnapshot.objects.set_object(self.key_1, obj)
+            self.assertEqual(DataSnapshot.objects.get_object(self.key_1), obj)
+
+        # the base is persisted once
+        snapshot = DataSnapshot.objects.get(key=self.key_1)
+        self.assertEqual(snapshot.obj_delta.changes.keys(), {(("i", "outputs"), ("i", "polling_time"))})
+
+        # persist as a new base when the type of object changed
+        DataSnapshot.objects.set_object(self.key_1, self.obj_2)
+        self.assertEqual(DataSnapshot.objects.get_object(self.key_1), self.obj_2)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import pickle
+
+from django.test import TestCase
+
+from pipeline.engine.models.delta import StateDelta
+from pipeline.utils.collections import FancyDict
+
+
+class Data(object):
+    def __init__(self, inputs, outputs):
+        self.inputs = FancyDict(inputs)
+        self.outputs = FancyDict(outputs)
+
+
+class Service(object):
+    def __init__(self):
+        self.failed_map = {}
+        self.interval = 5
+
+
+class Act(object):
+    def __init__(self):
+        self.id = "act_id"
+        self.service = Service()
+        self.data = Data(inputs={"ids": list(range(1000))}, outputs={"polling_time": 0})
+
+
+class StateDeltaTestCase(TestCase):
+    def setUp(self):
+        self.act = Act()
+        self.base = pickle.dumps(self.act)
+        self.delta_base = StateDelta.make_base(self.act)
+
+    def assert_apply(self, delta):
+        delta = pickle.loads(pickle.dumps(delta))
+        act = delta.apply(pickle.loads(self.base))
+        self.assertEqual(act.__dict__.keys(), self.act.__dict__.keys())
+        self.assertEqual(act.data.inputs, self.act.data.inputs)
+        self.assertEqual(act.data.outputs, self.act.data.outputs)
+        self.assertEqual(act.service.__dict__, self.act.service.__dict__)
+
+    def test_diff(self):
+        self.act.data.outputs.polling_time = 5
+        self.act.service.failed_map[1] = "timeout"
+        delta = self.delta_base.diff(self.act)
+        self.assertEqual(
+            set(delta.changes),
+            {
+                (("a", "data"), ("a", "outputs"), ("i", "polling_time")),
+                (("a", "service"), ("a", "failed_map"), ("i", 1)),
+            },
+        )
+        self.assert_apply(delta)
+
+    def test_diff__new_and_removed(self):
+        self.act.data.outputs.result = {"succeeded": [1]}
+        del self.act.service.interval
+        self.act.data.outputs = FancyDict({"_result": True})
+        self.act.timeout = None
+        delta = self.delta_base.diff(self.act)
+        self.assertIn((("a", "service"), ("a", "interval")), delta.removed)
+        self.assert_apply(delta)
+
+    def test_diff__rebase(self):
+        self.assertIsNone(self.delta_base.diff({"id": "act_id"}))
+        # most of leaves changed
+        self.act.data.inputs.ids = list(range(1000, 2000))
+        self.assertIsNone(self.delta_base.diff(self.act))
+
+    def test_diff__shared_reference(self):
+        shared = {"ids": [1]}
+        self.act.data.outputs.x = shared
+        self.act.data.outputs.y = shared
+        delta = self.delta_base.diff(self.act)
+        # the closest common container of the references is recorded as a whole
+        self.assertEqual(set(delta.changes), {(("a", "data"), ("a", "outputs"))})
+        self.assert_apply(delta)
+        act = pickle.loads(pickle.dumps(delta)).apply(pickle.loads(self.base))
+        self.assertIs(act.data.outputs.x, act.data.outputs.y)
+
+        # shared inside leaves
+        self.act.data.outputs.y = {"ids": shared["ids"]}
+        act = self.delta_base.diff(self.act).apply(pickle.loads(self.base))
+        self.assertIs(act.data.outputs.x["ids"], act.data.outputs.y["ids"])
+
+        # shared under the root only
+        self.act.service.failed_map = shared
+        self.assertIsNone(self.delta_base.diff(self.act))
+        self.assertIsNone(StateDelta.make_base(self.act))
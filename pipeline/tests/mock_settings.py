@@ -94,6 +94,10 @@ PIPELINE_ENGINE_CORE_API_WORKERS = "pipeline.engine.core.api.workers"
 SCHEDULE_GET_SCHEDULE_PARENT_DATA = "pipeline.engine.core.schedule.get_schedule_parent_data"
 SCHEDULE_DELETE_PARENT_DATA = "pipeline.engine.core.schedule.delete_parent_data"
 SCHEDULE_SET_SCHEDULE_DATA = "pipeline.engine.core.schedule.set_schedule_data"
+SCHEDULE_ACQUIRE_SCHEDULE_LOCK = "pipeline.engine.core.schedule.acquire_schedule_lock"
+SCHEDULE_IS_SCHEDULE_LOCK_HELD = "pipeline.engine.core.schedule.is_schedule_lock_held"
+SCHEDULE_RENEW_SCHEDULE_LOCK = "pipeline.engine.core.schedule.renew_schedule_lock"
+SCHEDULE_GET_SCHEDULE_LOCK_RENEW_INTERVAL = "pipeline.engine.core.schedule.get_schedule_lock_renew_interval"
 
 ENGINE_ACTIVITY_FAIL_SIGNAL = "pipeline.engine.signals.activity_failed.send"
 ENGINE_SIGNAL_TIMEOUT_START_SEND = "pipeline.engine.signals.service_activity_timeout_monitor_start.send"